@@ -34,9 +34,28 @@ def create_app(config_name='default'):
     app.jinja_env.filters['month_name'] = month_name
 
     with app.app_context():
+        # Per-connection SQLite pragmas for this config
+        from . import database
+        database.init_app(app)
+        
         # Import models and routes
         from . import models  # noqa
-        from .routes import auth, main, expenses, budgets, reports
+        from . import rollups  # noqa: F401 - registers rollup flush listener
+        from . import search  # noqa: F401 - registers full-text index DDL
+        from . import alerts  # noqa: F401 - registers budget alert flush listener
+        from . import recurring  # noqa: F401 - schedules recurring templates
+        from .cache import view_cache
+        view_cache.init_app(app)
+        from .user_cache import user_cache
+        user_cache.init_app(app)
+        # Registers the {% cache %} template tag
+        from .fragment_cache import fragment_cache
+        fragment_cache.init_app(app)
+        from .jobs import job_runner
+        job_runner.init_app(app)
+        from .passwords import password_hasher
+        password_hasher.init_app(app)
+        from .routes import auth, main, expenses, budgets, reports, api
         
         # Register blueprints
         app.register_blueprint(auth.bp, url_prefix='/auth')
@@ -44,5 +63,16 @@ def create_app(config_name='default'):
         app.register_blueprint(expenses.bp, url_prefix='/expenses')
         app.register_blueprint(budgets.bp, url_prefix='/budgets')
         app.register_blueprint(reports.bp, url_prefix='/reports')
+        # JSON only; see app.routes.api for why no CSRF token is needed
+        app.register_blueprint(api.bp, url_prefix='/api/v1')
+        csrf.exempt(api.bp)
+        
+        # Opt-in request timing (no-op unless INSTRUMENTATION_ENABLED)
+        from .instrumentation import instrumentation
+        instrumentation.init_app(app)
+        
+        # Register CLI commands
+        from . import commands
+        commands.init_app(app)
         
         return app
\ No newline at end of file
@@ -0,0 +1,212 @@
+"""Budget alerts raised when monthly spending crosses a category's limits.
+
+Each category has two alert levels per calendar month: ``threshold`` once
+spending reaches ``alert_threshold`` percent of the category budget, and
+``overspent`` once it reaches the full budget. A level fires at most once
+per category per month; the unique ``uq_budget_alert_period`` index
+enforces that and inserts skip levels that have already fired, so
+concurrent writers cannot raise duplicates either.
+
+Evaluation is incremental and deferred. Every flush that changes
+expenses already produces per-month spending deltas for
+:mod:`app.rollups`; the months whose total grew are queued as an
+``alerts.evaluate`` job (:mod:`app.jobs`) in the same transaction. The
+job checks only those months against the running totals in
+``monthly_category_totals`` and inserts the levels they have reached that
+have not fired yet. Paths that change a budget rather than spending
+queue ``alerts.evaluate_category``.
+"""
+from sqlalchemy import event, select, tuple_
+from sqlalchemy.orm import Session
+
+from . import db, jobs, rollups
+from .cache import bump_data_version
+from .models import BudgetAlert, Category, MonthlyCategoryTotal
+
+THRESHOLD = 'threshold'
+OVERSPENT = 'overspent'
+
+def progress(spent, budget):
+    """Whole percentage of a budget that has been spent."""
+    return int(spent / budget * 100)
+
+def levels_reached(spent, budget, threshold):
+    """Alert levels a month's spending has reached.
+
+    Args:
+        spent (Decimal): Month's spending in the category
+        budget (Decimal): Category budget; no levels apply without one
+        threshold (int): Alert threshold as a percentage of the budget
+
+    Returns:
+        tuple: Reached levels, lowest first
+    """
+    if not budget or budget <= 0:
+        return ()
+    percent = progress(spent, budget)
+    if percent >= 100:
+        return (THRESHOLD, OVERSPENT)
+    if percent >= (threshold or 0):
+        return (THRESHOLD,)
+    return ()
+
+def alert_message(alert_type, name, spent, budget):
+    """User-facing text for an alert."""
+    if alert_type == OVERSPENT:
+        return (f'Budget exceeded: {name} spending is at '
+                f'{progress(spent, budget)}% of budget')
+    return (f'Budget alert: {name} spending has reached '
+            f'{progress(spent, budget)}% of budget')
+
+def _insert_statement(dialect_name):
+    """Build an insert that skips levels which already fired.
+
+    Returns None for dialects without ``ON CONFLICT DO NOTHING``.
+    """
+    if dialect_name == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect_name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        return None
+    return insert(BudgetAlert.__table__).on_conflict_do_nothing()
+
+def _write(connection, rows):
+    """Insert alert rows that have not already been raised for the period.
+
+    Returns:
+        int: Number of new alerts
+    """
+    if not rows:
+        return 0
+    table = BudgetAlert.__table__
+    key = (table.c.user_id, table.c.category_id, table.c.year,
+           table.c.month, table.c.alert_type)
+    raised = set(connection.execute(
+        select(*key).where(tuple_(*key).in_([
+            (r['user_id'], r['category_id'], r['year'], r['month'],
+             r['alert_type']) for r in rows
+        ]))
+    ).all())
+    rows = [
+        r for r in rows
+        if (r['user_id'], r['category_id'], r['year'], r['month'],
+            r['alert_type']) not in raised
+    ]
+    if not rows:
+        return 0
+
+    # Alerts show on every page, so cached views must not outlive them
+    bump_data_version(connection, {row['user_id'] for row in rows})
+    stmt = _insert_statement(connection.dialect.name)
+    if stmt is not None:
+        # A concurrent evaluation may have raised the same level meanwhile
+        connection.execute(stmt, rows)
+    else:
+        connection.execute(table.insert(), rows)
+    return len(rows)
+
+def _row(user_id, category_id, year, month, alert_type, message):
+    return {
+        'user_id': user_id,
+        'category_id': category_id,
+        'year': year,
+        'month': month,
+        'alert_type': alert_type,
+        'message': message,
+        'is_read': False
+    }
+
+def evaluate_months(months, connection):
+    """Raise alerts for the levels some months' spending has reached.
+
+    Args:
+        months (list): ``(user_id, category_id, year, month)`` keys whose
+            running totals in ``monthly_category_totals`` to check
+        connection: Connection to read totals and write alerts on
+
+    Returns:
+        int: Number of new alerts
+    """
+    if not months:
+        return 0
+
+    totals = MonthlyCategoryTotal.__table__
+    categories = Category.__table__
+    results = connection.execute(
+        select(
+            totals.c.user_id, totals.c.category_id, totals.c.year,
+            totals.c.month, totals.c.total, categories.c.name,
+            categories.c.budget_amount, categories.c.alert_threshold
+        ).join(
+            categories, categories.c.id == totals.c.category_id
+        ).where(
+            tuple_(totals.c.user_id, totals.c.category_id,
+                   totals.c.year, totals.c.month).in_(
+                [tuple(key) for key in months]
+            ),
+            categories.c.budget_amount > 0
+        )
+    )
+
+    rows = [
+        _row(r.user_id, r.category_id, r.year, r.month, level,
+             alert_message(level, r.name, r.total, r.budget_amount))
+        for r in results
+        for level in levels_reached(r.total, r.budget_amount,
+                                    r.alert_threshold)
+    ]
+    return _write(connection, rows)
+
+def evaluate_category(category, year, month):
+    """Raise any alerts a category's current budget puts it over.
+
+    Used after a budget or threshold change, where spending is unchanged
+    but the limits it is measured against moved.
+
+    Args:
+        category (Category): Category to check
+        year (int): Year of the period
+        month (int): Month of the period
+
+    Returns:
+        int: Number of new alerts
+    """
+    spent = category.user.get_category_spending(category.id, year, month)
+    rows = [
+        _row(category.user_id, category.id, year, month, level,
+             alert_message(level, category.name, spent,
+                           category.budget_amount))
+        for level in levels_reached(spent, category.budget_amount,
+                                    category.alert_threshold)
+    ]
+    return _write(db.session.connection(), rows)
+
+@jobs.task('alerts.evaluate')
+def _evaluate_job(months):
+    """Job: check ``[user_id, category_id, year, month]`` keys."""
+    evaluate_months(months, db.session.connection())
+
+@jobs.task('alerts.evaluate_category')
+def _evaluate_category_job(category_id, year, month):
+    """Job: re-check one category after its budget changed."""
+    category = db.session.get(Category, category_id)
+    if category is not None:
+        evaluate_category(category, year, month)
+
+def queue_category_evaluation(category, year, month):
+    """Queue :func:`evaluate_category` to run once this transaction commits."""
+    jobs.enqueue('alerts.evaluate_category', {
+        'category_id': category.id, 'year': year, 'month': month
+    })
+
+@event.listens_for(Session, 'after_flush')
+def _queue_on_flush(session, flush_context):
+    """Queue a check of the months whose spending this flush increased."""
+    grown = [
+        list(key)
+        for key, (amount, _) in rollups.collect_deltas(session).items()
+        if amount > 0
+    ]
+    if grown:
+        jobs.enqueue('alerts.evaluate', {'months': grown}, session=session)
@@ -0,0 +1,344 @@
+"""Per-user versioned view cache.
+
+Computed dashboard and report data is cached under
+``(user_id, data_version, view)``. ``User.data_version`` is bumped in the
+same transaction as any expense, category, budget, alert or profile
+write, so a write simply makes older entries unreachable and no explicit
+invalidation is needed. Stale versions age out of the bounded backends.
+
+Backends:
+    memory: Bounded in-process LRU, per worker process
+    filesystem: Bounded directory of pickles shared by worker processes
+    null: Caching disabled
+"""
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+from datetime import datetime
+from collections import OrderedDict
+from flask import current_app
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+from .models import Budget, BudgetAlert, Category, Expense, User
+
+# Models whose writes change what a user's dashboards and reports show
+VERSIONED_MODELS = (Expense, Category, Budget, BudgetAlert)
+
+# User columns that no cached view (or cached user) shows
+UNVERSIONED_USER_COLUMNS = ('password_hash',)
+
+# Connection.info key collecting users bumped in the open transaction
+BUMPED_USERS = 'bumped_user_ids'
+
+class CacheStats:
+    """Thread-safe hit/miss counters."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def as_dict(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 4) if total else 0.0
+        }
+
+class NullBackend:
+    """Backend that never stores anything."""
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value):
+        pass
+
+    def delete(self, key):
+        pass
+
+    def clear(self):
+        pass
+
+    def __len__(self):
+        return 0
+
+class MemoryBackend:
+    """Bounded in-process LRU cache."""
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+class FileSystemBackend:
+    """Bounded on-disk cache shared by every process on the host.
+
+    Entries are pickled to one file each and written atomically, so
+    concurrent workers never observe partial writes. When the directory
+    grows past ``max_entries`` the least recently used files are removed.
+    """
+
+    def __init__(self, directory, max_entries=4096):
+        self.directory = directory
+        self.max_entries = max_entries
+        self._writes = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        digest = hashlib.sha256(repr(key).encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, f'{digest}.cache')
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as handle:
+                stored_key, value = pickle.load(handle)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        if stored_key != key:
+            return None
+        try:
+            os.utime(path)  # Refresh recency for LRU pruning
+        except OSError:
+            pass
+        return value
+
+    def set(self, key, value):
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as handle:
+                pickle.dump((key, value), handle,
+                            protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, self._path(key))
+        except OSError:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return
+        self._writes += 1
+        # Pruning lists the directory, so only do it periodically
+        if self._writes % 64 == 0:
+            self.prune()
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def prune(self):
+        """Remove least recently used entries beyond ``max_entries``."""
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.cache'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                entries.append((os.path.getmtime(path), path))
+            except OSError:
+                continue
+        excess = len(entries) - self.max_entries
+        if excess <= 0:
+            return
+        for _, path in sorted(entries)[:excess]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def clear(self):
+        for name in os.listdir(self.directory):
+            if name.endswith('.cache'):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+
+    def __len__(self):
+        return sum(
+            1 for name in os.listdir(self.directory) if name.endswith('.cache')
+        )
+
+def create_backend(config, prefix='VIEW_CACHE'):
+    """Build the cache backend selected by ``<prefix>_BACKEND``.
+
+    Args:
+        config (dict): Application config
+        prefix (str): Config key prefix, e.g. ``USER_CACHE`` reads
+            ``USER_CACHE_BACKEND``, ``USER_CACHE_MAX_ENTRIES`` and
+            ``USER_CACHE_DIR``
+    """
+    kind = config.get(f'{prefix}_BACKEND', 'memory')
+    if kind == 'memory':
+        return MemoryBackend(config.get(f'{prefix}_MAX_ENTRIES', 1024))
+    if kind == 'filesystem':
+        return FileSystemBackend(
+            config[f'{prefix}_DIR'],
+            config.get(f'{prefix}_MAX_ENTRIES', 4096)
+        )
+    if kind == 'null':
+        return NullBackend()
+    raise ValueError(f'Unknown {prefix}_BACKEND: {kind}')
+
+class ViewCache:
+    """Flask extension caching computed view data per user and version."""
+
+    def init_app(self, app):
+        # Namespace keys by database so a shared cache directory cannot
+        # serve one database's figures to another
+        namespace = hashlib.sha256(
+            app.config['SQLALCHEMY_DATABASE_URI'].encode('utf-8')
+        ).hexdigest()[:12]
+        app.extensions['view_cache'] = {
+            'backend': create_backend(app.config),
+            'stats': CacheStats(),
+            'namespace': namespace
+        }
+
+    @property
+    def _state(self):
+        return current_app.extensions['view_cache']
+
+    @property
+    def backend(self):
+        return self._state['backend']
+
+    def get_or_compute(self, user, view, compute):
+        """Return cached view data, computing and storing it on a miss.
+
+        Args:
+            user (User): Owner of the data; its ``data_version`` scopes
+                the entry
+            view (str): View name, including any parameters that change
+                the result (e.g. the reporting month)
+            compute (callable): Zero-argument function producing the data
+
+        Returns:
+            object: Cached or freshly computed data
+        """
+        state = self._state
+        key = (state['namespace'], user.id, user.data_version or 0, view)
+        value = state['backend'].get(key)
+        if value is not None:
+            state['stats'].record(hit=True)
+            return value
+
+        state['stats'].record(hit=False)
+        value = compute()
+        state['backend'].set(key, value)
+        return value
+
+    def stats(self):
+        """Hit/miss counters and current size for this process."""
+        state = self._state
+        stats = state['stats'].as_dict()
+        stats['entries'] = len(state['backend'])
+        stats['backend'] = type(state['backend']).__name__
+        return stats
+
+view_cache = ViewCache()
+
+def bump_data_version(connection, user_ids):
+    """Increment ``data_version`` for users whose data changed.
+
+    Also stamps ``data_modified_at``, which conditional GETs send as
+    ``Last-Modified``.
+
+    Args:
+        connection: Connection to execute the update on
+        user_ids (iterable): Ids of affected users
+
+    Returns:
+        datetime: The modification time written, or None if no users
+    """
+    user_ids = sorted({user_id for user_id in user_ids if user_id is not None})
+    if not user_ids:
+        return None
+    table = User.__table__
+    now = datetime.utcnow()
+    connection.execute(
+        table.update()
+        .where(table.c.id.in_(user_ids))
+        .values(data_version=table.c.data_version + 1,
+                data_modified_at=now)
+    )
+    # Cached copies of these users go stale once this commits (app.user_cache)
+    connection.info.setdefault(BUMPED_USERS, set()).update(user_ids)
+    return now
+
+def _profile_modified(user):
+    attrs = inspect(user).attrs
+    return any(
+        attrs[column.key].history.has_changes()
+        for column in User.__table__.columns
+        if column.key not in UNVERSIONED_USER_COLUMNS
+    )
+
+def _changed_user_ids(session):
+    """Collect users whose cached views a pending flush invalidates."""
+    user_ids = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, VERSIONED_MODELS):
+            if obj in session.dirty and not session.is_modified(obj):
+                continue
+            user_ids.add(obj.user_id)
+        elif isinstance(obj, User) and obj in session.dirty:
+            # Profile changes (e.g. total budget) also affect dashboards;
+            # password rehashes do not
+            if _profile_modified(obj):
+                user_ids.add(obj.id)
+    return user_ids
+
+@event.listens_for(Session, 'after_flush')
+def _bump_versions_on_flush(session, flush_context):
+    """Bump data versions in the same transaction as the write."""
+    user_ids = _changed_user_ids(session)
+    if not user_ids:
+        return
+    modified_at = bump_data_version(session.connection(), user_ids)
+
+    # Keep already-loaded users in step without another query
+    for user_id in user_ids:
+        user = session.identity_map.get(session.identity_key(User, user_id))
+        if user is not None and 'data_version' in user.__dict__:
+            set_committed_value(
+                user, 'data_version', (user.data_version or 0) + 1
+            )
+            set_committed_value(user, 'data_modified_at', modified_at)
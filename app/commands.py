@@ -0,0 +1,158 @@
+"""Flask CLI commands for maintenance tasks."""
+import click
+
+def init_app(app):
+    """Register CLI commands on the application."""
+
+    @app.cli.command('rebuild-rollups')
+    @click.option('--user-id', type=int, default=None,
+                  help='Only rebuild rollups for this user.')
+    def rebuild_rollups(user_id):
+        """Rebuild monthly spending rollups from raw expenses."""
+        from . import rollups
+        rows = rollups.rebuild(user_id=user_id)
+        click.echo(f'Rebuilt {rows} monthly rollup rows.')
+
+    @app.cli.command('rebuild-search-index')
+    def rebuild_search_index():
+        """Rebuild the expense full-text search index."""
+        from . import search
+        search.rebuild()
+        click.echo('Rebuilt the expense search index.')
+
+    @app.cli.command('import-expenses')
+    @click.argument('username')
+    @click.argument('csv_file', type=click.File('r', encoding='utf-8-sig'))
+    @click.option('--batch-size', type=int, default=None,
+                  help='Rows inserted per transaction.')
+    @click.option('--no-create-categories', is_flag=True,
+                  help='Reject rows whose category does not exist.')
+    def import_expenses(username, csv_file, batch_size,
+                        no_create_categories):
+        """Bulk import expenses for USERNAME from an export-format CSV."""
+        from . import importer
+        from .models import User
+
+        user = User.query.filter_by(username=username).first()
+        if user is None:
+            raise click.ClickException(f'Unknown user: {username}')
+
+        def report(result):
+            click.echo(
+                f'  {result.processed} rows read, {result.imported} imported, '
+                f'{result.error_count} errors',
+                err=True
+            )
+
+        result = importer.import_expenses(
+            user.id,
+            csv_file,
+            batch_size=batch_size or importer.IMPORT_BATCH_SIZE,
+            create_missing_categories=not no_create_categories,
+            progress=report
+        )
+        for line, message in result.errors:
+            click.echo(f'line {line}: {message}', err=True)
+        click.echo(
+            f'Imported {result.imported} of {result.processed} rows '
+            f'({result.error_count} errors).'
+        )
+
+    @app.cli.command('seed')
+    @click.option('--users', type=int, default=10, show_default=True,
+                  help='Number of users to generate.')
+    @click.option('--categories', type=int, default=8, show_default=True,
+                  help='Categories per user.')
+    @click.option('--years', type=int, default=2, show_default=True,
+                  help='Years of history per user.')
+    @click.option('--seed', 'random_seed', type=int, default=42,
+                  show_default=True, help='Random seed.')
+    @click.option('--end-date', type=click.DateTime(formats=['%Y-%m-%d']),
+                  default=None, help='Last day of history (default: today).')
+    @click.option('--chunk-size', type=int, default=None,
+                  help='Expense rows inserted per transaction.')
+    @click.option('--prefix', default='seed', show_default=True,
+                  help='Username prefix for generated users.')
+    def seed(users, categories, years, random_seed, end_date, chunk_size,
+             prefix):
+        """Generate a deterministic synthetic dataset for benchmarking."""
+        import time
+        from . import seed as seeder
+
+        started = time.perf_counter()
+
+        def report(result):
+            click.echo(
+                f'  {result.users} users, {result.expenses} expenses '
+                f'({time.perf_counter() - started:.1f}s)',
+                err=True
+            )
+
+        try:
+            result = seeder.seed(
+                users=users,
+                categories=categories,
+                years=years,
+                seed=random_seed,
+                end=end_date.date() if end_date else None,
+                chunk_size=chunk_size or seeder.SEED_CHUNK_SIZE,
+                prefix=prefix,
+                progress=report
+            )
+        except ValueError as e:
+            raise click.ClickException(str(e))
+
+        counts = result.as_dict()
+        click.echo(
+            'Seeded ' + ', '.join(f'{n} {table}' for table, n in counts.items())
+            + f' in {time.perf_counter() - started:.1f}s.'
+        )
+
+    @app.cli.command('worker')
+    @click.option('--once', is_flag=True,
+                  help='Run the jobs that are due, then exit.')
+    @click.option('--poll-interval', type=float, default=None,
+                  help='Seconds to sleep when no job is due '
+                       '(default: JOBS_POLL_INTERVAL).')
+    def worker(once, poll_interval):
+        """Run queued background jobs until interrupted."""
+        import time
+        from . import jobs
+
+        interval = poll_interval or app.config.get('JOBS_POLL_INTERVAL', 5)
+        total = 0
+        try:
+            while True:
+                ran = jobs.run_pending()
+                total += ran
+                if once and not ran:
+                    break
+                if not ran:
+                    time.sleep(interval)
+        except KeyboardInterrupt:
+            pass
+        click.echo(f'Ran {total} jobs.')
+
+    @app.cli.command('materialize-recurring')
+    @click.option('--date', 'until', type=click.DateTime(formats=['%Y-%m-%d']),
+                  default=None, help='Generate occurrences due up to this '
+                                     'day (default: today).')
+    @click.option('--batch-size', type=int, default=None,
+                  help='Recurring templates handled per transaction.')
+    def materialize_recurring(until, batch_size):
+        """Generate due occurrences of recurring expenses (run daily)."""
+        from . import recurring
+        result = recurring.materialize(
+            until=until.date() if until else None,
+            batch_size=batch_size or recurring.RECURRING_BATCH_SIZE
+        )
+        click.echo(
+            f'Generated {result.occurrences} expenses from '
+            f'{result.templates} recurring templates.'
+        )
+
+    @app.cli.command('prune-idempotency-keys')
+    def prune_idempotency_keys():
+        """Delete expired API idempotency keys (run daily)."""
+        from . import idempotency
+        click.echo(f'Removed {idempotency.prune()} expired idempotency keys.')
@@ -0,0 +1,103 @@
+"""Conditional GET for per-user pages and JSON.
+
+Views decorated with :func:`conditional` answer ``If-None-Match`` and
+``If-Modified-Since`` before doing any work. The validators come from
+the logged-in user, which the user cache serves without a query:
+
+    ETag: Hash of the user's ``data_version``, the request path and
+        query string, and the current day (pages show "this month")
+    Last-Modified: The user's ``data_modified_at``, or the start of the
+        day if later
+
+Both move on every expense, category, budget, alert or profile write
+(see :func:`app.cache.bump_data_version`), so a matching request gets a
+``304`` without running the page's aggregation queries.
+
+Pages holding forms embed CSRF tokens that expire after
+``WTF_CSRF_TIME_LIMIT``; for those the validators also change every half
+of that limit, so a revalidated page never carries an expired token.
+Responses with pending flash messages are always rendered in full.
+"""
+import hashlib
+import time as clock
+from datetime import date, datetime, time, timedelta, timezone
+from functools import wraps
+from flask import current_app, make_response, request, session
+from flask_login import current_user
+from werkzeug.http import is_resource_modified
+
+def _utc(local):
+    """Naive local time as naive UTC, like the model timestamps."""
+    return local.astimezone(timezone.utc).replace(tzinfo=None)
+
+def validators(user, forms=False):
+    """Compute the ETag and Last-Modified for the current request.
+
+    Args:
+        user (User): Owner of the data shown
+        forms (bool): Whether the response embeds CSRF tokens
+
+    Returns:
+        tuple: ``(etag, last_modified)``; ``last_modified`` is None when
+        it could not be trusted to one-second precision
+    """
+    today = date.today()
+    parts = [current_app.config.get('CONDITIONAL_GET_SALT', ''),
+             str(user.id), str(user.data_version or 0),
+             request.full_path, today.isoformat()]
+    floor = _utc(datetime.combine(today, time.min))
+
+    window = current_app.config.get('WTF_CSRF_TIME_LIMIT', 3600)
+    if forms and window:
+        window = max(window // 2, 1)
+        bucket = int(clock.time() // window)
+        parts.append(f'csrf:{bucket}')
+        floor = max(floor, datetime.utcfromtimestamp(bucket * window))
+
+    etag = hashlib.sha256(':'.join(parts).encode('utf-8')).hexdigest()[:32]
+
+    last_modified = max(user.data_modified_at or floor, floor)
+    # HTTP dates are whole seconds; a write later in the same second
+    # would not move them, so only the ETag is sent until it has passed
+    if datetime.utcnow() - last_modified < timedelta(seconds=1):
+        last_modified = None
+    return etag, last_modified
+
+def _set_validators(response, etag, last_modified):
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified.replace(tzinfo=timezone.utc)
+    # Per-user content: browsers may keep it but must revalidate
+    response.headers['Cache-Control'] = 'private, no-cache'
+    response.vary.add('Cookie')
+    return response
+
+def conditional(forms=False):
+    """Serve ``304 Not Modified`` when the client's copy is current.
+
+    Apply below ``login_required``.
+
+    Args:
+        forms (bool): The page embeds CSRF-protected forms
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method not in ('GET', 'HEAD') or \
+                    session.get('_flashes'):
+                return view(*args, **kwargs)
+
+            etag, last_modified = validators(current_user, forms)
+            if not is_resource_modified(request.environ, etag=etag,
+                                        last_modified=last_modified):
+                return _set_validators(
+                    current_app.response_class(status=304),
+                    etag, last_modified
+                )
+
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200:
+                _set_validators(response, etag, last_modified)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,128 @@
+"""Dashboard aggregate snapshot.
+
+Computes every spending figure the dashboard shows from one query over
+the rollup table: the user's categories are outer-joined to a two-month
+window of rollups and conditionally aggregated into this month's and last
+month's totals per category.
+"""
+from datetime import datetime
+from decimal import Decimal
+from sqlalchemy import and_, case, func
+
+from . import db
+from .models import Category, MonthlyCategoryTotal
+from .periods import Period, shift_month
+from .reporting import summarize_category
+
+DEFAULT_CHART_COLOR = '#10b981'
+
+class DashboardSnapshot:
+    """This month's and last month's spending for one user.
+
+    Holds only plain values so a snapshot can be cached between requests.
+    """
+
+    def __init__(self, rows, period, previous_period):
+        self.period = period
+        self.previous_period = previous_period
+        self.categories = []
+        self.monthly_spending = Decimal('0')
+        self.prev_spending = Decimal('0')
+        spent = []
+
+        for category, this_month, last_month, this_count in rows:
+            category = summarize_category(category)
+            this_month = this_month or Decimal('0')
+            last_month = last_month or Decimal('0')
+            self.categories.append(category)
+            self.monthly_spending += this_month
+            self.prev_spending += last_month
+            if this_count:
+                spent.append((category, this_month))
+
+        # Stable sort keeps category order for equal totals
+        self.category_totals = sorted(spent, key=lambda row: row[1],
+                                      reverse=True)
+
+    @classmethod
+    def compute(cls, user_id, now=None):
+        """Build a snapshot with a single conditional-aggregation query.
+
+        Args:
+            user_id (int): User to summarise
+            now (datetime, optional): Reference date, defaults to now
+
+        Returns:
+            DashboardSnapshot: Aggregated dashboard figures
+        """
+        now = now or datetime.now()
+        prev_year, prev_month = shift_month(now.year, now.month, -1)
+        period = Period.month(now.year, now.month)
+        previous_period = Period.month(prev_year, prev_month)
+
+        is_current = and_(
+            MonthlyCategoryTotal.year == now.year,
+            MonthlyCategoryTotal.month == now.month
+        )
+        is_previous = and_(
+            MonthlyCategoryTotal.year == prev_year,
+            MonthlyCategoryTotal.month == prev_month
+        )
+
+        rows = db.session.query(
+            Category,
+            func.sum(case((is_current, MonthlyCategoryTotal.total), else_=0)),
+            func.sum(case((is_previous, MonthlyCategoryTotal.total), else_=0)),
+            func.sum(case((is_current, MonthlyCategoryTotal.count), else_=0))
+        ).outerjoin(
+            MonthlyCategoryTotal,
+            and_(
+                MonthlyCategoryTotal.category_id == Category.id,
+                MonthlyCategoryTotal.user_id == user_id,
+                Period(previous_period.start, period.end).rollup_filter(
+                    MonthlyCategoryTotal
+                )
+            )
+        ).filter(
+            Category.user_id == user_id
+        ).group_by(
+            Category.id
+        ).order_by(
+            Category.id
+        ).all()
+
+        return cls(rows, period, previous_period)
+
+    @property
+    def active_categories(self):
+        """Categories offered for quick entry."""
+        return [category for category in self.categories if category.is_active]
+
+    @property
+    def monthly_spending_change(self):
+        """Percentage change from last month, or None without a baseline."""
+        if self.prev_spending > 0:
+            return int(
+                ((self.monthly_spending - self.prev_spending)
+                 / self.prev_spending) * 100
+            )
+        return None
+
+    @property
+    def top_category(self):
+        """Highest-spend category this month and its total."""
+        if self.category_totals:
+            return self.category_totals[0]
+        return None, Decimal('0')
+
+    @property
+    def chart_data(self):
+        """Category breakdown for the spending chart."""
+        return {
+            'categories': [c.name for c, _ in self.category_totals],
+            # Convert Decimal to float for JSON
+            'amounts': [float(total) for _, total in self.category_totals],
+            'colors': [
+                c.color or DEFAULT_CHART_COLOR for c, _ in self.category_totals
+            ]
+        }
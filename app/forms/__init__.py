@@ -1,6 +1,6 @@
 """Forms package for Centsible Budget Tracker."""
 from .auth import LoginForm, RegistrationForm
-from .expense import ExpenseForm, CategoryForm
+from .expense import ExpenseForm, CategoryForm, ImportExpensesForm
 from .budget import CategoryBudgetForm, UserBudgetForm
 from .quick import QuickExpenseForm
 
@@ -9,6 +9,7 @@ __all__ = [
     'RegistrationForm',
     'ExpenseForm',
     'CategoryForm',
+    'ImportExpensesForm',
     'CategoryBudgetForm',
     'UserBudgetForm',
     'QuickExpenseForm',
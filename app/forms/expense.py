@@ -2,6 +2,7 @@
 from datetime import date
 from decimal import Decimal
 from flask_wtf import FlaskForm
+from flask_wtf.file import FileAllowed, FileField, FileRequired
 from wtforms import (
     StringField, DecimalField, DateField, SelectField,
     TextAreaField, BooleanField, SubmitField
@@ -56,4 +57,13 @@ class CategoryForm(FlaskForm):
         if field.data and not field.data.startswith('#'):
             field.data = f'#{field.data}'
         if field.data and not len(field.data) in [4, 7]:  # #RGB or #RRGGBB
-            raise ValidationError('Invalid hex color code')
\ No newline at end of file
+            raise ValidationError('Invalid hex color code')
+
+class ImportExpensesForm(FlaskForm):
+    """Form for uploading an expense CSV in the export layout."""
+    file = FileField('CSV File', validators=[
+        FileRequired(),
+        FileAllowed(['csv'], 'Please upload a .csv file')
+    ])
+    create_categories = BooleanField('Create missing categories', default=True)
+    submit = SubmitField('Import Expenses')
@@ -0,0 +1,172 @@
+"""Template fragment caching.
+
+Large template blocks that only depend on a user's aggregates can be
+cached as rendered HTML::
+
+    {% cache 'overview' %} ... {% endcache %}
+    {% cache 'chart-' ~ period, 600 %} ... {% endcache %}
+
+The first argument names the fragment within its template; add to it
+anything else the block depends on, such as query parameters. The
+optional second argument is a TTL in seconds, defaulting to
+``FRAGMENT_CACHE_TTL``.
+
+Entries are keyed by ``(user_id, data_version, day, template, name)``,
+like the view cache, so any expense, category, budget, alert or profile
+write makes a user's fragments unreachable. The TTL only bounds how long
+a fragment that depends on something else (the clock) can be served.
+Never cache a block holding a CSRF token or a flashed message. Outside a
+request, or for anonymous users, the body is rendered every time.
+
+Backends are those of the view cache, selected by
+``FRAGMENT_CACHE_BACKEND`` (bounded ``memory`` by default).
+
+Each entry stores how long its body took to render, so :meth:`stats`
+reports the rendering time spent on misses and the time saved by hits
+per fragment. The figures are served at ``/_stats`` with the other cache
+counters.
+"""
+import hashlib
+import threading
+import time
+from datetime import date
+from flask import current_app, has_request_context
+from flask_login import current_user
+from jinja2 import nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+
+from .cache import CacheStats, create_backend
+
+class FragmentStats:
+    """Thread-safe per-fragment hit, miss and render time counters."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._fragments = {}
+
+    def record(self, fragment, hit, seconds):
+        """Count a lookup.
+
+        Args:
+            fragment (str): ``template:name``
+            hit (bool): Whether the fragment came from the cache
+            seconds (float): Render time spent on a miss, or saved by a hit
+        """
+        with self._lock:
+            counts = self._fragments.get(fragment)
+            if counts is None:
+                counts = self._fragments[fragment] = {
+                    'hits': 0, 'misses': 0, 'render_ms': 0.0, 'saved_ms': 0.0
+                }
+            if hit:
+                counts['hits'] += 1
+                counts['saved_ms'] += seconds * 1000
+            else:
+                counts['misses'] += 1
+                counts['render_ms'] += seconds * 1000
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                fragment: {
+                    'hits': counts['hits'],
+                    'misses': counts['misses'],
+                    'render_ms': round(counts['render_ms'], 3),
+                    'saved_ms': round(counts['saved_ms'], 3)
+                }
+                for fragment, counts in sorted(self._fragments.items())
+            }
+
+class FragmentCacheExtension(Extension):
+    """Jinja extension adding the ``{% cache name[, ttl] %}`` tag."""
+
+    tags = {'cache'}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        args = [nodes.Const(parser.name), parser.parse_expression()]
+        if parser.stream.skip_if('comma'):
+            args.append(parser.parse_expression())
+        else:
+            args.append(nodes.Const(None))
+        body = parser.parse_statements(('name:endcache',), drop_needle=True)
+        return nodes.CallBlock(
+            self.call_method('_render', args), [], [], body
+        ).set_lineno(lineno)
+
+    def _render(self, template, name, ttl, caller):
+        return fragment_cache.render(template, name, ttl, caller)
+
+class FragmentCache:
+    """Flask extension storing rendered template fragments."""
+
+    def init_app(self, app):
+        namespace = hashlib.sha256(
+            app.config['SQLALCHEMY_DATABASE_URI'].encode('utf-8')
+        ).hexdigest()[:12]
+        app.extensions['fragment_cache'] = {
+            'backend': create_backend(app.config, prefix='FRAGMENT_CACHE'),
+            'stats': CacheStats(),
+            'fragments': FragmentStats(),
+            'namespace': namespace,
+            'ttl': app.config.get('FRAGMENT_CACHE_TTL', 300)
+        }
+        app.jinja_env.add_extension(FragmentCacheExtension)
+
+    @property
+    def _state(self):
+        return current_app.extensions['fragment_cache']
+
+    def render(self, template, name, ttl, caller):
+        """Return a fragment from the cache, rendering it on a miss.
+
+        Args:
+            template (str): Name of the template holding the fragment
+            name (str): Fragment name within the template
+            ttl (int): Seconds to keep the fragment, or None for the
+                configured default
+            caller (callable): Renders the block body
+
+        Returns:
+            Markup: Rendered fragment
+        """
+        if not has_request_context() or \
+                not current_user.is_authenticated:
+            return caller()
+
+        state = self._state
+        fragment = f'{template}:{name}'
+        key = ('fragment', state['namespace'], current_user.id,
+               current_user.data_version or 0, date.today().toordinal(),
+               fragment)
+        entry = state['backend'].get(key)
+        if entry is not None and entry[0] > time.time():
+            state['stats'].record(hit=True)
+            state['fragments'].record(fragment, True, entry[2])
+            return Markup(entry[1])
+
+        started = time.perf_counter()
+        html = caller()
+        elapsed = time.perf_counter() - started
+        state['stats'].record(hit=False)
+        state['fragments'].record(fragment, False, elapsed)
+
+        if ttl is None:
+            ttl = state['ttl']
+        # Wall-clock expiry, comparable across processes and restarts
+        state['backend'].set(
+            key, (time.time() + ttl, str(html), elapsed)
+        )
+        return html
+
+    def stats(self):
+        """Hit/miss counters, size and per-fragment render times."""
+        state = self._state
+        stats = state['stats'].as_dict()
+        stats['entries'] = len(state['backend'])
+        stats['backend'] = type(state['backend']).__name__
+        stats['fragments'] = state['fragments'].as_dict()
+        return stats
+
+fragment_cache = FragmentCache()
@@ -0,0 +1,88 @@
+"""Idempotency keys for API writes.
+
+Clients send an ``Idempotency-Key`` header with a write they may need to
+retry. The first request's response is stored in the same transaction
+as the write itself, so a key either has both a committed write and its
+response or neither. A retry with the same key and the same request gets
+the stored response replayed instead of repeating the write; reusing a
+key for a different request is an error.
+
+Two copies of a request racing each other both run, but only one can
+commit its key (``uq_idempotency_key``); the other rolls back and
+replays the winner's response.
+
+Keys expire after ``API_IDEMPOTENCY_TTL`` seconds; ``flask
+prune-idempotency-keys`` deletes expired rows.
+"""
+import hashlib
+import json
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import delete, select
+
+from . import db
+from .models import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+
+def request_hash(method, path, body):
+    """Fingerprint a request so a reused key can be told apart.
+
+    Args:
+        method (str): HTTP method
+        path (str): Request path
+        body: Decoded JSON body, or None; compared in canonical form so
+            whitespace and key order do not matter
+    """
+    canonical = json.dumps(body, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(
+        f'{method} {path}\n{canonical}'.encode('utf-8')
+    ).hexdigest()
+
+def _expires_before():
+    return datetime.utcnow() - timedelta(
+        seconds=current_app.config.get('API_IDEMPOTENCY_TTL', 86400)
+    )
+
+def lookup(user_id, key):
+    """Return the live stored result for a key, or None.
+
+    An expired result is deleted straight away so the key can be
+    recorded again in this transaction.
+    """
+    stored = db.session.scalars(
+        select(IdempotencyKey).where(IdempotencyKey.user_id == user_id,
+                                     IdempotencyKey.key == key)
+    ).first()
+    if stored is not None and stored.created_at < _expires_before():
+        db.session.execute(
+            delete(IdempotencyKey).where(IdempotencyKey.id == stored.id)
+        )
+        db.session.expunge(stored)
+        return None
+    return stored
+
+def record(user_id, key, fingerprint, status_code, response_body):
+    """Store a response with the write it belongs to; the caller commits."""
+    db.session.add(IdempotencyKey(
+        user_id=user_id,
+        key=key,
+        request_hash=fingerprint,
+        status_code=status_code,
+        response_body=response_body
+    ))
+
+def prune():
+    """Delete expired keys.
+
+    Returns:
+        int: Number of keys deleted
+    """
+    result = db.session.execute(
+        delete(IdempotencyKey).where(
+            IdempotencyKey.created_at < _expires_before()
+        )
+    )
+    db.session.commit()
+    return result.rowcount
@@ -0,0 +1,254 @@
+"""Bulk expense CSV import.
+
+Reads the column layout written by :mod:`app.exports`, validates rows in
+chunks, resolves category names through one pre-loaded dictionary and
+inserts each chunk with a single executemany in its own transaction.
+Rollups and the user's data version are updated, and budget alerts for
+the months spending grew in queued, per chunk, since bulk inserts bypass
+the ORM flush hooks.
+"""
+import csv
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+
+from . import db, jobs, rollups
+from .cache import bump_data_version
+from .exports import EXPORT_HEADER
+from .forms.expense import ExpenseForm
+from .models import Category, Expense
+
+IMPORT_BATCH_SIZE = 5000
+
+# Keep memory bounded on badly malformed files
+MAX_REPORTED_ERRORS = 1000
+
+REQUIRED_COLUMNS = ('Date', 'Category', 'Description', 'Amount')
+
+# Reuse the option lists the expense form validates against
+PAYMENT_METHODS = {
+    value for value, _ in ExpenseForm.payment_method.kwargs['choices'] if value
+}
+RECURRENCE_FREQUENCIES = {
+    value for value, _ in ExpenseForm.recurrence_frequency.kwargs['choices']
+    if value
+}
+
+class ImportResult:
+    """Outcome of an import run."""
+
+    def __init__(self):
+        self.processed = 0
+        self.imported = 0
+        self.created_categories = []
+        self.errors = []
+        self.error_count = 0
+
+    def add_error(self, line, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, message))
+
+    def as_dict(self):
+        return {
+            'processed': self.processed,
+            'imported': self.imported,
+            'created_categories': self.created_categories,
+            'error_count': self.error_count,
+            'errors': [
+                {'line': line, 'message': message}
+                for line, message in self.errors
+            ]
+        }
+
+class RowError(ValueError):
+    """Raised when a CSV row fails validation."""
+
+def _choice(value, allowed, label):
+    """Normalise a select-style value ("Credit Card" -> "credit_card")."""
+    value = (value or '').strip().lower().replace(' ', '_')
+    if not value:
+        return None
+    if value not in allowed:
+        raise RowError(f'{label}: not a valid choice ({value})')
+    return value
+
+def validate_row(row):
+    """Validate one CSV row against the expense form rules.
+
+    Args:
+        row (dict): Row from ``csv.DictReader``
+
+    Returns:
+        dict: Column values ready for insertion, plus ``category_name``
+
+    Raises:
+        RowError: If any field is invalid
+    """
+    try:
+        expense_date = datetime.strptime(
+            (row.get('Date') or '').strip(), '%Y-%m-%d'
+        ).date()
+    except ValueError:
+        raise RowError('Date: expected YYYY-MM-DD')
+
+    category_name = (row.get('Category') or '').strip()
+    if not category_name or len(category_name) > 64:
+        raise RowError('Category: must be 1-64 characters')
+
+    description = (row.get('Description') or '').strip()
+    if not description or len(description) > 128:
+        raise RowError('Description: must be 1-128 characters')
+
+    try:
+        amount = Decimal((row.get('Amount') or '').strip().replace(',', ''))
+    except InvalidOperation:
+        raise RowError('Amount: not a number')
+    if not amount.is_finite() or amount < Decimal('0.01'):
+        raise RowError('Amount: must be greater than 0')
+    amount = amount.quantize(Decimal('0.01'))
+
+    notes = row.get('Notes') or None
+    if notes and len(notes) > 1000:
+        raise RowError('Notes: must be at most 1000 characters')
+
+    is_recurring = (row.get('Is Recurring') or '').strip().lower() in (
+        'yes', 'true', '1'
+    )
+    recurrence_frequency = _choice(
+        row.get('Recurrence Frequency'), RECURRENCE_FREQUENCIES,
+        'Recurrence Frequency'
+    )
+
+    return {
+        'category_name': category_name,
+        'date': expense_date,
+        'description': description,
+        'amount': amount,
+        'payment_method': _choice(
+            row.get('Payment Method'), PAYMENT_METHODS, 'Payment Method'
+        ),
+        'is_recurring': is_recurring,
+        'recurrence_frequency': recurrence_frequency,
+        # Imported rows are history: an export already holds every
+        # generated occurrence, and older data ticked "recurring" on each
+        # period's entry. Like migrated rows, they only become templates
+        # when edited (see app.recurring)
+        'next_due': None,
+        'receipt_note': notes
+    }
+
+def _category_ids(user_id, names, category_map, result, create_missing):
+    """Resolve category names, creating missing ones when allowed."""
+    # Match case-insensitively and create each missing name once
+    missing = {
+        name.lower(): name for name in sorted(names)
+        if name.lower() not in category_map
+    }
+    if missing and create_missing:
+        created = [
+            Category(user_id=user_id, name=name) for name in missing.values()
+        ]
+        db.session.add_all(created)
+        db.session.flush()
+        for category in created:
+            category_map[category.name.lower()] = category.id
+            result.created_categories.append(category.name)
+    return category_map
+
+def _insert_batch(user_id, batch, category_map, result, create_missing):
+    """Insert one validated batch in its own transaction."""
+    names = {values['category_name'] for _, values in batch}
+    _category_ids(user_id, names, category_map, result, create_missing)
+
+    rows = []
+    deltas = {}
+    for line, values in batch:
+        category_id = category_map.get(values['category_name'].lower())
+        if category_id is None:
+            result.add_error(
+                line, f'Category: unknown category ({values["category_name"]})'
+            )
+            continue
+        values = dict(values, user_id=user_id, category_id=category_id)
+        del values['category_name']
+        rows.append(values)
+        rollups.add_delta(deltas, user_id, category_id, values['date'],
+                          values['amount'], 1)
+
+    if not rows:
+        db.session.commit()
+        return
+
+    try:
+        db.session.execute(insert(Expense), rows)
+        rollups.apply_deltas(deltas)
+        bump_data_version(db.session.connection(), [user_id])
+        jobs.enqueue('alerts.evaluate', {'months': [
+            list(key) for key in deltas
+        ]})
+        db.session.commit()
+    except SQLAlchemyError:
+        db.session.rollback()
+        raise
+    result.imported += len(rows)
+
+def import_expenses(user_id, stream, batch_size=IMPORT_BATCH_SIZE,
+                    create_missing_categories=True, progress=None):
+    """Import expenses for a user from a CSV text stream.
+
+    Args:
+        user_id (int): Owner of the imported expenses
+        stream: Text file object positioned at the CSV header
+        batch_size (int): Rows validated and inserted per transaction
+        create_missing_categories (bool): Create categories that do not
+            exist yet instead of rejecting their rows
+        progress (callable, optional): Called as ``progress(result)``
+            after every batch
+
+    Returns:
+        ImportResult: Counts and per-row errors (line numbers are 1-based
+        and include the header)
+    """
+    result = ImportResult()
+    reader = csv.DictReader(stream)
+
+    missing = [
+        column for column in REQUIRED_COLUMNS
+        if column not in (reader.fieldnames or [])
+    ]
+    if missing:
+        result.add_error(1, 'Missing columns: ' + ', '.join(missing)
+                         + '; expected ' + ', '.join(EXPORT_HEADER))
+        return result
+
+    category_map = {
+        name.lower(): category_id
+        for category_id, name in db.session.query(
+            Category.id, Category.name
+        ).filter(Category.user_id == user_id)
+    }
+
+    batch = []
+    for row in reader:
+        result.processed += 1
+        line = reader.line_num
+        try:
+            batch.append((line, validate_row(row)))
+        except RowError as error:
+            result.add_error(line, str(error))
+
+        if len(batch) >= batch_size:
+            _insert_batch(user_id, batch, category_map, result,
+                          create_missing_categories)
+            batch = []
+            if progress:
+                progress(result)
+
+    if batch:
+        _insert_batch(user_id, batch, category_map, result,
+                      create_missing_categories)
+    if progress:
+        progress(result)
+    return result
@@ -0,0 +1,287 @@
+"""Opt-in per-request SQL and render timing.
+
+When ``INSTRUMENTATION_ENABLED`` is set, every request records its query
+count, total SQL time, slowest statement, template render time and wall
+time. The figures are sent back in a ``Server-Timing`` header and folded
+into per-endpoint histograms served as JSON at ``/_stats`` to callers
+presenting ``INSTRUMENTATION_TOKEN``.
+
+The hooks only read ``time.perf_counter`` and update a few counters, a
+small fraction of the cost of executing the statement itself, so it is
+safe to leave on in production. Histograms live in process memory, so
+each worker process reports its own traffic.
+"""
+import hmac
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from flask import (
+    Blueprint, abort, before_render_template, current_app, jsonify, request,
+    template_rendered
+)
+from sqlalchemy import event
+
+from . import db
+
+# Upper bounds (ms) of the timing histogram buckets; the last is open
+TIME_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+# Upper bounds of the per-request query count buckets
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+# Statements are truncated in stats output
+MAX_STATEMENT_LENGTH = 500
+
+class Histogram:
+    """Fixed-bucket histogram with count, sum and max."""
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, fraction):
+        """Estimate a percentile as the upper bound of its bucket."""
+        if not self.count:
+            return 0
+        rank = fraction * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                if index < len(self.bounds):
+                    return min(self.bounds[index], self.max)
+                return self.max
+        return self.max
+
+    def as_dict(self):
+        labels = [f'<={bound}' for bound in self.bounds]
+        labels.append(f'>{self.bounds[-1]}')
+        return {
+            'count': self.count,
+            'sum': round(self.total, 3),
+            'mean': round(self.total / self.count, 3) if self.count else 0,
+            'max': round(self.max, 3),
+            'p50': round(self.percentile(0.50), 3),
+            'p95': round(self.percentile(0.95), 3),
+            'p99': round(self.percentile(0.99), 3),
+            'buckets': dict(zip(labels, self.counts))
+        }
+
+class RequestTimings:
+    """Counters for the request being served."""
+
+    __slots__ = ('started', 'query_count', 'sql_time', 'slowest_time',
+                 'slowest_statement', 'render_time', 'render_started')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.query_count = 0
+        self.sql_time = 0.0
+        self.slowest_time = 0.0
+        self.slowest_statement = None
+        self.render_time = 0.0
+        self.render_started = None
+
+    def add_query(self, statement, elapsed):
+        self.query_count += 1
+        self.sql_time += elapsed
+        if elapsed >= self.slowest_time:
+            self.slowest_time = elapsed
+            self.slowest_statement = statement
+
+class EndpointStats:
+    """Aggregated timings for one endpoint."""
+
+    def __init__(self):
+        self.total_ms = Histogram(TIME_BUCKETS_MS)
+        self.sql_ms = Histogram(TIME_BUCKETS_MS)
+        self.render_ms = Histogram(TIME_BUCKETS_MS)
+        self.queries = Histogram(QUERY_COUNT_BUCKETS)
+        self.slowest_ms = 0.0
+        self.slowest_statement = None
+
+    def record(self, timings, total):
+        self.total_ms.observe(total * 1000)
+        self.sql_ms.observe(timings.sql_time * 1000)
+        self.render_ms.observe(timings.render_time * 1000)
+        self.queries.observe(timings.query_count)
+        if timings.slowest_statement and \
+                timings.slowest_time * 1000 >= self.slowest_ms:
+            self.slowest_ms = timings.slowest_time * 1000
+            self.slowest_statement = timings.slowest_statement
+
+    def as_dict(self):
+        return {
+            'requests': self.total_ms.count,
+            'total_ms': self.total_ms.as_dict(),
+            'sql_ms': self.sql_ms.as_dict(),
+            'render_ms': self.render_ms.as_dict(),
+            'queries': self.queries.as_dict(),
+            'slowest_statement': {
+                'ms': round(self.slowest_ms, 3),
+                'sql': ' '.join(
+                    (self.slowest_statement or '').split()
+                )[:MAX_STATEMENT_LENGTH]
+            }
+        }
+
+class StatsRegistry:
+    """Thread-safe per-endpoint stats for one application."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def record(self, endpoint, timings, total):
+        with self._lock:
+            stats = self._endpoints.get(endpoint)
+            if stats is None:
+                stats = self._endpoints[endpoint] = EndpointStats()
+            stats.record(timings, total)
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                endpoint: stats.as_dict()
+                for endpoint, stats in sorted(self._endpoints.items())
+            }
+
+# Timings of the request being served on this thread, if any; a context
+# variable is cheaper to read per statement than ``flask.g``
+_timings = ContextVar('request_timings', default=None)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context,
+                           executemany):
+    if context is not None and _timings.get() is not None:
+        context._query_started = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context,
+                          executemany):
+    timings = _timings.get()
+    started = getattr(context, '_query_started', None)
+    if timings is not None and started is not None:
+        timings.add_query(statement, time.perf_counter() - started)
+
+def _before_render(app, template, context, **extra):
+    timings = _timings.get()
+    if timings is not None:
+        timings.render_started = time.perf_counter()
+
+def _after_render(app, template, context, **extra):
+    timings = _timings.get()
+    if timings is not None and timings.render_started is not None:
+        timings.render_time += time.perf_counter() - timings.render_started
+        timings.render_started = None
+
+def server_timing_header(timings, total):
+    """Format request timings as a ``Server-Timing`` header value."""
+    return ', '.join([
+        f'sql;dur={timings.sql_time * 1000:.2f};'
+        f'desc="{timings.query_count} queries"',
+        f'render;dur={timings.render_time * 1000:.2f}',
+        f'total;dur={total * 1000:.2f}'
+    ])
+
+bp = Blueprint('instrumentation', __name__)
+
+@bp.route('/_stats')
+def stats():
+    """Per-endpoint histograms and cache counters."""
+    token = current_app.config.get('INSTRUMENTATION_TOKEN')
+    if not token:
+        abort(404)
+
+    supplied = request.headers.get('Authorization', '')
+    if supplied.startswith('Bearer '):
+        supplied = supplied[len('Bearer '):]
+    if not hmac.compare_digest(supplied.encode('utf-8'),
+                               token.encode('utf-8')):
+        abort(403)
+
+    from .cache import view_cache
+    from .fragment_cache import fragment_cache
+    from .user_cache import user_cache
+    return jsonify({
+        'endpoints': instrumentation.registry.as_dict(),
+        'view_cache': view_cache.stats(),
+        'user_cache': user_cache.stats(),
+        'fragment_cache': fragment_cache.stats()
+    })
+
+class Instrumentation:
+    """Flask extension wiring the timing hooks into an application."""
+
+    def init_app(self, app):
+        if not app.config.get('INSTRUMENTATION_ENABLED'):
+            return
+
+        app.extensions['instrumentation'] = StatsRegistry()
+        for engine in db.engines.values():
+            event.listen(engine, 'before_cursor_execute',
+                         _before_cursor_execute)
+            event.listen(engine, 'after_cursor_execute',
+                         _after_cursor_execute)
+        before_render_template.connect(_before_render, app)
+        template_rendered.connect(_after_render, app)
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        app.teardown_request(self._discard_request)
+        app.register_blueprint(bp)
+
+    @property
+    def registry(self):
+        return current_app.extensions['instrumentation']
+
+    @staticmethod
+    def _start_request():
+        _timings.set(RequestTimings())
+
+    @staticmethod
+    def _finish_request(response):
+        timings = _timings.get()
+        if timings is None:
+            return response
+        _timings.set(None)
+
+        total = time.perf_counter() - timings.started
+        config = current_app.config
+        if config.get('INSTRUMENTATION_SERVER_TIMING', True):
+            response.headers['Server-Timing'] = server_timing_header(
+                timings, total
+            )
+
+        endpoint = request.endpoint or '<unmatched>'
+        if endpoint != 'instrumentation.stats':
+            current_app.extensions['instrumentation'].record(
+                endpoint, timings, total
+            )
+
+        slow_ms = config.get('INSTRUMENTATION_SLOW_REQUEST_MS')
+        if slow_ms and total * 1000 >= slow_ms:
+            current_app.logger.warning(
+                'Slow request %s %s: %.1f ms, %d queries (%.1f ms SQL)',
+                request.method, request.path, total * 1000,
+                timings.query_count, timings.sql_time * 1000
+            )
+        return response
+
+    @staticmethod
+    def _discard_request(exc):
+        _timings.set(None)
+
+instrumentation = Instrumentation()
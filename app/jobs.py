@@ -0,0 +1,261 @@
+"""Deferred work backed by the ``jobs`` table.
+
+Write paths call :func:`enqueue` to record follow-up work (alert checks,
+for example) as a ``Job`` row in the same transaction as the write, so
+work is only ever queued for changes that commit and is not lost if the
+process dies. Once the session commits, its jobs are handed to the
+runner selected by ``JOBS_MODE``:
+
+    thread: A small in-process thread pool runs them off the request
+        thread; a poller picks up retries and anything left behind
+    worker: Nothing runs in the web process; ``flask worker`` polls the
+        table from a separate process
+    inline: Run synchronously right after commit, for tests and scripts
+
+Workers claim a job with a conditional ``UPDATE`` so several processes
+can poll one database. Failures are retried with exponential backoff
+until ``max_attempts``; jobs that keep failing stay in the table with
+status ``failed`` and their last error. Completed jobs are deleted.
+"""
+import json
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import event, or_, select
+from sqlalchemy.orm import Session
+
+from . import db
+from .models import Job
+
+QUEUED = 'queued'
+RUNNING = 'running'
+FAILED = 'failed'
+
+# Task name -> Task, filled in by the @task decorator
+TASKS = {}
+
+# Session.info key holding ids of jobs enqueued in the open transaction
+_PENDING = 'pending_jobs'
+
+class Task:
+    """A registered job handler."""
+
+    def __init__(self, name, func, max_attempts):
+        self.name = name
+        self.func = func
+        self.max_attempts = max_attempts
+
+def task(name, max_attempts=3):
+    """Register a function as the handler for jobs called ``name``.
+
+    The function receives the job's decoded JSON payload as keyword
+    arguments and runs inside an application context; its database
+    work is committed along with the job's completion.
+    """
+    def decorator(func):
+        TASKS[name] = Task(name, func, max_attempts)
+        return func
+    return decorator
+
+def enqueue(name, payload=None, session=None, delay=None):
+    """Queue a job in the current transaction.
+
+    Args:
+        name (str): Registered task name
+        payload (dict, optional): JSON-serialisable task arguments
+        session (Session, optional): Session whose transaction the job
+            joins; defaults to ``db.session``. Safe to call from flush
+            event hooks.
+        delay (timedelta, optional): Do not run before this much time
+            has passed
+
+    Returns:
+        int: Id of the queued job
+    """
+    if name not in TASKS:
+        raise ValueError(f'Unknown job: {name}')
+    if session is None:
+        session = db.session()
+    now = datetime.utcnow()
+    result = session.connection().execute(
+        Job.__table__.insert().values(
+            name=name,
+            payload=json.dumps(payload or {}),
+            status=QUEUED,
+            attempts=0,
+            max_attempts=TASKS[name].max_attempts,
+            run_at=now + delay if delay else now,
+            created_at=now
+        )
+    )
+    job_id = result.inserted_primary_key[0]
+    if not delay:
+        session.info.setdefault(_PENDING, []).append(job_id)
+    return job_id
+
+def _claim(job_id, now):
+    """Mark a due job as running; False if another worker got it first."""
+    table = Job.__table__
+    result = db.session.execute(
+        table.update().where(
+            table.c.id == job_id,
+            table.c.status == QUEUED,
+            table.c.run_at <= now
+        ).values(
+            status=RUNNING,
+            attempts=table.c.attempts + 1,
+            locked_at=now
+        )
+    )
+    db.session.commit()
+    return result.rowcount == 1
+
+def run_job(job_id):
+    """Claim and run one job.
+
+    Args:
+        job_id (int): Job to run
+
+    Returns:
+        bool: Whether this call ran the job
+    """
+    if not _claim(job_id, datetime.utcnow()):
+        return False
+
+    table = Job.__table__
+    job = db.session.execute(
+        select(table.c.name, table.c.payload).where(table.c.id == job_id)
+    ).one()
+    try:
+        handler = TASKS.get(job.name)
+        if handler is None:
+            raise LookupError(f'Unknown job: {job.name}')
+        handler.func(**json.loads(job.payload))
+        db.session.execute(table.delete().where(table.c.id == job_id))
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        job = db.session.get(Job, job_id)
+        job.last_error = traceback.format_exc(limit=5)
+        job.locked_at = None
+        if job.attempts >= job.max_attempts:
+            job.status = FAILED
+        else:
+            job.status = QUEUED
+            backoff = current_app.config.get('JOBS_RETRY_BACKOFF', 5)
+            job.run_at = datetime.utcnow() + timedelta(
+                seconds=backoff * 2 ** (job.attempts - 1)
+            )
+        db.session.commit()
+    return True
+
+def due_job_ids(limit=100):
+    """Ids of queued jobs that are due, oldest first.
+
+    Jobs stuck in ``running`` for longer than ``JOBS_LOCK_TIMEOUT``
+    seconds belonged to a worker that died; they are requeued first.
+    """
+    now = datetime.utcnow()
+    table = Job.__table__
+    timeout = current_app.config.get('JOBS_LOCK_TIMEOUT', 300)
+    db.session.execute(
+        table.update().where(
+            table.c.status == RUNNING,
+            or_(table.c.locked_at.is_(None),
+                table.c.locked_at < now - timedelta(seconds=timeout))
+        ).values(status=QUEUED, locked_at=None)
+    )
+    db.session.commit()
+    return db.session.scalars(
+        select(table.c.id).where(
+            table.c.status == QUEUED, table.c.run_at <= now
+        ).order_by(table.c.run_at, table.c.id).limit(limit)
+    ).all()
+
+def run_pending(limit=100):
+    """Run due jobs one after another.
+
+    Returns:
+        int: Number of jobs run
+    """
+    return sum(1 for job_id in due_job_ids(limit) if run_job(job_id))
+
+def _run_in_context(app, job_id):
+    with app.app_context():
+        try:
+            run_job(job_id)
+        except Exception:
+            app.logger.exception('Job %s could not be run', job_id)
+
+def _poll(app, interval, stop):
+    while not stop.wait(interval):
+        with app.app_context():
+            try:
+                run_pending()
+            except Exception:
+                app.logger.exception('Job poll failed')
+
+class JobRunner:
+    """Flask extension dispatching committed jobs per ``JOBS_MODE``."""
+
+    def init_app(self, app):
+        mode = app.config.get('JOBS_MODE', 'thread')
+        if mode not in ('thread', 'worker', 'inline'):
+            raise ValueError(f'Unknown JOBS_MODE: {mode}')
+        app.extensions['jobs'] = {
+            'mode': mode,
+            'lock': threading.Lock(),
+            'executor': None,
+            'stop': threading.Event()
+        }
+
+    def _executor(self, app, state):
+        """Start the pool and poller on first use."""
+        with state['lock']:
+            if state['executor'] is None:
+                state['executor'] = ThreadPoolExecutor(
+                    max_workers=app.config.get('JOBS_WORKERS', 2),
+                    thread_name_prefix='jobs'
+                )
+                threading.Thread(
+                    target=_poll,
+                    args=(app, app.config.get('JOBS_POLL_INTERVAL', 5),
+                          state['stop']),
+                    name='jobs-poller', daemon=True
+                ).start()
+            return state['executor']
+
+    def dispatch(self, job_ids):
+        """Hand jobs committed by the current session to the runner."""
+        app = current_app._get_current_object()
+        state = app.extensions['jobs']
+        if state['mode'] == 'inline':
+            for job_id in job_ids:
+                _run_in_context(app, job_id)
+        elif state['mode'] == 'thread':
+            executor = self._executor(app, state)
+            for job_id in job_ids:
+                executor.submit(_run_in_context, app, job_id)
+
+    def shutdown(self, app, wait=True):
+        """Stop the thread pool and poller, e.g. at process exit."""
+        state = app.extensions['jobs']
+        state['stop'].set()
+        if state['executor'] is not None:
+            state['executor'].shutdown(wait=wait)
+            state['executor'] = None
+
+job_runner = JobRunner()
+
+@event.listens_for(Session, 'after_commit')
+def _dispatch_after_commit(session):
+    """Run the jobs a transaction queued now that it has committed."""
+    job_ids = session.info.pop(_PENDING, None)
+    if job_ids:
+        job_runner.dispatch(job_ids)
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_on_rollback(session):
+    session.info.pop(_PENDING, None)
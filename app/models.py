@@ -1,12 +1,12 @@
 """SQLAlchemy models for Centsible Budget Tracker."""
 from datetime import datetime
 from decimal import Decimal
-from sqlalchemy import extract
-from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import UserMixin
 from sqlalchemy.ext.hybrid import hybrid_property
 
 from . import db, login_manager
+from .passwords import password_hasher
+from .periods import Period
 
 class User(UserMixin, db.Model):
     """User model with secure password hashing."""
@@ -15,12 +15,19 @@ class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(64), unique=True, index=True, nullable=False)
     email = db.Column(db.String(120), unique=True, index=True, nullable=False)
-    password_hash = db.Column(db.String(128), nullable=False)
+    password_hash = db.Column(db.String(256), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     theme_preference = db.Column(db.String(10), default='light')
     currency_symbol = db.Column(db.String(5), default='₦')
     monthly_income = db.Column(db.Numeric(10, 2), default=0)
     total_budget = db.Column(db.Numeric(10, 2), default=0)
+    # Bumped on every write that changes the user's dashboards and reports;
+    # scopes cached view data (see app/cache.py)
+    data_version = db.Column(db.Integer, nullable=False, default=0,
+                             server_default='0')
+    # When data_version last moved (UTC); Last-Modified of the user's
+    # pages (see app/conditional.py)
+    data_modified_at = db.Column(db.DateTime)
     
     # Relationships
     categories = db.relationship('Category', backref='user', lazy='dynamic')
@@ -29,12 +36,42 @@ class User(UserMixin, db.Model):
     alerts = db.relationship('BudgetAlert', backref='user', lazy='dynamic')
     
     def set_password(self, password):
-        """Hash password using Werkzeug security."""
-        self.password_hash = generate_password_hash(password, method='pbkdf2:sha256')
+        """Hash password with the configured method, off the request thread."""
+        self.password_hash = password_hasher.hash(password)
     
     def check_password(self, password):
         """Verify password hash."""
-        return check_password_hash(self.password_hash, password)
+        return password_hasher.verify(self.password_hash, password)
+    
+    def get_spending(self, period, category_id=None):
+        """Get total spending over a period, optionally for one category.
+        
+        Month-aligned periods are served from the rollup table; other
+        periods (weeks, custom ranges) use a half-open date range on
+        ``idx_user_expense_date``.
+        """
+        if period.is_month_aligned:
+            query = db.session.query(
+                db.func.sum(MonthlyCategoryTotal.total)
+            ).filter(
+                MonthlyCategoryTotal.user_id == self.id,
+                period.rollup_filter(MonthlyCategoryTotal)
+            )
+            if category_id is not None:
+                query = query.filter(
+                    MonthlyCategoryTotal.category_id == category_id
+                )
+        else:
+            query = db.session.query(
+                db.func.sum(Expense.amount)
+            ).filter(
+                Expense.user_id == self.id,
+                period.filter(Expense.date)
+            )
+            if category_id is not None:
+                query = query.filter(Expense.category_id == category_id)
+        
+        return query.scalar() or Decimal('0')
     
     def get_monthly_spending(self, year=None, month=None):
         """Get total spending for a specific month."""
@@ -43,15 +80,7 @@ class User(UserMixin, db.Model):
             year = now.year
             month = now.month
             
-        total = db.session.query(
-            db.func.sum(Expense.amount)
-        ).filter(
-            Expense.user_id == self.id,
-            extract('year', Expense.date) == year,
-            extract('month', Expense.date) == month
-        ).scalar()
-        
-        return total or Decimal('0')
+        return self.get_spending(Period.month(year, month))
     
     def get_category_spending(self, category_id, year=None, month=None):
         """Get total spending for a specific category in a month."""
@@ -60,16 +89,7 @@ class User(UserMixin, db.Model):
             year = now.year
             month = now.month
             
-        total = db.session.query(
-            db.func.sum(Expense.amount)
-        ).filter(
-            Expense.user_id == self.id,
-            Expense.category_id == category_id,
-            extract('year', Expense.date) == year,
-            extract('month', Expense.date) == month
-        ).scalar()
-        
-        return total or Decimal('0')
+        return self.get_spending(Period.month(year, month), category_id)
 
 class Category(db.Model):
     """Expense category model."""
@@ -96,8 +116,16 @@ class Category(db.Model):
     
     @hybrid_property
     def current_month_spending(self):
-        """Get current month's spending for this category."""
+        """Get current month's spending for this category.
+        
+        Returns the value attached by
+        :func:`app.reporting.preload_month_spending` when one is present
+        for the current month, so templates can read it without querying.
+        """
         now = datetime.now()
+        preloaded = getattr(self, '_month_spending', None)
+        if preloaded is not None and preloaded[0] == (now.year, now.month):
+            return preloaded[1]
         return self.user.get_category_spending(self.id, now.year, now.month)
     
     @hybrid_property
@@ -129,9 +157,20 @@ class Expense(db.Model):
     receipt_note = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
-    # Create index for efficient date range queries
+    # Recurring templates: next occurrence to generate (see app.recurring);
+    # generated occurrences point back at their template
+    next_due = db.Column(db.Date)
+    recurring_parent_id = db.Column(
+        db.Integer, db.ForeignKey('expenses.id', ondelete='SET NULL')
+    )
+    
+    # Create index for efficient date range queries; the others serve the
+    # due-template scan and keep each occurrence from being written twice
     __table_args__ = (
         db.Index('idx_user_expense_date', user_id, date),
+        db.Index('idx_expense_next_due', next_due),
+        db.Index('uq_expense_occurrence', recurring_parent_id, date,
+                 unique=True),
     )
 
 class Budget(db.Model):
@@ -152,6 +191,33 @@ class Budget(db.Model):
         db.Index('idx_budget_period', user_id, category_id, year, month),
     )
 
+class MonthlyCategoryTotal(db.Model):
+    """Running spending total per user, category and calendar month.
+
+    Rows are maintained incrementally by :mod:`app.rollups` whenever
+    expenses are flushed, so read paths can serve period totals without
+    scanning the raw ``expenses`` table.
+    """
+    __tablename__ = 'monthly_category_totals'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    category_id = db.Column(db.Integer, db.ForeignKey('categories.id'), nullable=False)
+    year = db.Column(db.Integer, nullable=False)
+    month = db.Column(db.Integer, nullable=False)
+    total = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    
+    # One row per (user, category, month); second index serves
+    # "all categories for a period" lookups
+    __table_args__ = (
+        db.UniqueConstraint(
+            user_id, category_id, year, month,
+            name='uq_monthly_category_total'
+        ),
+        db.Index('idx_rollup_user_period', user_id, year, month),
+    )
+
 class BudgetAlert(db.Model):
     """Budget alerts for tracking threshold violations."""
     __tablename__ = 'budget_alerts'
@@ -161,15 +227,62 @@ class BudgetAlert(db.Model):
     category_id = db.Column(db.Integer, db.ForeignKey('categories.id'), nullable=False)
     alert_type = db.Column(db.String(32), nullable=False)  # threshold, overspent
     message = db.Column(db.String(256), nullable=False)
+    year = db.Column(db.Integer, nullable=False)  # Budget period alerted on
+    month = db.Column(db.Integer, nullable=False)
     is_read = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
-    # Create index for efficient alert retrieval
+    # Create index for efficient alert retrieval; each alert type fires
+    # once per category per period (see app.alerts)
     __table_args__ = (
         db.Index('idx_user_alerts', user_id, is_read),
+        db.Index(
+            'uq_budget_alert_period',
+            user_id, category_id, year, month, alert_type,
+            unique=True
+        ),
+    )
+
+class Job(db.Model):
+    """Deferred unit of work, run after commit by :mod:`app.jobs`."""
+    __tablename__ = 'jobs'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(64), nullable=False)  # Registered task name
+    payload = db.Column(db.Text, nullable=False, default='{}')  # JSON
+    status = db.Column(db.String(16), nullable=False, default='queued')  # queued, running, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=3)
+    run_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    locked_at = db.Column(db.DateTime)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Serves the "next due jobs" poll
+    __table_args__ = (
+        db.Index('idx_job_status_run_at', status, run_at),
+    )
+
+class IdempotencyKey(db.Model):
+    """Stored result of an API write, replayed when a client retries it."""
+    __tablename__ = 'idempotency_keys'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    key = db.Column(db.String(255), nullable=False)  # Idempotency-Key header
+    request_hash = db.Column(db.String(64), nullable=False)  # SHA-256 of the request
+    status_code = db.Column(db.Integer, nullable=False)
+    response_body = db.Column(db.Text, nullable=False)  # JSON
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    # One result per key and user; created_at serves expiry
+    __table_args__ = (
+        db.UniqueConstraint(user_id, key, name='uq_idempotency_key'),
+        db.Index('idx_idempotency_created_at', created_at),
     )
 
 @login_manager.user_loader
 def load_user(user_id):
-    """Flask-Login user loader callback."""
-    return User.query.get(int(user_id))
\ No newline at end of file
+    """Flask-Login user loader callback, served from the user cache."""
+    from .user_cache import user_cache
+    return user_cache.load(int(user_id))
\ No newline at end of file
@@ -0,0 +1,113 @@
+"""Keyset (cursor) pagination.
+
+Pages are addressed by the (date, id) of their boundary rows rather than
+an OFFSET, so fetching any page is an index range scan on
+``idx_user_expense_date`` (which implicitly ends in the rowid) and costs
+the same however deep the user browses.
+"""
+import base64
+import json
+from datetime import date
+from sqlalchemy import tuple_
+
+NEXT = 'next'
+PREV = 'prev'
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor cannot be decoded."""
+
+def encode_cursor(row_date, row_id, direction):
+    """Encode a page boundary as an opaque URL-safe token."""
+    payload = json.dumps([row_date.isoformat(), row_id, direction],
+                         separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii') \
+        .rstrip('=')
+
+def decode_cursor(cursor):
+    """Decode a cursor into ``(date, id, direction)``.
+
+    Raises:
+        InvalidCursor: If the token is malformed
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        row_date, row_id, direction = json.loads(
+            base64.urlsafe_b64decode(padded.encode('ascii'))
+        )
+        if direction not in (NEXT, PREV):
+            raise ValueError(direction)
+        return date.fromisoformat(row_date), int(row_id), direction
+    except (ValueError, TypeError, UnicodeError, json.JSONDecodeError):
+        raise InvalidCursor(cursor)
+
+class KeysetPage:
+    """One page of keyset-paginated results."""
+
+    def __init__(self, items, next_cursor=None, prev_cursor=None, total=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        self.total = total
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+def keyset_paginate(query, date_column, id_column, per_page, cursor=None,
+                    total=None):
+    """Fetch one page ordered newest first by (date, id).
+
+    Args:
+        query (Query): Filtered query selecting the model
+        date_column: Date column to order by
+        id_column: Unique tiebreaker column
+        per_page (int): Page size
+        cursor (str, optional): Cursor from a previous page
+        total (int, optional): Total row count to expose on the page
+
+    Returns:
+        KeysetPage: Items plus cursors for the neighbouring pages
+
+    Raises:
+        InvalidCursor: If ``cursor`` is malformed
+    """
+    key = tuple_(date_column, id_column)
+    direction = NEXT
+    if cursor:
+        row_date, row_id, direction = decode_cursor(cursor)
+        if direction == NEXT:
+            query = query.filter(key < tuple_(row_date, row_id))
+        else:
+            query = query.filter(key > tuple_(row_date, row_id))
+
+    if direction == NEXT:
+        query = query.order_by(date_column.desc(), id_column.desc())
+    else:
+        query = query.order_by(date_column.asc(), id_column.asc())
+
+    # One extra row tells us whether another page exists
+    rows = query.limit(per_page + 1).all()
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if direction == PREV:
+        rows.reverse()
+
+    def boundary(item, towards):
+        return encode_cursor(getattr(item, date_column.key),
+                             getattr(item, id_column.key), towards)
+
+    if direction == NEXT:
+        has_next, has_prev = has_more, cursor is not None
+    else:
+        has_next, has_prev = True, has_more
+
+    return KeysetPage(
+        rows,
+        next_cursor=boundary(rows[-1], NEXT) if rows and has_next else None,
+        prev_cursor=boundary(rows[0], PREV) if rows and has_prev else None,
+        total=total
+    )
@@ -0,0 +1,130 @@
+"""Password hashing off the request thread.
+
+Hashing is deliberately CPU-heavy, and a burst of logins or
+registrations hashing on the request threads would hold every core and
+stall unrelated requests. Hashes are instead computed on a small pool of
+``PASSWORD_HASH_WORKERS`` threads; ``hashlib`` releases the GIL while it
+works, so the pool bounds how many cores hashing can use at once.
+
+At most ``PASSWORD_HASH_QUEUE_DEPTH`` hashes may wait for a worker.
+Beyond that, or when a hash waits longer than ``PASSWORD_HASH_TIMEOUT``
+seconds, :class:`HashingBusy` is raised, which Flask turns into a
+``503`` with ``Retry-After`` instead of queueing the request
+indefinitely. Outside an application context hashing runs inline with
+:data:`DEFAULT_METHOD`.
+
+Each config class picks its cost with ``PASSWORD_HASH_METHOD``, in
+Werkzeug's ``method`` format (e.g. ``pbkdf2:sha256:600000`` or
+``scrypt:32768:8:1``). Stored hashes record the method they were made
+with; :meth:`PasswordHasher.needs_rehash` spots hashes made with other
+parameters so the login view can upgrade them while it has the
+plaintext.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from flask import current_app, has_app_context
+from werkzeug.exceptions import ServiceUnavailable
+from werkzeug.security import check_password_hash, generate_password_hash
+
+DEFAULT_METHOD = 'pbkdf2:sha256:600000'
+
+def default_workers():
+    """Half the cores, leaving the rest for serving requests."""
+    return max(1, (os.cpu_count() or 2) // 2)
+
+class HashingBusy(ServiceUnavailable):
+    """Raised when the hashing pool cannot take more work."""
+    description = ('Too many sign-ins are being processed right now. '
+                   'Please try again in a moment.')
+
+def hash_method(pwhash):
+    """The method part of a stored hash, e.g. ``pbkdf2:sha256:600000``."""
+    return pwhash.split('$', 1)[0] if pwhash else None
+
+class PasswordHasher:
+    """Flask extension hashing passwords on a bounded thread pool."""
+
+    def init_app(self, app):
+        workers = app.config.get('PASSWORD_HASH_WORKERS', default_workers())
+        depth = app.config.get('PASSWORD_HASH_QUEUE_DEPTH', 16)
+        app.extensions['passwords'] = {
+            'method': app.config.get('PASSWORD_HASH_METHOD', DEFAULT_METHOD),
+            'workers': workers,
+            'timeout': app.config.get('PASSWORD_HASH_TIMEOUT', 10),
+            'retry_after': app.config.get('PASSWORD_HASH_RETRY_AFTER', 2),
+            # Running plus waiting hashes; None runs them inline
+            'slots': threading.BoundedSemaphore(workers + depth)
+            if workers else None,
+            'lock': threading.Lock(),
+            'executor': None
+        }
+
+    @property
+    def _state(self):
+        if not has_app_context():
+            return None
+        return current_app.extensions.get('passwords')
+
+    def _method(self):
+        state = self._state
+        return state['method'] if state else DEFAULT_METHOD
+
+    def _executor(self, state):
+        with state['lock']:
+            if state['executor'] is None:
+                state['executor'] = ThreadPoolExecutor(
+                    max_workers=state['workers'],
+                    thread_name_prefix='passwords'
+                )
+            return state['executor']
+
+    def _run(self, func, *args):
+        """Run ``func`` on the pool and wait for its result."""
+        state = self._state
+        if state is None or state['slots'] is None:
+            return func(*args)
+        if not state['slots'].acquire(blocking=False):
+            raise HashingBusy(retry_after=state['retry_after'])
+        try:
+            future = self._executor(state).submit(func, *args)
+        except Exception:
+            state['slots'].release()
+            raise
+        future.add_done_callback(lambda _: state['slots'].release())
+        try:
+            return future.result(timeout=state['timeout'])
+        except TimeoutError:
+            # Still holds its slot until it finishes, so load sheds
+            future.cancel()
+            raise HashingBusy(retry_after=state['retry_after'])
+
+    def hash(self, password):
+        """Hash a password with the configured method.
+
+        Raises:
+            HashingBusy: If the pool is saturated
+        """
+        return self._run(generate_password_hash, password, self._method())
+
+    def verify(self, pwhash, password):
+        """Check a password against a stored hash.
+
+        Raises:
+            HashingBusy: If the pool is saturated
+        """
+        return self._run(check_password_hash, pwhash, password)
+
+    def needs_rehash(self, pwhash):
+        """Whether a hash was made with other than the configured method."""
+        return hash_method(pwhash) != self._method()
+
+    def shutdown(self, app, wait=True):
+        """Stop the pool, e.g. at process exit."""
+        state = app.extensions['passwords']
+        with state['lock']:
+            if state['executor'] is not None:
+                state['executor'].shutdown(wait=wait)
+                state['executor'] = None
+
+password_hasher = PasswordHasher()
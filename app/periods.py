@@ -0,0 +1,155 @@
+"""Index-friendly reporting periods.
+
+A :class:`Period` is a half-open date range ``[start, end)``. Filtering
+with ``date >= start AND date < end`` lets SQLite walk the
+``idx_user_expense_date`` index instead of evaluating ``strftime`` on every
+row, which is what ``extract('year'/'month', ...)`` compiles to.
+"""
+from datetime import date, datetime, timedelta
+from sqlalchemy import and_, or_
+
+def _as_date(value):
+    """Normalise datetimes to dates."""
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+def shift_month(year, month, offset):
+    """Move a (year, month) pair by a number of months.
+
+    Args:
+        year (int): Starting year
+        month (int): Starting month (1-12)
+        offset (int): Months to move; negative goes back in time
+
+    Returns:
+        tuple: (year, month) after shifting
+    """
+    index = year * 12 + (month - 1) + offset
+    return index // 12, index % 12 + 1
+
+def recent_months(count, now=None):
+    """List the last ``count`` months, oldest first, ending with ``now``.
+
+    Args:
+        count (int): Number of months to return
+        now (date, optional): Reference date, defaults to today
+
+    Returns:
+        list: (year, month) tuples in chronological order
+    """
+    now = now or datetime.now()
+    return [
+        shift_month(now.year, now.month, -offset)
+        for offset in range(count - 1, -1, -1)
+    ]
+
+class Period:
+    """Half-open date range ``[start, end)`` used for spending queries."""
+
+    def __init__(self, start, end):
+        start, end = _as_date(start), _as_date(end)
+        if end <= start:
+            raise ValueError('Period end must be after its start')
+        self.start = start
+        self.end = end
+
+    @classmethod
+    def month(cls, year, month):
+        """Period covering one calendar month."""
+        next_year, next_month = shift_month(year, month, 1)
+        return cls(date(year, month, 1), date(next_year, next_month, 1))
+
+    @classmethod
+    def months(cls, year, month, count):
+        """Period covering ``count`` months starting at (year, month)."""
+        end_year, end_month = shift_month(year, month, count)
+        return cls(date(year, month, 1), date(end_year, end_month, 1))
+
+    @classmethod
+    def year(cls, year):
+        """Period covering one calendar year."""
+        return cls(date(year, 1, 1), date(year + 1, 1, 1))
+
+    @classmethod
+    def week(cls, year, week):
+        """Period covering an ISO week (Monday to Sunday)."""
+        start = date.fromisocalendar(year, week, 1)
+        return cls(start, start + timedelta(days=7))
+
+    @classmethod
+    def custom(cls, first_day, last_day):
+        """Period covering an inclusive range of days."""
+        return cls(first_day, _as_date(last_day) + timedelta(days=1))
+
+    def __eq__(self, other):
+        return (
+            isinstance(other, Period)
+            and (self.start, self.end) == (other.start, other.end)
+        )
+
+    def __hash__(self):
+        return hash((self.start, self.end))
+
+    def __repr__(self):
+        return f'<Period {self.start.isoformat()}..{self.end.isoformat()}>'
+
+    @property
+    def is_month_aligned(self):
+        """True when the period starts and ends on month boundaries."""
+        return self.start.day == 1 and self.end.day == 1
+
+    def month_keys(self):
+        """List the (year, month) pairs the period touches, in order."""
+        keys = []
+        year, month = self.start.year, self.start.month
+        last = self.end - timedelta(days=1)
+        while (year, month) <= (last.year, last.month):
+            keys.append((year, month))
+            year, month = shift_month(year, month, 1)
+        return keys
+
+    def filter(self, column):
+        """Build a sargable ``start <= column < end`` predicate.
+
+        Args:
+            column: Date column to constrain, e.g. ``Expense.date``
+
+        Returns:
+            ColumnElement: SQLAlchemy boolean clause
+        """
+        return and_(column >= self.start, column < self.end)
+
+    def rollup_filter(self, model):
+        """Build a predicate over a model's ``year``/``month`` columns.
+
+        Only valid for month-aligned periods. Ranges are split per year so
+        each branch is an index range scan on (user_id, year, month).
+
+        Args:
+            model: Mapped class with integer ``year`` and ``month`` columns
+
+        Returns:
+            ColumnElement: SQLAlchemy boolean clause
+        """
+        if not self.is_month_aligned:
+            raise ValueError('Rollup filters need a month-aligned period')
+
+        spans = {}
+        for year, month in self.month_keys():
+            first, last = spans.get(year, (month, month))
+            spans[year] = (min(first, month), max(last, month))
+
+        clauses = []
+        for year, (first, last) in spans.items():
+            if first == last:
+                clauses.append(and_(model.year == year, model.month == first))
+            elif first == 1 and last == 12:
+                clauses.append(model.year == year)
+            else:
+                clauses.append(and_(
+                    model.year == year,
+                    model.month >= first,
+                    model.month <= last
+                ))
+        return clauses[0] if len(clauses) == 1 else or_(*clauses)
@@ -0,0 +1,255 @@
+"""Materialize occurrences of recurring expenses.
+
+An expense saved with ``is_recurring`` is a template. Its ``next_due``
+column is a per-template watermark: the date of the next occurrence that
+has not been generated yet. It is set when the template is created or
+its schedule changes, and cleared when it stops recurring. Generated
+occurrences are ordinary expenses pointing back at their template
+through ``recurring_parent_id``.
+
+:func:`materialize` walks only templates with ``next_due`` on or before
+the run date, via the ``idx_expense_next_due`` index, so its cost grows
+with the number of due templates rather than with the size of the
+expenses table. Templates are processed in batches. Each batch is one
+transaction holding the occurrence inserts, the rollup and data version
+updates and the advanced watermarks. A unique index on
+``(recurring_parent_id, date)`` makes re-runs and overlapping runs
+harmless: an occurrence already there, whether written by another run or
+an expense edited onto that date, is skipped and only rows actually
+inserted count towards the rollups.
+
+Monthly and yearly schedules keep the template's day of the month,
+falling back to the month's last day when it is shorter (a template
+dated the 31st recurs on 28 February, then on 31 March).
+"""
+import calendar
+from datetime import date, timedelta
+from sqlalchemy import bindparam, event, func, inspect, select
+
+from . import db, jobs, rollups
+from .cache import bump_data_version
+from .models import Expense
+from .periods import shift_month
+
+RECURRING_BATCH_SIZE = 500
+
+# Catch-up cap per template and run, e.g. a daily template left for a year
+MAX_OCCURRENCES_PER_RUN = 400
+
+# Quick add only offers a "recurring" checkbox
+DEFAULT_FREQUENCY = 'monthly'
+
+FREQUENCIES = ('daily', 'weekly', 'monthly', 'yearly')
+
+def next_occurrence(current, frequency, anchor_day):
+    """Date of the occurrence following ``current``.
+
+    Args:
+        current (date): An occurrence date
+        frequency (str): One of :data:`FREQUENCIES`
+        anchor_day (int): Day of the month monthly and yearly schedules
+            aim for
+
+    Returns:
+        date: The next occurrence
+    """
+    if frequency == 'daily':
+        return current + timedelta(days=1)
+    if frequency == 'weekly':
+        return current + timedelta(weeks=1)
+    months = 12 if frequency == 'yearly' else 1
+    year, month = shift_month(current.year, current.month, months)
+    return date(year, month,
+                min(anchor_day, calendar.monthrange(year, month)[1]))
+
+def _frequency(expense):
+    """Schedule of a template, or None when the expense does not recur."""
+    if not expense.is_recurring:
+        return None
+    frequency = expense.recurrence_frequency or DEFAULT_FREQUENCY
+    return frequency if frequency in FREQUENCIES else None
+
+def _schedule(mapper, connection, expense):
+    """Set ``next_due`` from the template's date and frequency.
+
+    An edited template resumes after its latest generated occurrence, so
+    changing the schedule never backfills dates already covered.
+    """
+    frequency = _frequency(expense)
+    if frequency is None or expense.date is None:
+        expense.next_due = None
+        return
+
+    start = expense.date
+    if expense.id is not None:
+        table = Expense.__table__
+        latest = connection.scalar(
+            select(func.max(table.c.date))
+            .where(table.c.recurring_parent_id == expense.id)
+        )
+        if latest is not None and latest > start:
+            start = latest
+    expense.next_due = next_occurrence(start, frequency, expense.date.day)
+
+@event.listens_for(Expense, 'before_insert')
+def _schedule_new(mapper, connection, expense):
+    if expense.recurring_parent_id is None:
+        _schedule(mapper, connection, expense)
+
+@event.listens_for(Expense, 'before_update')
+def _reschedule(mapper, connection, expense):
+    state = inspect(expense)
+    if any(state.attrs[attr].history.has_changes()
+           for attr in ('is_recurring', 'recurrence_frequency', 'date')):
+        _schedule(mapper, connection, expense)
+    elif expense.next_due is None and expense.recurring_parent_id is None \
+            and _frequency(expense):
+        # Recurring expenses from before scheduling existed
+        _schedule(mapper, connection, expense)
+
+def _insert_statement(dialect_name):
+    """Insert that skips occurrences an earlier run already wrote."""
+    if dialect_name == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect_name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        return Expense.__table__.insert()
+    return insert(Expense.__table__).on_conflict_do_nothing(
+        index_elements=['recurring_parent_id', 'date']
+    )
+
+def _insert_occurrences(connection, rows):
+    """Insert occurrence rows, skipping existing ones.
+
+    Returns:
+        list: ``(user_id, category_id, date, amount)`` of rows written
+    """
+    table = Expense.__table__
+    statement = _insert_statement(connection.dialect.name)
+    columns = (table.c.user_id, table.c.category_id, table.c.date,
+               table.c.amount)
+    if connection.dialect.insert_executemany_returning:
+        return connection.execute(statement.returning(*columns), rows).all()
+
+    written = []
+    for row in rows:
+        if connection.execute(statement, row).rowcount:
+            written.append(tuple(row[column.key] for column in columns))
+    return written
+
+# Template fields a run reads; templates are not loaded as ORM objects
+_TEMPLATE_COLUMNS = (
+    'user_id', 'category_id', 'amount', 'description', 'payment_method',
+    'receipt_note', 'id', 'date', 'next_due', 'is_recurring',
+    'recurrence_frequency'
+)
+
+class MaterializeResult:
+    """Outcome of a materializer run."""
+
+    def __init__(self):
+        self.templates = 0
+        self.occurrences = 0
+        self.batches = 0
+
+    def as_dict(self):
+        return {
+            'templates': self.templates,
+            'occurrences': self.occurrences,
+            'batches': self.batches
+        }
+
+def _occurrences(template, until):
+    """Occurrence rows due for a template, and its new watermark."""
+    frequency = _frequency(template)
+    rows = []
+    due = template.next_due
+    while due <= until and len(rows) < MAX_OCCURRENCES_PER_RUN:
+        rows.append({
+            'user_id': template.user_id,
+            'category_id': template.category_id,
+            'amount': template.amount,
+            'description': template.description,
+            'date': due,
+            'payment_method': template.payment_method,
+            'is_recurring': False,
+            'recurrence_frequency': None,
+            'receipt_note': template.receipt_note,
+            'recurring_parent_id': template.id
+        })
+        due = next_occurrence(due, frequency, template.date.day)
+    return rows, due
+
+def _materialize_batch(templates, until, result):
+    """Write one batch of templates' occurrences in a single transaction."""
+    rows, watermarks = [], []
+    for template in templates:
+        if _frequency(template) is None:
+            continue
+        generated, next_due = _occurrences(template, until)
+        rows.extend(generated)
+        watermarks.append({
+            'template_id': template.id,
+            'old_due': template.next_due,
+            'new_due': next_due
+        })
+
+    connection = db.session.connection()
+    table = Expense.__table__
+    written = _insert_occurrences(connection, rows) if rows else []
+    if written:
+        deltas = {}
+        for user_id, category_id, day, amount in written:
+            rollups.add_delta(deltas, user_id, category_id, day, amount, 1)
+        rollups.apply_deltas(deltas, connection=connection)
+        bump_data_version(connection, {row[0] for row in written})
+        jobs.enqueue('alerts.evaluate', {'months': [
+            list(key) for key in deltas
+        ]})
+    if watermarks:
+        # Only advance watermarks nobody else moved since they were read
+        connection.execute(
+            table.update().where(
+                table.c.id == bindparam('template_id'),
+                table.c.next_due == bindparam('old_due')
+            ).values(next_due=bindparam('new_due')),
+            watermarks
+        )
+    db.session.commit()
+    result.templates += len(watermarks)
+    result.occurrences += len(written)
+    result.batches += 1
+
+def materialize(until=None, batch_size=RECURRING_BATCH_SIZE):
+    """Generate every occurrence of every template due on or before a date.
+
+    Args:
+        until (date, optional): Run date, defaults to today
+        batch_size (int): Templates handled per transaction
+
+    Returns:
+        MaterializeResult: Templates advanced and occurrences written
+    """
+    until = until or date.today()
+    result = MaterializeResult()
+    table = Expense.__table__
+    columns = [table.c[name] for name in _TEMPLATE_COLUMNS]
+    last_id = 0
+    while True:
+        templates = db.session.execute(
+            select(*columns).where(
+                table.c.next_due <= until,
+                table.c.id > last_id
+            ).order_by(table.c.id).limit(batch_size)
+        ).all()
+        if not templates:
+            break
+        last_id = templates[-1].id
+        _materialize_batch(templates, until, result)
+    return result
+
+@jobs.task('recurring.materialize')
+def _materialize_job(until=None):
+    """Job: materialize everything due, e.g. queued daily by a scheduler."""
+    materialize(date.fromisoformat(until) if until else None)
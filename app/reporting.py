@@ -0,0 +1,282 @@
+"""Reports aggregation engine.
+
+Fetches per-(category, month) totals for a whole reporting window in a
+single query against the rollup table, then derives every figure the
+reports dashboard needs in Python. The number of queries is fixed no
+matter how many categories a user has.
+"""
+from collections import namedtuple
+from datetime import datetime
+from decimal import Decimal
+from sqlalchemy import func
+
+from . import db
+from .models import Category, MonthlyCategoryTotal
+from .periods import Period, shift_month
+
+TREND_MONTHS = 3
+
+# Plain snapshot of the category fields report templates render, so
+# computed reports hold no ORM state and can be cached across requests
+CategorySummary = namedtuple(
+    'CategorySummary', 'id name icon color budget_amount is_active'
+)
+
+def summarize_category(category):
+    """Copy the rendered fields of a Category into a CategorySummary."""
+    return CategorySummary(
+        id=category.id,
+        name=category.name,
+        icon=category.icon,
+        color=category.color,
+        budget_amount=category.budget_amount,
+        is_active=category.is_active
+    )
+
+class SpendingMatrix:
+    """Per-category, per-month spending totals for one user."""
+
+    def __init__(self, rows=()):
+        self._totals = {}
+        self._counts = {}
+        self._by_month = {}
+        for category_id, year, month, total, count in rows:
+            total = total or Decimal('0')
+            self._totals[(category_id, year, month)] = total
+            self._counts[(category_id, year, month)] = count or 0
+            self._by_month.setdefault((year, month), {})[category_id] = total
+
+    @classmethod
+    def load(cls, user_id, period, category_ids=None):
+        """Load totals for every category and month in a period.
+
+        Args:
+            user_id (int): Owner of the expenses
+            period (Period): Month-aligned reporting window
+            category_ids (list, optional): Restrict to these categories
+
+        Returns:
+            SpendingMatrix: Totals keyed by (category_id, year, month)
+        """
+        query = db.session.query(
+            MonthlyCategoryTotal.category_id,
+            MonthlyCategoryTotal.year,
+            MonthlyCategoryTotal.month,
+            func.sum(MonthlyCategoryTotal.total),
+            func.sum(MonthlyCategoryTotal.count)
+        ).filter(
+            MonthlyCategoryTotal.user_id == user_id,
+            period.rollup_filter(MonthlyCategoryTotal)
+        )
+        if category_ids is not None:
+            query = query.filter(
+                MonthlyCategoryTotal.category_id.in_(category_ids)
+            )
+        query = query.group_by(
+            MonthlyCategoryTotal.category_id,
+            MonthlyCategoryTotal.year,
+            MonthlyCategoryTotal.month
+        )
+        return cls(query.all())
+
+    def get(self, category_id, year, month):
+        """Total for one category in one month."""
+        return self._totals.get((category_id, year, month), Decimal('0'))
+
+    def month_total(self, year, month):
+        """Total across all categories for one month."""
+        return sum(
+            self._by_month.get((year, month), {}).values(), Decimal('0')
+        )
+
+    def month_breakdown(self, year, month):
+        """Totals per category id for one month, omitting empty ones."""
+        return {
+            category_id: total
+            for category_id, total in self._by_month.get(
+                (year, month), {}
+            ).items()
+            if total
+        }
+
+    def category_total(self, category_id, months):
+        """Total for one category over a list of (year, month) pairs."""
+        return sum(
+            (self.get(category_id, year, month) for year, month in months),
+            Decimal('0')
+        )
+
+    def has_expenses(self, category_id, months):
+        """True if the category has expenses in any of the given months."""
+        return any(
+            self._counts.get((category_id, year, month), 0) > 0
+            for year, month in months
+        )
+
+def preload_month_spending(categories, year=None, month=None):
+    """Attach one month's spending to categories using a single query.
+
+    After this call ``Category.current_month_spending`` (and therefore
+    ``budget_progress`` and ``should_alert``) read the attached value
+    instead of issuing a query per access.
+
+    Args:
+        categories (iterable): Category instances, typically one user's
+        year (int, optional): Year to load, defaults to the current year
+        month (int, optional): Month to load, defaults to the current month
+
+    Returns:
+        list: The categories, for chaining
+    """
+    categories = list(categories)
+    if year is None or month is None:
+        now = datetime.now()
+        year, month = now.year, now.month
+
+    by_user = {}
+    for category in categories:
+        by_user.setdefault(category.user_id, []).append(category)
+
+    for user_id, owned in by_user.items():
+        matrix = SpendingMatrix.load(
+            user_id,
+            Period.month(year, month),
+            category_ids=[category.id for category in owned]
+        )
+        for category in owned:
+            category._month_spending = (
+                (year, month), matrix.get(category.id, year, month)
+            )
+    return categories
+
+def calculate_trend(recent_totals):
+    """Percentage change between the newest and oldest month.
+
+    Args:
+        recent_totals (list): Monthly totals, newest first
+
+    Returns:
+        Decimal: Change rounded to one decimal place; 0 when the oldest
+        month has no spending to compare against
+    """
+    if len(recent_totals) < 2 or not recent_totals[-1]:
+        return 0
+    trend = (recent_totals[0] - recent_totals[-1]) / recent_totals[-1] * 100
+    return round(trend, 1)
+
+def build_reports_dashboard(user, now=None):
+    """Compute all reports dashboard figures from one aggregate query.
+
+    Args:
+        user (User): User to report on
+        now (datetime, optional): Reference date, defaults to now
+
+    Returns:
+        dict: ``ytd_spending``, ``monthly_totals``, ``trends`` and
+        ``budget_vs_actual`` in the shapes the template expects
+    """
+    now = now or datetime.now()
+
+    # Window covers the calendar year plus the months trends look back on
+    start_year, start_month = min(
+        (now.year, 1),
+        shift_month(now.year, now.month, -(TREND_MONTHS - 1))
+    )
+    window = Period(
+        Period.month(start_year, start_month).start,
+        Period.year(now.year).end
+    )
+    matrix = SpendingMatrix.load(user.id, window)
+
+    categories = [
+        summarize_category(category)
+        for category in user.categories.order_by(Category.id).all()
+    ]
+    year_months = [(now.year, month) for month in range(1, 13)]
+
+    ytd_spending = [
+        (category, matrix.category_total(category.id, year_months))
+        for category in categories
+        if matrix.has_expenses(category.id, year_months)
+    ]
+
+    monthly_totals = [
+        {'month': month, 'total': matrix.month_total(now.year, month)}
+        for month in range(1, 13)
+    ]
+
+    trend_months = [
+        shift_month(now.year, now.month, -offset)
+        for offset in range(TREND_MONTHS)
+    ]
+    trends = []
+    for category, total in ytd_spending:
+        recent = [matrix.get(category.id, y, m) for y, m in trend_months]
+        trends.append({
+            'category': category,
+            'total': total,
+            'trend': calculate_trend(recent)
+        })
+
+    budget_vs_actual = []
+    for category in categories:
+        if not category.is_active:
+            continue
+        actual = matrix.get(category.id, now.year, now.month)
+        budget_vs_actual.append({
+            'category': category,
+            'budget': category.budget_amount,
+            'actual': actual,
+            'variance': category.budget_amount - actual
+            if category.budget_amount else None
+        })
+
+    return {
+        'ytd_spending': ytd_spending,
+        'monthly_totals': monthly_totals,
+        'trends': trends,
+        'budget_vs_actual': budget_vs_actual
+    }
+
+def build_spending_history(user_id, months, category_ids=None,
+                           breakdown=False, offset=0, now=None):
+    """Compute monthly spending buckets for charts in one query.
+
+    Args:
+        user_id (int): Owner of the expenses
+        months (int): Number of monthly buckets to return
+        category_ids (list, optional): Only count these categories
+        breakdown (bool): Include per-category totals in each bucket
+        offset (int): Months to shift the window back from ``now``
+        now (datetime, optional): Reference date, defaults to now
+
+    Returns:
+        list: Buckets oldest first with ``year``, ``month`` and ``total``
+        (plus ``categories`` when ``breakdown`` is set); months without
+        spending are filled with zero
+    """
+    now = now or datetime.now()
+    end_year, end_month = shift_month(now.year, now.month, -offset)
+    start_year, start_month = shift_month(end_year, end_month, -(months - 1))
+    matrix = SpendingMatrix.load(
+        user_id,
+        Period.months(start_year, start_month, months),
+        category_ids=category_ids
+    )
+
+    data = []
+    for index in range(months):
+        year, month = shift_month(start_year, start_month, index)
+        bucket = {
+            'year': year,
+            'month': month,
+            'total': float(matrix.month_total(year, month))
+        }
+        if breakdown:
+            bucket['categories'] = {
+                str(category_id): float(total)
+                for category_id, total
+                in matrix.month_breakdown(year, month).items()
+            }
+        data.append(bucket)
+    return data
@@ -0,0 +1,214 @@
+"""Incrementally maintained monthly spending rollups.
+
+Every flush that inserts, updates or deletes an ``Expense`` is turned into
+per-(user, category, year, month) deltas which are upserted into the
+``monthly_category_totals`` table in the same transaction. Read paths then
+serve totals from that table instead of re-summing raw expenses.
+"""
+from collections import defaultdict
+from decimal import Decimal
+from sqlalchemy import event, extract, func, inspect, select
+from sqlalchemy.orm import Session
+
+from . import db
+from .models import Expense, MonthlyCategoryTotal
+
+_TRACKED_ATTRS = ('user_id', 'category_id', 'date', 'amount')
+
+def _to_decimal(value):
+    """Coerce an amount to Decimal without float rounding artefacts."""
+    if value is None:
+        return Decimal('0')
+    if isinstance(value, Decimal):
+        return value
+    return Decimal(str(value))
+
+def _old_and_new(state, attr):
+    """Return the pre-flush and current value of an attribute."""
+    history = state.attrs[attr].history
+    new = state.attrs[attr].value
+    old = history.deleted[0] if history.deleted else new
+    return old, new
+
+def add_delta(deltas, user_id, category_id, expense_date, amount, count):
+    """Accumulate a spending delta for the month containing a date.
+
+    Args:
+        deltas (dict): Mapping of rollup key to ``[amount, count]``
+        user_id (int): Owner of the expense
+        category_id (int): Expense category
+        expense_date (date): Date of the expense
+        amount (Decimal): Signed amount to add
+        count (int): Signed expense count to add
+    """
+    key = (user_id, category_id, expense_date.year, expense_date.month)
+    entry = deltas.setdefault(key, [Decimal('0'), 0])
+    entry[0] += _to_decimal(amount)
+    entry[1] += count
+
+def collect_deltas(session):
+    """Compute rollup deltas for the expenses pending in a session flush.
+
+    Args:
+        session (Session): Session currently being flushed
+
+    Returns:
+        dict: Mapping of (user_id, category_id, year, month) to
+        ``[amount_delta, count_delta]``
+    """
+    deltas = defaultdict(lambda: [Decimal('0'), 0])
+
+    for obj in session.new:
+        if isinstance(obj, Expense):
+            add_delta(deltas, obj.user_id, obj.category_id, obj.date,
+                      obj.amount, 1)
+
+    for obj in session.deleted:
+        if isinstance(obj, Expense):
+            state = inspect(obj)
+            old = {attr: _old_and_new(state, attr)[0] for attr in _TRACKED_ATTRS}
+            add_delta(deltas, old['user_id'], old['category_id'], old['date'],
+                      -_to_decimal(old['amount']), -1)
+
+    for obj in session.dirty:
+        if not isinstance(obj, Expense) or obj in session.deleted:
+            continue
+        state = inspect(obj)
+        values = {attr: _old_and_new(state, attr) for attr in _TRACKED_ATTRS}
+        if all(old == new for old, new in values.values()):
+            continue
+        add_delta(deltas, values['user_id'][0], values['category_id'][0],
+                  values['date'][0], -_to_decimal(values['amount'][0]), -1)
+        add_delta(deltas, values['user_id'][1], values['category_id'][1],
+                  values['date'][1], values['amount'][1], 1)
+
+    return {
+        key: value for key, value in deltas.items()
+        if value[0] != 0 or value[1] != 0
+    }
+
+def _upsert_statement(dialect_name):
+    """Build a dialect-specific ``INSERT ... ON CONFLICT`` statement.
+
+    Returns None for dialects without native upsert support.
+    """
+    if dialect_name == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect_name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        return None
+
+    table = MonthlyCategoryTotal.__table__
+    stmt = insert(table)
+    return stmt.on_conflict_do_update(
+        index_elements=[
+            table.c.user_id, table.c.category_id,
+            table.c.year, table.c.month
+        ],
+        set_={
+            'total': table.c.total + stmt.excluded.total,
+            'count': table.c.count + stmt.excluded.count
+        }
+    )
+
+def apply_deltas(deltas, connection=None):
+    """Upsert accumulated deltas into the rollup table.
+
+    Args:
+        deltas (dict): Output of :func:`collect_deltas` or :func:`add_delta`
+        connection: Connection to write on; defaults to the session's
+    """
+    if not deltas:
+        return
+    if connection is None:
+        connection = db.session.connection()
+
+    table = MonthlyCategoryTotal.__table__
+    rows = [
+        {
+            'user_id': user_id,
+            'category_id': category_id,
+            'year': year,
+            'month': month,
+            'total': amount,
+            'count': count
+        }
+        for (user_id, category_id, year, month), (amount, count)
+        in deltas.items()
+    ]
+
+    stmt = _upsert_statement(connection.dialect.name)
+    if stmt is not None:
+        connection.execute(stmt, rows)
+        return
+
+    # Generic fallback: update in place, insert when no row exists yet
+    for row in rows:
+        result = connection.execute(
+            table.update().where(
+                table.c.user_id == row['user_id'],
+                table.c.category_id == row['category_id'],
+                table.c.year == row['year'],
+                table.c.month == row['month']
+            ).values(
+                total=table.c.total + row['total'],
+                count=table.c.count + row['count']
+            )
+        )
+        if result.rowcount == 0:
+            connection.execute(table.insert().values(**row))
+
+def _load_previous_value(target, value, oldvalue, initiator):
+    """No-op set listener; registering it forces old values to load."""
+    return value
+
+# Ensure the pre-edit value is known even when an expired instance is
+# modified, so edits can be subtracted from the month they left.
+for _attr in _TRACKED_ATTRS:
+    event.listen(getattr(Expense, _attr), 'set', _load_previous_value,
+                 active_history=True, retval=True)
+
+@event.listens_for(Session, 'after_flush')
+def _maintain_rollups(session, flush_context):
+    """Keep rollups in step with expense writes in the same transaction."""
+    deltas = collect_deltas(session)
+    if deltas:
+        apply_deltas(deltas, connection=session.connection())
+
+def rebuild(user_id=None):
+    """Recompute rollups from the raw expenses table.
+
+    Args:
+        user_id (int, optional): Restrict the rebuild to a single user
+
+    Returns:
+        int: Number of rollup rows written
+    """
+    table = MonthlyCategoryTotal.__table__
+    year = extract('year', Expense.date)
+    month = extract('month', Expense.date)
+
+    source = select(
+        Expense.user_id,
+        Expense.category_id,
+        year,
+        month,
+        func.sum(Expense.amount),
+        func.count(Expense.id)
+    ).group_by(Expense.user_id, Expense.category_id, year, month)
+
+    delete = table.delete()
+    if user_id is not None:
+        source = source.where(Expense.user_id == user_id)
+        delete = delete.where(table.c.user_id == user_id)
+
+    db.session.execute(delete)
+    result = db.session.execute(
+        table.insert().from_select(
+            ['user_id', 'category_id', 'year', 'month', 'total', 'count'],
+            source
+        )
+    )
+    db.session.commit()
+    return result.rowcount
@@ -0,0 +1,514 @@
+"""JSON API, version 1, mounted at ``/api/v1``.
+
+Requests are authenticated with the same session cookie as the web
+pages (log in through ``/auth/login``). Input is validated with the web
+forms, so the API accepts exactly what the pages do: ``ExpenseForm`` for
+expenses (``date`` required), ``QuickExpenseForm`` for quick entries
+(``date`` defaults to today, active categories only), ``CategoryForm``
+and ``CategoryBudgetForm``. Fields left out of a create are treated like
+blank form fields; updates start from the stored values.
+
+The blueprint is exempt from CSRF tokens. Instead, bodies must be sent
+as ``application/json``, which a cross-site form cannot do.
+
+Writes accept an ``Idempotency-Key`` header (see :mod:`app.idempotency`).
+``POST /expenses/batch`` applies up to ``API_BATCH_MAX_OPERATIONS``
+creates, updates and deletes in one transaction; if any operation is
+invalid none are applied and the errors are listed by index.
+
+``GET`` endpoints answer conditional requests (see
+:mod:`app.conditional`).
+
+Errors are returned as ``{"error": {"status": ..., "message": ...}}``,
+with ``fields`` (form errors) or ``operations`` (batch errors) on 422s.
+"""
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from functools import wraps
+from flask import Blueprint, current_app, jsonify, request
+from flask_login import current_user
+from sqlalchemy.exc import IntegrityError
+from werkzeug.datastructures import MultiDict
+from werkzeug.exceptions import (
+    BadRequest, Conflict, HTTPException, NotFound, Unauthorized,
+    UnprocessableEntity, UnsupportedMediaType
+)
+
+from .. import db, idempotency
+from ..conditional import conditional
+from ..forms.budget import CategoryBudgetForm
+from ..forms.expense import CategoryForm, ExpenseForm
+from ..forms.quick import QuickExpenseForm
+from ..models import Budget, Category, Expense
+from ..pagination import InvalidCursor, keyset_paginate
+from .budgets import set_category_budget
+
+bp = Blueprint('api', __name__)
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Form fields each write accepts, named as on the models
+EXPENSE_FIELDS = (
+    'category_id', 'amount', 'description', 'date', 'payment_method',
+    'is_recurring', 'recurrence_frequency', 'receipt_note'
+)
+QUICK_EXPENSE_FIELDS = (
+    'category_id', 'amount', 'description', 'date', 'payment_method',
+    'is_recurring'
+)
+CATEGORY_FIELDS = ('name', 'icon', 'color', 'budget_amount')
+BUDGET_FIELDS = ('budget_amount', 'alert_threshold', 'notes')
+
+BATCH_OPERATIONS = ('create', 'quick_create', 'update', 'delete')
+
+class ValidationFailed(UnprocessableEntity):
+    """422 with the form errors of one write or a batch of them."""
+
+    def __init__(self, description, fields=None, operations=None):
+        super().__init__(description)
+        self.fields = fields
+        self.operations = operations
+
+# Serialisation; amounts are strings so no precision is lost
+
+CENTS = Decimal('0.01')
+
+def _decimal(value):
+    return None if value is None else str(Decimal(value).quantize(CENTS))
+
+def _isoformat(value):
+    return value.isoformat() if value else None
+
+def expense_json(expense):
+    return {
+        'id': expense.id,
+        'category_id': expense.category_id,
+        'amount': _decimal(expense.amount),
+        'description': expense.description,
+        'date': _isoformat(expense.date),
+        'payment_method': expense.payment_method,
+        'is_recurring': bool(expense.is_recurring),
+        'recurrence_frequency': expense.recurrence_frequency,
+        'receipt_note': expense.receipt_note,
+        'next_due': _isoformat(expense.next_due),
+        'recurring_parent_id': expense.recurring_parent_id,
+        'created_at': _isoformat(expense.created_at)
+    }
+
+def category_json(category):
+    return {
+        'id': category.id,
+        'name': category.name,
+        'icon': category.icon,
+        'color': category.color,
+        'budget_amount': _decimal(category.budget_amount),
+        'alert_threshold': category.alert_threshold,
+        'is_active': bool(category.is_active)
+    }
+
+def budget_json(budget):
+    return {
+        'id': budget.id,
+        'category_id': budget.category_id,
+        'year': budget.year,
+        'month': budget.month,
+        'amount': _decimal(budget.amount),
+        'notes': budget.notes
+    }
+
+# Request handling
+
+@bp.before_request
+def _check_request():
+    if not current_user.is_authenticated:
+        raise Unauthorized('Log in to use the API.')
+    if request.method in ('POST', 'PUT', 'PATCH') and not request.is_json:
+        # Stands in for the CSRF token this blueprint is exempt from
+        raise UnsupportedMediaType('Send the request body as JSON.')
+
+@bp.errorhandler(HTTPException)
+def _error(e):
+    db.session.rollback()
+    error = {'status': e.code, 'message': e.description}
+    for name in ('fields', 'operations'):
+        if getattr(e, name, None):
+            error[name] = getattr(e, name)
+    response = jsonify({'error': error})
+    response.status_code = e.code
+    for name, value in e.get_headers():
+        if name.lower() != 'content-type':
+            response.headers[name] = value
+    return response
+
+def _json_response(text, status):
+    return current_app.response_class(text, status=status,
+                                      mimetype='application/json')
+
+def _replay(stored):
+    response = _json_response(stored.response_body, stored.status_code)
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+def mutation(view):
+    """Commit a write view's changes, honouring ``Idempotency-Key``.
+
+    The view makes its changes without committing and returns
+    ``(body, status)``; errors are raised as HTTP exceptions, which roll
+    the transaction back.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get(idempotency.HEADER)
+        if key is None:
+            body, status = view(*args, **kwargs)
+            db.session.commit()
+            return _json_response(json.dumps(body), status)
+
+        if not key or len(key) > idempotency.MAX_KEY_LENGTH:
+            raise BadRequest(f'{idempotency.HEADER} must be 1 to '
+                             f'{idempotency.MAX_KEY_LENGTH} characters.')
+        fingerprint = idempotency.request_hash(
+            request.method, request.path, request.get_json(silent=True)
+        )
+
+        def replay_or_reject(stored):
+            if stored.request_hash != fingerprint:
+                raise UnprocessableEntity(
+                    f'This {idempotency.HEADER} was used for a different '
+                    'request.'
+                )
+            return _replay(stored)
+
+        stored = idempotency.lookup(current_user.id, key)
+        if stored is not None:
+            return replay_or_reject(stored)
+
+        body, status = view(*args, **kwargs)
+        text = json.dumps(body)
+        idempotency.record(current_user.id, key, fingerprint, status, text)
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # A concurrent retry committed the key first
+            db.session.rollback()
+            stored = idempotency.lookup(current_user.id, key)
+            if stored is None:
+                raise
+            return replay_or_reject(stored)
+        return _json_response(text, status)
+    return wrapper
+
+def _json_object(value, what='The request body'):
+    if not isinstance(value, dict):
+        raise ValidationFailed(f'{what} must be a JSON object.')
+    return value
+
+def _body():
+    return _json_object(request.get_json(silent=True))
+
+def _form_value(value):
+    """A JSON value as an HTML form would have posted it."""
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'y' if value else ''
+    return str(value)
+
+def _validated(form_class, values, fields, choices=None, forms=None):
+    """Validate JSON values with one of the web forms.
+
+    Args:
+        form_class: Form class whose rules apply
+        values (dict): Decoded JSON values
+        fields (tuple): Fields to read; missing ones are posted blank
+        choices (list, optional): Category choices for ``category_id``
+        forms (dict, optional): Forms to reuse by class; batches
+            reprocess one form per class instead of building hundreds
+
+    Returns:
+        FlaskForm: The validated form
+
+    Raises:
+        ValidationFailed: With the form's errors
+    """
+    formdata = MultiDict(
+        (name, _form_value(values.get(name))) for name in fields
+    )
+    form = forms.get((form_class, fields)) if forms is not None else None
+    if form is None:
+        form = form_class(formdata=formdata, meta={'csrf': False})
+        if choices is not None:
+            form.category_id.choices = choices
+        if forms is not None:
+            forms[(form_class, fields)] = form
+    else:
+        form.process(formdata)
+    if not form.validate():
+        raise ValidationFailed('The submitted values are invalid.',
+                               fields=form.errors)
+    return form
+
+def _apply(obj, form, fields):
+    for name in fields:
+        value = form[name].data
+        setattr(obj, name, None if value == '' else value)
+
+def _category_choices():
+    """Category choices for ``ExpenseForm`` and ``QuickExpenseForm``."""
+    rows = db.session.query(
+        Category.id, Category.name, Category.is_active
+    ).filter(Category.user_id == current_user.id).all()
+    return {
+        False: [(row.id, row.name) for row in rows],
+        True: [(row.id, row.name) for row in rows if row.is_active]
+    }
+
+def _owned(model, id):
+    obj = model.query.filter_by(id=id, user_id=current_user.id).first()
+    if obj is None:
+        raise NotFound(f'{model.__name__} {id} not found.')
+    return obj
+
+def _create_expense(values, quick, choices, forms=None):
+    form = _validated(QuickExpenseForm if quick else ExpenseForm, values,
+                      QUICK_EXPENSE_FIELDS if quick else EXPENSE_FIELDS,
+                      choices[quick], forms)
+    expense = Expense(user_id=current_user.id)
+    _apply(expense, form, QUICK_EXPENSE_FIELDS if quick else EXPENSE_FIELDS)
+    expense.date = expense.date or date.today()
+    db.session.add(expense)
+    return expense
+
+def _update_expense(expense, values, choices, forms=None):
+    merged = expense_json(expense)
+    merged.update(values)
+    form = _validated(ExpenseForm, merged, EXPENSE_FIELDS, choices[False],
+                      forms)
+    _apply(expense, form, EXPENSE_FIELDS)
+    return expense
+
+# Expenses
+
+@bp.route('/expenses')
+@conditional()
+def list_expenses():
+    """Page through expenses, newest first.
+
+    Query args: ``limit``, ``cursor``, ``category``, ``from`` and ``to``
+    (``YYYY-MM-DD``).
+    """
+    limit = min(max(request.args.get('limit', DEFAULT_PAGE_SIZE, type=int),
+                    1), MAX_PAGE_SIZE)
+    query = current_user.expenses
+    category_id = request.args.get('category', type=int)
+    if category_id:
+        query = query.filter_by(category_id=category_id)
+    for arg, compare in (('from', Expense.date.__ge__),
+                         ('to', Expense.date.__le__)):
+        if request.args.get(arg):
+            try:
+                bound = datetime.strptime(request.args[arg],
+                                          '%Y-%m-%d').date()
+            except ValueError:
+                raise BadRequest(f'"{arg}" must be a YYYY-MM-DD date.')
+            query = query.filter(compare(bound))
+    try:
+        page = keyset_paginate(query, Expense.date, Expense.id, limit,
+                               cursor=request.args.get('cursor'))
+    except InvalidCursor:
+        raise BadRequest('Invalid cursor.')
+    return jsonify({
+        'expenses': [expense_json(expense) for expense in page.items],
+        'next_cursor': page.next_cursor,
+        'prev_cursor': page.prev_cursor
+    })
+
+@bp.route('/expenses', methods=['POST'])
+@mutation
+def create_expense():
+    """Create an expense, validated like the full expense form."""
+    expense = _create_expense(_body(), False, _category_choices())
+    db.session.flush()
+    return {'expense': expense_json(expense)}, 201
+
+@bp.route('/expenses/quick', methods=['POST'])
+@mutation
+def quick_create_expense():
+    """Create an expense, validated like the dashboard quick-add form."""
+    expense = _create_expense(_body(), True, _category_choices())
+    db.session.flush()
+    return {'expense': expense_json(expense)}, 201
+
+@bp.route('/expenses/<int:id>')
+@conditional()
+def get_expense(id):
+    return jsonify({'expense': expense_json(_owned(Expense, id))})
+
+@bp.route('/expenses/<int:id>', methods=['PATCH'])
+@mutation
+def update_expense(id):
+    """Change some fields of an expense."""
+    expense = _update_expense(_owned(Expense, id), _body(),
+                              _category_choices())
+    db.session.flush()
+    return {'expense': expense_json(expense)}, 200
+
+@bp.route('/expenses/<int:id>', methods=['DELETE'])
+@mutation
+def delete_expense(id):
+    db.session.delete(_owned(Expense, id))
+    return {'id': id, 'deleted': True}, 200
+
+@bp.route('/expenses/batch', methods=['POST'])
+@mutation
+def batch_expenses():
+    """Apply many expense writes in one transaction.
+
+    Body: ``{"operations": [{"op": "create", "data": {...}},
+    {"op": "update", "id": 7, "data": {...}}, {"op": "delete", "id": 8},
+    ...]}``; ``quick_create`` validates like the quick-add form.
+    Operations run in order and all succeed or none are applied.
+    """
+    operations = _body().get('operations')
+    limit = current_app.config.get('API_BATCH_MAX_OPERATIONS', 1000)
+    if not isinstance(operations, list) or not operations:
+        raise ValidationFailed('"operations" must be a non-empty list.')
+    if len(operations) > limit:
+        raise ValidationFailed(f'A batch can hold at most {limit} '
+                               'operations.')
+
+    # Everything an operation needs is loaded up front, in two queries
+    choices = _category_choices()
+    ids = {
+        operation.get('id') for operation in operations
+        if isinstance(operation, dict) and isinstance(operation.get('id'), int)
+    }
+    expenses = {
+        expense.id: expense for expense in current_user.expenses.filter(
+            Expense.id.in_(ids)
+        )
+    } if ids else {}
+
+    applied, errors, forms = [], [], {}
+    for index, operation in enumerate(operations):
+        try:
+            applied.append(
+                _apply_operation(operation, expenses, choices, forms)
+            )
+        except (ValidationFailed, NotFound) as e:
+            error = {'index': index, 'message': e.description}
+            if getattr(e, 'fields', None):
+                error['fields'] = e.fields
+            errors.append(error)
+    if errors:
+        raise ValidationFailed('No operations were applied.',
+                               operations=errors)
+
+    db.session.flush()
+    return {'results': [
+        {'op': kind, 'id': target} if kind == 'delete'
+        else {'op': kind, 'expense': expense_json(target)}
+        for kind, target in applied
+    ]}, 200
+
+def _apply_operation(operation, expenses, choices, forms):
+    """Stage one batch operation; returns ``(op, expense or id)``."""
+    operation = _json_object(operation, 'Each operation')
+    kind = operation.get('op')
+    if kind not in BATCH_OPERATIONS:
+        raise ValidationFailed('"op" must be one of '
+                               + ', '.join(BATCH_OPERATIONS) + '.')
+    if kind in ('create', 'quick_create'):
+        values = _json_object(operation.get('data'), '"data"')
+        return kind, _create_expense(values, kind == 'quick_create', choices,
+                                     forms)
+
+    expense = expenses.get(operation.get('id'))
+    if expense is None:
+        raise NotFound(f'Expense {operation.get("id")} not found.')
+    if kind == 'update':
+        values = _json_object(operation.get('data'), '"data"')
+        return kind, _update_expense(expense, values, choices, forms)
+    db.session.delete(expense)
+    del expenses[expense.id]
+    return kind, expense.id
+
+# Categories
+
+@bp.route('/categories')
+@conditional()
+def list_categories():
+    categories = current_user.categories.order_by(Category.name).all()
+    return jsonify({
+        'categories': [category_json(category) for category in categories]
+    })
+
+@bp.route('/categories', methods=['POST'])
+@mutation
+def create_category():
+    form = _validated(CategoryForm, _body(), CATEGORY_FIELDS)
+    category = Category(user_id=current_user.id)
+    _apply(category, form, CATEGORY_FIELDS)
+    db.session.add(category)
+    db.session.flush()
+    return {'category': category_json(category)}, 201
+
+@bp.route('/categories/<int:id>', methods=['PATCH'])
+@mutation
+def update_category(id):
+    category = _owned(Category, id)
+    merged = category_json(category)
+    merged.update(_body())
+    form = _validated(CategoryForm, merged, CATEGORY_FIELDS)
+    _apply(category, form, CATEGORY_FIELDS)
+    db.session.flush()
+    return {'category': category_json(category)}, 200
+
+@bp.route('/categories/<int:id>', methods=['DELETE'])
+@mutation
+def delete_category(id):
+    category = _owned(Category, id)
+    if category.expenses.first() is not None:
+        raise Conflict('Cannot delete a category with expenses.')
+    db.session.delete(category)
+    return {'id': id, 'deleted': True}, 200
+
+# Budgets
+
+@bp.route('/budgets')
+@conditional()
+def list_budgets():
+    """Budgets for a month (``year`` and ``month`` args, default now)."""
+    now = datetime.now()
+    year = request.args.get('year', now.year, type=int)
+    month = request.args.get('month', now.month, type=int)
+    if not 1 <= month <= 12:
+        raise BadRequest('"month" must be between 1 and 12.')
+    budgets = Budget.query.filter_by(
+        user_id=current_user.id, year=year, month=month
+    ).order_by(Budget.category_id).all()
+    return jsonify({
+        'year': year,
+        'month': month,
+        'budgets': [budget_json(budget) for budget in budgets]
+    })
+
+@bp.route('/budgets/<int:category_id>', methods=['PUT'])
+@mutation
+def set_budget(category_id):
+    """Set a category's monthly budget, as the budget page does."""
+    category = _owned(Category, category_id)
+    values = {
+        'budget_amount': category.budget_amount,
+        'alert_threshold': category.alert_threshold
+    }
+    values.update(_body())
+    form = _validated(CategoryBudgetForm, values, BUDGET_FIELDS)
+    budget = set_category_budget(category, form)
+    db.session.flush()
+    return {
+        'category': category_json(category),
+        'budget': budget_json(budget)
+    }, 200
@@ -5,6 +5,7 @@ from werkzeug.security import generate_password_hash
 from urllib.parse import urlparse
 from .. import db
 from ..models import User
+from ..passwords import HashingBusy, password_hasher
 from ..forms.auth import LoginForm, RegistrationForm
 
 bp = Blueprint('auth', __name__, url_prefix='/auth')
@@ -43,6 +44,15 @@ def login():
             flash('Invalid username or password.', 'danger')
             return redirect(url_for('auth.login'))
         
+        if password_hasher.needs_rehash(user.password_hash):
+            # Hash parameters changed since this hash was made; upgrade
+            # it while the plaintext is at hand
+            try:
+                user.set_password(form.password.data)
+                db.session.commit()
+            except HashingBusy:
+                pass  # Try again at the next login
+        
         login_user(user, remember=form.remember_me.data)
         next_page = request.args.get('next')
         if not next_page or urlparse(next_page).netloc:
@@ -7,9 +7,11 @@ from flask import (
 from flask_login import login_required, current_user
 from sqlalchemy.exc import SQLAlchemyError
 
-from .. import db
+from .. import alerts, db
+from ..cache import bump_data_version
 from ..models import Category, Budget, BudgetAlert
 from ..forms.budget import CategoryBudgetForm, UserBudgetForm
+from ..reporting import preload_month_spending
 
 bp = Blueprint('budgets', __name__, url_prefix='/budgets')
 
@@ -17,7 +19,9 @@ bp = Blueprint('budgets', __name__, url_prefix='/budgets')
 @login_required
 def index():
     """Display budget management dashboard."""
-    categories = current_user.categories.filter_by(is_active=True).all()
+    categories = preload_month_spending(
+        current_user.categories.filter_by(is_active=True).all()
+    )
     now = datetime.now()
     
     # Get current month's budget data
@@ -42,6 +46,49 @@ def index():
         alerts=alerts
     )
 
+def set_category_budget(category, form):
+    """Apply a validated budget form to a category and the current month.
+    
+    Updates the category's monthly budget and alert threshold, creates or
+    updates its ``Budget`` row for the current month and queues an alert
+    check. The caller commits.
+    
+    Args:
+        category (Category): Category owned by the current user
+        form (CategoryBudgetForm): Validated form
+    
+    Returns:
+        Budget: The current month's budget row
+    """
+    category.budget_amount = form.budget_amount.data
+    category.alert_threshold = form.alert_threshold.data
+    
+    now = datetime.now()
+    budget = Budget.query.filter_by(
+        user_id=category.user_id,
+        category_id=category.id,
+        year=now.year,
+        month=now.month
+    ).first()
+    
+    if budget:
+        budget.amount = form.budget_amount.data
+        budget.notes = form.notes.data
+    else:
+        budget = Budget(
+            user_id=category.user_id,
+            category_id=category.id,
+            amount=form.budget_amount.data,
+            year=now.year,
+            month=now.month,
+            notes=form.notes.data
+        )
+        db.session.add(budget)
+    
+    # A lower budget or threshold can put spending over a limit
+    alerts.queue_category_evaluation(category, now.year, now.month)
+    return budget
+
 @bp.route('/category/<int:id>', methods=['GET', 'POST'])
 @login_required
 def edit_category_budget(id):
@@ -57,54 +104,17 @@ def edit_category_budget(id):
     
     if form.validate_on_submit():
         try:
-            # Update category settings
-            category.budget_amount = form.budget_amount.data
-            category.alert_threshold = form.alert_threshold.data
-            
-            # Create or update budget record for current month
-            now = datetime.now()
-            budget = Budget.query.filter_by(
-                user_id=current_user.id,
-                category_id=category.id,
-                year=now.year,
-                month=now.month
-            ).first()
-            
-            if budget:
-                budget.amount = form.budget_amount.data
-                budget.notes = form.notes.data
-            else:
-                budget = Budget(
-                    user_id=current_user.id,
-                    category_id=category.id,
-                    amount=form.budget_amount.data,
-                    year=now.year,
-                    month=now.month,
-                    notes=form.notes.data
-                )
-                db.session.add(budget)
-            
+            set_category_budget(category, form)
             db.session.commit()
             flash('Budget updated successfully!', 'success')
             
-            # Check if we need to create an alert
-            if category.should_alert():
-                alert = BudgetAlert(
-                    user_id=current_user.id,
-                    category_id=category.id,
-                    alert_type='threshold',
-                    message=f'Budget alert: {category.name} spending has reached '
-                           f'{category.budget_progress}% of budget'
-                )
-                db.session.add(alert)
-                db.session.commit()
-            
             return redirect(url_for('budgets.index'))
         except SQLAlchemyError as e:
             db.session.rollback()
             flash('Error updating budget. Please try again.', 'danger')
             print(f"Database error: {str(e)}")  # Log the error
     
+    preload_month_spending([category])
     return render_template(
         'budgets/category_form.html',
         form=form,
@@ -140,6 +150,8 @@ def mark_alerts_read():
             user_id=current_user.id,
             is_read=False
         ).update({'is_read': True})
+        # Bulk updates skip the flush hooks, so bump the version directly
+        bump_data_version(db.session.connection(), [current_user.id])
         db.session.commit()
         return jsonify({'status': 'success'})
     except SQLAlchemyError as e:
@@ -1,30 +1,39 @@
 """Routes for expense management."""
+import csv
+import io
 from datetime import datetime
 from flask import (
     Blueprint, render_template, redirect, url_for, flash, request, jsonify
 )
 from flask_login import login_required, current_user
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import joinedload
 
-from .. import db
-from ..models import Expense, Category, BudgetAlert
-from ..forms.expense import ExpenseForm, CategoryForm
+from .. import db, importer, search
+from ..cache import view_cache
+from ..exports import EXPORT_HEADER
+from ..models import Expense, Category
+from ..forms.expense import ExpenseForm, CategoryForm, ImportExpensesForm
 from ..forms.quick import QuickExpenseForm
+from ..pagination import InvalidCursor, KeysetPage, keyset_paginate
 
 # Create blueprint
 bp = Blueprint('expenses', __name__)
 
+EXPENSES_PER_PAGE = 20
+
 @bp.route('/expenses')
 @login_required
 def index():
     """Display list of user's expenses."""
-    page = request.args.get('page', 1, type=int)
+    cursor = request.args.get('cursor')
+    search_text = request.args.get('q', '').strip()
     category_filter = request.args.get('category', type=int)
     date_from = request.args.get('from')
     date_to = request.args.get('to')
     
-    # Base query
-    query = current_user.expenses
+    # Base query, with the category each row renders loaded alongside it
+    query = current_user.expenses.options(joinedload(Expense.category))
     
     # Apply filters
     if category_filter:
@@ -42,18 +51,52 @@ def index():
         except ValueError:
             flash('Invalid date format for "To" date', 'warning')
     
-    # Order by date descending
-    expenses = query.order_by(Expense.date.desc()).paginate(
-        page=page, per_page=20, error_out=False
-    )
+    if search.search_terms(search_text):
+        # Ranked results replace date ordering, so show the best matches
+        # rather than paging through them
+        expenses = KeysetPage(
+            search.apply_search(query, search_text)
+            .limit(search.SEARCH_RESULT_LIMIT).all()
+        )
+    else:
+        # The total only changes when the user's data does, so count once
+        # per data version and filter set instead of on every page
+        filter_key = f'{category_filter}:{date_from}:{date_to}'
+        total = view_cache.get_or_compute(
+            current_user,
+            f'expense-count:{filter_key}',
+            query.count
+        )
+        
+        # Newest first, keyed on (date, id) so deep pages cost the same as
+        # the first one
+        try:
+            expenses = keyset_paginate(
+                query, Expense.date, Expense.id, EXPENSES_PER_PAGE,
+                cursor=cursor, total=total
+            )
+        except InvalidCursor:
+            flash('That page link is no longer valid.', 'warning')
+            expenses = keyset_paginate(
+                query, Expense.date, Expense.id, EXPENSES_PER_PAGE,
+                total=total
+            )
     
     # Get categories for filter dropdown
     categories = current_user.categories.all()
     
+    # Filters carried over to the previous/next page links
+    filters = {
+        key: value for key, value in request.args.items()
+        if key in ('q', 'category', 'from', 'to') and value
+    }
+    
     return render_template(
         'expenses/list.html',
         expenses=expenses,
-        categories=categories
+        categories=categories,
+        filters=filters,
+        search_text=search_text
     )
 
 @bp.route('/expenses/quick-add', methods=['POST'])
@@ -77,21 +120,8 @@ def quick_add():
         )
         
         try:
-            # Add expense
+            # Budget alerts are checked by a job queued with this write
             db.session.add(expense)
-            
-            # Check budget threshold
-            category = Category.query.get(form.category_id.data)
-            if category and category.should_alert():
-                alert = BudgetAlert(
-                    user_id=current_user.id,
-                    category_id=category.id,
-                    alert_type='threshold',
-                    message=f'Budget alert: {category.name} spending has reached '
-                           f'{category.budget_progress}% of budget'
-                )
-                db.session.add(alert)
-            
             db.session.commit()
             flash('Expense added successfully!', 'success')
         except SQLAlchemyError as e:
@@ -103,7 +133,7 @@ def quick_add():
             for error in errors:
                 flash(f"{getattr(form, field).label.text}: {error}", 'danger')
     
-    return redirect(url_for('main.dashboard'))
+    return redirect(url_for('main.index'))
 
 @bp.route('/expenses/add', methods=['GET', 'POST'])
 @login_required
@@ -197,6 +227,44 @@ def delete_expense(id):
     
     return redirect(url_for('expenses.index'))
 
+@bp.route('/expenses/import', methods=['GET', 'POST'])
+@login_required
+def import_expenses():
+    """Bulk import expenses from a CSV in the export layout."""
+    form = ImportExpensesForm()
+    result = None
+    
+    if form.validate_on_submit():
+        stream = io.TextIOWrapper(
+            form.file.data.stream, encoding='utf-8-sig', newline=''
+        )
+        try:
+            result = importer.import_expenses(
+                current_user.id,
+                stream,
+                create_missing_categories=form.create_categories.data
+            )
+        except (SQLAlchemyError, UnicodeDecodeError, csv.Error) as e:
+            db.session.rollback()
+            flash('Error importing expenses. Please check the file.', 'danger')
+            print(f"Import error: {str(e)}")  # Log the error
+        else:
+            level = 'warning' if result.error_count else 'success'
+            flash(
+                f'Imported {result.imported} of {result.processed} rows '
+                f'({result.error_count} errors).',
+                level
+            )
+            if not result.error_count:
+                return redirect(url_for('expenses.index'))
+    
+    return render_template(
+        'expenses/import.html',
+        form=form,
+        result=result,
+        columns=EXPORT_HEADER
+    )
+
 # Category management routes
 @bp.route('/categories')
 @login_required
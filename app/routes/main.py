@@ -1,36 +1,31 @@
 """Main routes for Centsible Budget Tracker."""
-from datetime import datetime, timedelta
-from decimal import Decimal
-from sqlalchemy import extract, func
-from flask import Blueprint, render_template, flash, redirect, url_for
+from datetime import datetime
+from flask import Blueprint, render_template
 from flask_login import login_required, current_user
-from sqlalchemy.exc import SQLAlchemyError
-from .. import db
-from ..models import Expense, Category, BudgetAlert, Budget
+from sqlalchemy.orm import joinedload
+from ..models import Expense, BudgetAlert
 from ..forms.quick import QuickExpenseForm
+from ..cache import view_cache
+from ..conditional import conditional
+from ..dashboard import DashboardSnapshot
 
 bp = Blueprint('main', __name__)
 
 @bp.route('/dashboard')
 @bp.route('/')
 @login_required
+@conditional(forms=True)
 def index():
     """Main dashboard view."""
-    # Get current month spending
+    # Month totals, category breakdown and quick-add categories all come
+    # from one aggregate query, cached until the user's data changes
     now = datetime.now()
-    monthly_spending = current_user.get_monthly_spending(now.year, now.month)
-    
-    # Calculate previous month spending change
-    prev_month = now.month - 1 if now.month > 1 else 12
-    prev_year = now.year if now.month > 1 else now.year - 1
-    prev_spending = current_user.get_monthly_spending(prev_year, prev_month)
-    
-    if prev_spending > 0:
-        monthly_spending_change = int(
-            ((monthly_spending - prev_spending) / prev_spending) * 100
-        )
-    else:
-        monthly_spending_change = None
+    snapshot = view_cache.get_or_compute(
+        current_user,
+        f'dashboard:{now:%Y-%m}',
+        lambda: DashboardSnapshot.compute(current_user.id, now)
+    )
+    monthly_spending = snapshot.monthly_spending
     
     # Calculate budget remaining
     budget_remaining = (
@@ -39,31 +34,12 @@ def index():
     )
     
     # Get top spending category
-    top_category = None
-    top_category_spent = Decimal('0')
-    
-    category_spending = (
-        db.session.query(
-            Category,
-            func.sum(Expense.amount).label('total_spent')
-        )
-        .join(Expense)
-        .filter(
-            Expense.user_id == current_user.id,
-            extract('year', Expense.date) == now.year,
-            extract('month', Expense.date) == now.month
-        )
-        .group_by(Category)
-        .order_by(func.sum(Expense.amount).desc())
-        .first()
-    )
-    
-    if category_spending:
-        top_category = category_spending[0]
-        top_category_spent = category_spending[1]
+    top_category, top_category_spent = snapshot.top_category
     
     # Get recent expenses
-    recent_expenses = current_user.expenses.order_by(
+    recent_expenses = current_user.expenses.options(
+        joinedload(Expense.category)
+    ).order_by(
         Expense.date.desc()
     ).limit(5).all()
     
@@ -76,50 +52,18 @@ def index():
     # Quick add expense form
     quick_form = QuickExpenseForm()
     quick_form.category_id.choices = [
-        (c.id, c.name) for c in current_user.categories.filter_by(is_active=True).all()
+        (c.id, c.name) for c in snapshot.active_categories
     ]
     
-    # Prepare chart data
-    categories = []
-    amounts = []
-    colors = []
-    
-    category_totals = (
-        db.session.query(
-            Category,
-            func.sum(Expense.amount).label('total_spent')
-        )
-        .join(Expense)
-        .filter(
-            Expense.user_id == current_user.id,
-            extract('year', Expense.date) == now.year,
-            extract('month', Expense.date) == now.month
-        )
-        .group_by(Category)
-        .order_by(func.sum(Expense.amount).desc())
-        .all()
-    )
-    
-    for category, total in category_totals:
-        categories.append(category.name)
-        amounts.append(float(total))  # Convert Decimal to float for JSON
-        colors.append(category.color or '#10b981')  # Use default if no color
-    
-    chart_data = {
-        'categories': categories,
-        'amounts': amounts,
-        'colors': colors
-    }
-    
     return render_template(
         'dashboard/index.html',
         monthly_spending=monthly_spending,
-        monthly_spending_change=monthly_spending_change,
+        monthly_spending_change=snapshot.monthly_spending_change,
         budget_remaining=budget_remaining,
         top_category=top_category,
         top_category_spent=top_category_spent,
         recent_expenses=recent_expenses,
         alerts=alerts,
         quick_form=quick_form,
-        chart_data=chart_data
-    )
\ No newline at end of file
+        chart_data=snapshot.chart_data
+    )
@@ -1,178 +1,133 @@
 """Routes for expense reporting and analysis."""
 from datetime import datetime
 from decimal import Decimal
-import csv
-from io import StringIO
-from sqlalchemy import extract, func
 from flask import (
-    Blueprint, render_template, send_file, make_response,
-    jsonify, request, current_app
+    Blueprint, render_template, jsonify, request,
+    current_app, Response, abort, stream_with_context
 )
 from flask_login import login_required, current_user
-from .. import db
-from ..models import Expense, Category, Budget
+from ..cache import view_cache
+from ..conditional import conditional
+from ..exports import export_query, iter_expense_csv
+from ..periods import Period, recent_months
+from ..reporting import (
+    SpendingMatrix, build_reports_dashboard, build_spending_history
+)
 
 bp = Blueprint('reports', __name__, url_prefix='/reports')
 
 @bp.route('/')
 @login_required
+@conditional()
 def index():
     """Display reports dashboard."""
     now = datetime.now()
     
-    # Get year-to-date spending by category
-    ytd_spending = db.session.query(
-        Category,
-        func.sum(Expense.amount).label('total')
-    ).join(Expense).filter(
-        Expense.user_id == current_user.id,
-        extract('year', Expense.date) == now.year
-    ).group_by(Category).all()
-    
-    # Get monthly totals for the year
-    monthly_totals = []
-    for month in range(1, 13):
-        total = db.session.query(
-            func.sum(Expense.amount)
-        ).filter(
-            Expense.user_id == current_user.id,
-            extract('year', Expense.date) == now.year,
-            extract('month', Expense.date) == month
-        ).scalar() or Decimal('0')
-        
-        monthly_totals.append({
-            'month': month,
-            'total': total
-        })
-    
-    # Calculate spending trends
-    trends = []
-    for category, total in ytd_spending:
-        # Get last 3 months of spending for trend
-        last_3_months = []
-        for i in range(3):
-            month = now.month - i
-            year = now.year
-            if month < 1:
-                month += 12
-                year -= 1
-            
-            monthly_spent = db.session.query(
-                func.sum(Expense.amount)
-            ).filter(
-                Expense.user_id == current_user.id,
-                Expense.category_id == category.id,
-                extract('year', Expense.date) == year,
-                extract('month', Expense.date) == month
-            ).scalar() or Decimal('0')
-            
-            last_3_months.append(monthly_spent)
-        
-        # Calculate trend (positive if increasing, negative if decreasing)
-        if len(last_3_months) >= 2:
-            trend = (last_3_months[0] - last_3_months[-1]) / last_3_months[-1] * 100
-        else:
-            trend = 0
-        
-        trends.append({
-            'category': category,
-            'total': total,
-            'trend': round(trend, 1)
-        })
-    
-    # Get budget vs actual for current month
-    budget_vs_actual = []
-    categories = current_user.categories.filter_by(is_active=True).all()
-    for category in categories:
-        budget_vs_actual.append({
-            'category': category,
-            'budget': category.budget_amount,
-            'actual': category.current_month_spending,
-            'variance': category.budget_amount - category.current_month_spending
-            if category.budget_amount else None
-        })
+    # YTD, monthly, trend and budget figures all come from one
+    # aggregate query over the rollup table, cached per data version
+    report = view_cache.get_or_compute(
+        current_user,
+        f'reports:{now:%Y-%m}',
+        lambda: build_reports_dashboard(current_user, now)
+    )
     
     return render_template(
         'reports/index.html',
-        ytd_spending=ytd_spending,
-        monthly_totals=monthly_totals,
-        trends=trends,
-        budget_vs_actual=budget_vs_actual
+        now=now,
+        **report
     )
 
 @bp.route('/export/expenses')
 @login_required
 def export_expenses():
-    """Export expenses as CSV."""
-    output = StringIO()
-    writer = csv.writer(output)
-    
-    # Write header
-    writer.writerow([
-        'Date', 'Category', 'Description', 'Amount',
-        'Payment Method', 'Is Recurring', 'Recurrence Frequency',
-        'Notes'
-    ])
+    """Export expenses as a streamed CSV download.
     
-    # Write expense data
-    expenses = current_user.expenses.order_by(Expense.date.desc()).all()
-    for expense in expenses:
-        writer.writerow([
-            expense.date.strftime('%Y-%m-%d'),
-            expense.category.name,
-            expense.description,
-            float(expense.amount),
-            expense.payment_method,
-            'Yes' if expense.is_recurring else 'No',
-            expense.recurrence_frequency or '',
-            expense.receipt_note or ''
-        ])
+    Query parameters:
+        from: First date to include (YYYY-MM-DD)
+        to: Last date to include (YYYY-MM-DD)
+        category: One or more category ids to include
+    """
+    try:
+        date_from = _parse_date_arg('from')
+        date_to = _parse_date_arg('to')
+    except ValueError:
+        abort(400, description='Dates must use the YYYY-MM-DD format')
     
-    # Create response
-    output.seek(0)
-    return send_file(
-        StringIO(output.getvalue()),
-        mimetype='text/csv',
-        as_attachment=True,
-        download_name=f'expenses_{datetime.now().strftime("%Y%m%d")}.csv'
+    query = export_query(
+        current_user.id,
+        date_from=date_from,
+        date_to=date_to,
+        category_ids=request.args.getlist('category', type=int)
     )
+    filename = f'expenses_{datetime.now().strftime("%Y%m%d")}.csv'
+    return Response(
+        stream_with_context(iter_expense_csv(query)),
+        content_type='text/csv',
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
+
+def _parse_date_arg(name):
+    """Parse an optional YYYY-MM-DD query argument."""
+    value = request.args.get(name)
+    if not value:
+        return None
+    return datetime.strptime(value, '%Y-%m-%d').date()
 
 @bp.route('/api/spending-history')
 @login_required
+@conditional()
 def spending_history():
-    """Get historical spending data for charts."""
-    category_id = request.args.get('category_id', type=int)
+    """Get historical spending data for charts.
+    
+    Query parameters:
+        months: Number of monthly buckets (clamped to
+            ``SPENDING_HISTORY_MAX_MONTHS``); while more of the requested
+            horizon remains, ``X-History-Next-Offset`` gives the offset
+            of the next page
+        offset: Months to shift the window back, for paging older history;
+            a window starting before year 1 is a 400
+        category_id: One or more category ids to restrict totals to
+        breakdown: When truthy, include per-category totals per bucket
+    """
+    category_ids = request.args.getlist('category_id', type=int) or None
     months = request.args.get('months', 12, type=int)
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    breakdown = request.args.get('breakdown', '').lower() in ('1', 'true', 'yes')
     
-    now = datetime.now()
-    data = []
+    max_months = current_app.config['SPENDING_HISTORY_MAX_MONTHS']
+    requested = max(months, 1)
+    months = min(requested, max_months)
     
-    for i in range(months - 1, -1, -1):
-        month = ((now.month - i - 1) % 12) + 1
-        year = now.year - ((i + 12 - now.month) // 12)
-        
-        query = db.session.query(func.sum(Expense.amount))
-        query = query.filter(
-            Expense.user_id == current_user.id,
-            extract('year', Expense.date) == year,
-            extract('month', Expense.date) == month
+    now = datetime.now()
+    # Months between January of year 1 and the window's first month
+    if offset + months > (now.year - 1) * 12 + now.month:
+        abort(400)
+    view = (
+        f'spending-history:{now:%Y-%m}:{months}:{offset}:'
+        f'{sorted(category_ids or [])}:{breakdown}'
+    )
+    data = view_cache.get_or_compute(
+        current_user,
+        view,
+        lambda: build_spending_history(
+            current_user.id,
+            months,
+            category_ids=category_ids,
+            breakdown=breakdown,
+            offset=offset,
+            now=now
         )
-        
-        if category_id:
-            query = query.filter(Expense.category_id == category_id)
-        
-        total = query.scalar() or Decimal('0')
-        
-        data.append({
-            'year': year,
-            'month': month,
-            'total': float(total)
-        })
+    )
     
-    return jsonify(data)
+    response = jsonify(data)
+    if offset + months < requested:
+        # Tell clients where the next (older) page of history starts
+        response.headers['X-History-Next-Offset'] = str(offset + months)
+    return response
 
 @bp.route('/trends')
 @login_required
+@conditional()
 def category_trends():
     """Display detailed category spending trends."""
     categories = current_user.categories.filter_by(is_active=True).all()
@@ -183,28 +138,24 @@ def category_trends():
     )
     
     if selected_category:
-        # Get monthly spending for selected category
+        # Load the whole year for this category in one grouped query
         now = datetime.now()
-        monthly_data = []
+        months = recent_months(12, now)
+        matrix = SpendingMatrix.load(
+            current_user.id,
+            Period.months(*months[0], len(months)),
+            category_ids=[selected_category.id]
+        )
         
-        for i in range(12):
-            month = ((now.month - i - 1) % 12) + 1
-            year = now.year - ((i + 12 - now.month) // 12)
-            
-            total = db.session.query(
-                func.sum(Expense.amount)
-            ).filter(
-                Expense.user_id == current_user.id,
-                Expense.category_id == selected_category.id,
-                extract('year', Expense.date) == year,
-                extract('month', Expense.date) == month
-            ).scalar() or Decimal('0')
-            
-            monthly_data.append({
+        # Get monthly spending for selected category
+        monthly_data = [
+            {
                 'year': year,
                 'month': month,
-                'total': total
-            })
+                'total': matrix.get(selected_category.id, year, month)
+            }
+            for year, month in reversed(months)
+        ]
         
         # Calculate statistics
         totals = [d['total'] for d in monthly_data]
@@ -216,7 +167,7 @@ def category_trends():
             'average': avg_spending,
             'maximum': max_spending,
             'minimum': min_spending,
-            'current': selected_category.current_month_spending,
+            'current': matrix.get(selected_category.id, now.year, now.month),
             'budget': selected_category.budget_amount
         }
     else:
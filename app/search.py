@@ -0,0 +1,103 @@
+"""Full-text search over expense descriptions and notes.
+
+On SQLite the text columns are indexed by an external-content FTS5 table,
+``expenses_fts``, whose rowids are expense ids. Triggers keep it in sync
+on insert, update and delete, so ORM writes, bulk imports and raw SQL all
+stay searchable without any application-side bookkeeping. Other
+databases fall back to case-insensitive ``LIKE`` matching.
+"""
+import re
+from sqlalchemy import DDL, and_, column, event, or_, table
+
+from . import db
+from .models import Expense
+
+FTS_TABLE = 'expenses_fts'
+
+# Prefix indexes keep "ube*"-style lookups as fast as whole-word matches
+FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS expenses_fts USING fts5("
+    "description, receipt_note, content='expenses', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    "CREATE TRIGGER IF NOT EXISTS expenses_fts_ai AFTER INSERT ON expenses "
+    "BEGIN "
+    "INSERT INTO expenses_fts(rowid, description, receipt_note) "
+    "VALUES (new.id, new.description, new.receipt_note); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS expenses_fts_ad AFTER DELETE ON expenses "
+    "BEGIN "
+    "INSERT INTO expenses_fts(expenses_fts, rowid, description, receipt_note) "
+    "VALUES ('delete', old.id, old.description, old.receipt_note); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS expenses_fts_au "
+    "AFTER UPDATE OF description, receipt_note ON expenses "
+    "BEGIN "
+    "INSERT INTO expenses_fts(expenses_fts, rowid, description, receipt_note) "
+    "VALUES ('delete', old.id, old.description, old.receipt_note); "
+    "INSERT INTO expenses_fts(rowid, description, receipt_note) "
+    "VALUES (new.id, new.description, new.receipt_note); "
+    "END",
+]
+
+# Search results are ranked rather than paged; refine the terms to narrow
+SEARCH_RESULT_LIMIT = 100
+
+_TERM_RE = re.compile(r'\w+', re.UNICODE)
+
+_fts = table(FTS_TABLE, column('rowid'), column('rank'), column(FTS_TABLE))
+
+for statement in FTS_DDL:
+    event.listen(Expense.__table__, 'after_create',
+                 DDL(statement).execute_if(dialect='sqlite'))
+event.listen(Expense.__table__, 'before_drop',
+             DDL(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+             .execute_if(dialect='sqlite'))
+
+def search_terms(text):
+    """Split free text into search terms, dropping punctuation."""
+    return _TERM_RE.findall(text or '')
+
+def match_expression(terms):
+    """Build an FTS5 query matching rows that contain every term.
+
+    Each term is quoted so user input cannot inject FTS operators, and
+    prefix-matched so partial words still find results.
+    """
+    return ' '.join(f'"{term}"*' for term in terms)
+
+def apply_search(query, text):
+    """Restrict an expense query to rows matching ``text``, best first.
+
+    Args:
+        query (Query): Query selecting ``Expense`` rows
+        text (str): Free-text search entered by the user
+
+    Returns:
+        Query: Filtered query ordered by relevance (most recent first on
+        databases without FTS5)
+    """
+    terms = search_terms(text)
+    if not terms:
+        return query
+
+    if db.engine.dialect.name == 'sqlite':
+        return query.join(
+            _fts, _fts.c.rowid == Expense.id
+        ).filter(
+            _fts.c[FTS_TABLE].match(match_expression(terms))
+        ).order_by(
+            _fts.c.rank, Expense.id.desc()
+        )
+
+    return query.filter(and_(*(
+        or_(Expense.description.ilike(f'%{term}%'),
+            Expense.receipt_note.ilike(f'%{term}%'))
+        for term in terms
+    ))).order_by(Expense.date.desc(), Expense.id.desc())
+
+def rebuild():
+    """Rebuild the full-text index from the expenses table."""
+    db.session.execute(db.text(
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"
+    ))
+    db.session.commit()
@@ -0,0 +1,314 @@
+"""Deterministic synthetic data for benchmarking.
+
+Generates users with categories, expenses, monthly budgets and budget
+alerts that loosely follow real spending: frequent small grocery and
+transport purchases, weekend-heavy dining and entertainment, fixed
+monthly bills and rent, and per-user income scaling. The same seed,
+sizes and end date always produce the same rows.
+
+Expenses are inserted with executemany in chunks, each in its own
+transaction. Rollups and data versions are written explicitly alongside
+each chunk, because bulk inserts bypass the ORM flush hooks.
+"""
+import calendar
+import math
+import random
+from datetime import date, datetime, time
+from decimal import Decimal
+
+from . import alerts, db, rollups
+from .cache import bump_data_version
+from .models import Budget, BudgetAlert, Category, Expense, User
+from .passwords import password_hasher
+from .periods import recent_months
+
+SEED_CHUNK_SIZE = 20000
+
+class CategoryProfile:
+    """How one kind of spending is distributed."""
+
+    def __init__(self, name, icon, color, budget, threshold, per_month,
+                 median, spread, descriptions, weekend_weight=1.0,
+                 recurring_day=None):
+        self.name = name
+        self.icon = icon
+        self.color = color
+        self.budget = Decimal(budget)
+        self.threshold = threshold
+        self.per_month = per_month
+        self.median = median
+        self.spread = spread
+        self.descriptions = descriptions
+        self.weekend_weight = weekend_weight
+        self.recurring_day = recurring_day
+
+PROFILES = [
+    CategoryProfile('Groceries', 'fa-shopping-basket', '#10b981', '600.00',
+                    80, 12, 35, 0.6,
+                    ['Weekly groceries', 'Fruits and vegetables',
+                     'Pantry restocking', 'Snacks and drinks',
+                     'Meat and dairy'],
+                    weekend_weight=1.6),
+    CategoryProfile('Dining Out', 'fa-utensils', '#f59e0b', '300.00', 75, 8,
+                    22, 0.7,
+                    ['Lunch with colleagues', 'Pizza night',
+                     'Coffee and pastries', 'Restaurant dinner', 'Fast food'],
+                    weekend_weight=2.5),
+    CategoryProfile('Transport', 'fa-car', '#3b82f6', '200.00', 80, 10, 12,
+                    0.8,
+                    ['Gas refill', 'Bus pass', 'Uber ride', 'Train ticket',
+                     'Car maintenance'],
+                    weekend_weight=0.6),
+    CategoryProfile('Entertainment', 'fa-film', '#8b5cf6', '150.00', 70, 3,
+                    25, 0.6,
+                    ['Movie tickets', 'Concert tickets', 'Game purchase',
+                     'Streaming service'],
+                    weekend_weight=3.0),
+    CategoryProfile('Bills & Utilities', 'fa-file-invoice-dollar', '#ef4444',
+                    '800.00', 90, 4, 120, 0.3,
+                    ['Electricity bill', 'Water bill', 'Internet service',
+                     'Phone bill', 'Gas bill'],
+                    recurring_day=5),
+    CategoryProfile('Shopping', 'fa-shopping-bag', '#ec4899', '200.00', 75,
+                    3, 45, 0.9,
+                    ['New clothes', 'Electronics', 'Home supplies', 'Books',
+                     'Office supplies'],
+                    weekend_weight=2.0),
+    CategoryProfile('Healthcare', 'fa-hospital', '#06b6d4', '150.00', 85, 1,
+                    40, 0.8,
+                    ['Pharmacy', 'Doctor visit', 'Medicine',
+                     'Dental checkup']),
+    CategoryProfile('Home', 'fa-home', '#f97316', '1000.00', 80, 1, 950,
+                    0.05, ['Rent payment'], recurring_day=1),
+]
+
+PAYMENT_METHODS = ['cash', 'credit_card', 'debit_card', 'bank_transfer']
+PAYMENT_WEIGHTS = [2, 4, 5, 1]
+
+class SeedResult:
+    """Row counts written by a seed run."""
+
+    def __init__(self):
+        self.users = 0
+        self.categories = 0
+        self.expenses = 0
+        self.budgets = 0
+        self.alerts = 0
+
+    def as_dict(self):
+        return {
+            'users': self.users,
+            'categories': self.categories,
+            'expenses': self.expenses,
+            'budgets': self.budgets,
+            'alerts': self.alerts
+        }
+
+def _profile(index):
+    """Category profile for the index-th category of a user."""
+    profile = PROFILES[index % len(PROFILES)]
+    if index < len(PROFILES):
+        return profile, profile.name
+    return profile, f'{profile.name} {index // len(PROFILES) + 1}'
+
+def _count(rng, mean):
+    """Draw an approximately Poisson-distributed count."""
+    if mean < 10:
+        # Knuth's method is exact and cheap for small means
+        limit, count, product = math.exp(-mean), 0, rng.random()
+        while product > limit:
+            count += 1
+            product *= rng.random()
+        return count
+    return max(0, round(rng.gauss(mean, math.sqrt(mean))))
+
+class _ExpenseWriter:
+    """Buffers expense rows and writes them with their rollup deltas."""
+
+    def __init__(self, chunk_size, result, progress):
+        self.chunk_size = chunk_size
+        self.result = result
+        self.progress = progress
+        self.rows = []
+        self.deltas = {}
+        self.user_ids = set()
+
+    def add_month(self, user_id, category_id, year, month, rows):
+        self.rows.extend(rows)
+        total = sum((row['amount'] for row in rows), Decimal('0'))
+        rollups.add_delta(self.deltas, user_id, category_id,
+                          date(year, month, 1), total, len(rows))
+        self.user_ids.add(user_id)
+        if len(self.rows) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        if self.rows:
+            # Core insert skips the ORM's per-row bookkeeping
+            db.session.execute(Expense.__table__.insert(), self.rows)
+            rollups.apply_deltas(self.deltas)
+            bump_data_version(db.session.connection(), self.user_ids)
+        db.session.commit()
+        self.result.expenses += len(self.rows)
+        self.rows, self.deltas, self.user_ids = [], {}, set()
+        if self.progress:
+            self.progress(self.result)
+
+def _month_expenses(rng, profile, user_id, category_id, scale, year, month,
+                    days, weekends):
+    """Generate one category's expenses for one month."""
+    weights = [
+        profile.weekend_weight if weekend else 1.0 for weekend in weekends
+    ]
+    rows = []
+
+    if profile.recurring_day:
+        day = min(profile.recurring_day, days[-1])
+        count = max(1, _count(rng, profile.per_month)) \
+            if len(profile.descriptions) > 1 else 1
+        descriptions = rng.sample(profile.descriptions,
+                                  min(count, len(profile.descriptions)))
+        for description in descriptions:
+            rows.append((day, description, True))
+    else:
+        count = _count(rng, profile.per_month)
+        for day in rng.choices(days, weights=weights, k=count):
+            rows.append((day, rng.choice(profile.descriptions), False))
+
+    mu = math.log(profile.median * scale)
+    return [
+        {
+            'user_id': user_id,
+            'category_id': category_id,
+            'amount': max(
+                Decimal('0.50'),
+                Decimal(str(round(rng.lognormvariate(mu, profile.spread), 2)))
+            ),
+            'description': description,
+            'date': date(year, month, day),
+            'payment_method': 'bank_transfer' if recurring else rng.choices(
+                PAYMENT_METHODS, weights=PAYMENT_WEIGHTS
+            )[0],
+            'is_recurring': recurring,
+            'recurrence_frequency': 'monthly' if recurring else None,
+            'receipt_note': None
+        }
+        for day, description, recurring in rows
+    ]
+
+def _alerts(user_id, category_id, name, spent, budget, threshold, year,
+            month, is_current):
+    """Build the alerts a month's spending would have raised."""
+    day = min(28, calendar.monthrange(year, month)[1])
+    return [
+        {
+            'user_id': user_id,
+            'category_id': category_id,
+            'alert_type': level,
+            'message': alerts.alert_message(level, name, spent, budget),
+            'year': year,
+            'month': month,
+            'is_read': not is_current,
+            'created_at': datetime.combine(date(year, month, day), time(9))
+        }
+        for level in alerts.levels_reached(spent, budget, threshold)
+    ]
+
+def seed(users=10, categories=8, years=2, seed=42, end=None,
+         chunk_size=SEED_CHUNK_SIZE, prefix='seed', password='password123',
+         progress=None):
+    """Generate and bulk insert a synthetic dataset.
+
+    Args:
+        users (int): Number of users to create
+        categories (int): Categories per user
+        years (int): Years of history per user, ending at ``end``
+        seed (int): Random seed; equal arguments give identical data
+        end (date, optional): Last month to generate, defaults to today
+        chunk_size (int): Expense rows per insert transaction
+        prefix (str): Username prefix, e.g. ``seed_00001``
+        password (str): Password shared by all generated users
+        progress (callable, optional): Called as ``progress(result)``
+            after every committed chunk
+
+    Returns:
+        SeedResult: Number of rows written per table
+
+    Raises:
+        ValueError: If users with the prefix already exist
+    """
+    rng = random.Random(seed)
+    end = end or date.today()
+    months = recent_months(years * 12, end)
+    result = SeedResult()
+
+    if User.query.filter(User.username.like(f'{prefix}\\_%',
+                                            escape='\\')).first():
+        raise ValueError(f'Users with prefix "{prefix}" already exist')
+
+    # Hashing is deliberately slow, so hash once and share it
+    password_hash = password_hasher.hash(password)
+    writer = _ExpenseWriter(chunk_size, result, progress)
+
+    for number in range(1, users + 1):
+        scale = rng.lognormvariate(0, 0.35)
+        user = User(
+            username=f'{prefix}_{number:05d}',
+            email=f'{prefix}_{number:05d}@example.com',
+            password_hash=password_hash,
+            monthly_income=Decimal(str(round(5000 * scale, 2))),
+            total_budget=Decimal(str(round(4000 * scale, 2)))
+        )
+        owned = []
+        for index in range(categories):
+            profile, name = _profile(index)
+            owned.append((profile, Category(
+                user=user,
+                name=name,
+                icon=profile.icon,
+                color=profile.color,
+                budget_amount=(profile.budget * Decimal(str(round(scale, 2))))
+                .quantize(Decimal('0.01')),
+                alert_threshold=profile.threshold
+            )))
+        db.session.add(user)
+        db.session.add_all(category for _, category in owned)
+        db.session.flush()
+        result.users += 1
+        result.categories += len(owned)
+
+        budgets, raised = [], []
+        for year, month in months:
+            last_day = calendar.monthrange(year, month)[1]
+            if (year, month) == (end.year, end.month):
+                last_day = end.day
+            days = range(1, last_day + 1)
+            weekends = [date(year, month, day).weekday() >= 5 for day in days]
+            for profile, category in owned:
+                rows = _month_expenses(rng, profile, user.id, category.id,
+                                       scale, year, month, days, weekends)
+                if rows:
+                    writer.add_month(user.id, category.id, year, month, rows)
+
+                budgets.append({
+                    'user_id': user.id,
+                    'category_id': category.id,
+                    'amount': category.budget_amount,
+                    'year': year,
+                    'month': month
+                })
+                raised.extend(_alerts(
+                    user.id, category.id, category.name,
+                    sum((row['amount'] for row in rows), Decimal('0')),
+                    category.budget_amount, profile.threshold, year, month,
+                    (year, month) == (end.year, end.month)
+                ))
+
+        db.session.execute(Budget.__table__.insert(), budgets)
+        if raised:
+            db.session.execute(BudgetAlert.__table__.insert(), raised)
+        result.budgets += len(budgets)
+        result.alerts += len(raised)
+
+    writer.flush()
+    return result
@@ -0,0 +1,143 @@
+"""Cached identity for the Flask-Login user loader.
+
+Flask-Login reloads the logged-in user on every request. With this
+cache the loader rebuilds the ``User`` from cached column values and
+attaches it to the session with ``merge(load=False)``, so an
+authenticated request does not spend a query on its own user row.
+
+Entries expire after ``USER_CACHE_TTL`` seconds and are dropped as soon
+as a transaction that bumped the user's ``data_version`` commits. Every
+write to the user row, or to data shown on the user's pages, bumps the
+version (see :mod:`app.cache`). The version also keys the view and
+fragment caches and the conditional GET validators, so a stale identity
+would serve stale pages, or a 304, right after a write; the TTL bounds
+how long that can last when an invalidation is missed.
+
+Backends are those of the view cache, selected by
+``USER_CACHE_BACKEND``:
+
+    filesystem: The default. Shared by every process on the host, so
+        invalidations from any web worker or the job worker reach all
+        of them
+    memory: Bounded in-process LRU; writes from other processes are only
+        seen after the TTL, so use it only when a single process writes
+    null: Caching disabled; use it when web processes span several hosts
+
+``password_hash`` is never cached; it loads on demand the few times it
+is needed.
+"""
+import hashlib
+import threading
+import time
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from . import db
+from .cache import BUMPED_USERS, CacheStats, create_backend
+from .models import User
+
+# Columns kept in the cache; password_hash loads lazily when needed
+CACHED_COLUMNS = tuple(
+    column.key for column in User.__table__.columns
+    if column.key != 'password_hash'
+)
+
+# Users bumped by transactions committing on this thread
+_committed = threading.local()
+
+class UserCache:
+    """Flask extension caching user rows for the login loader."""
+
+    def init_app(self, app):
+        namespace = hashlib.sha256(
+            app.config['SQLALCHEMY_DATABASE_URI'].encode('utf-8')
+        ).hexdigest()[:12]
+        app.extensions['user_cache'] = {
+            'backend': create_backend(app.config, prefix='USER_CACHE'),
+            'stats': CacheStats(),
+            'namespace': namespace,
+            'ttl': app.config.get('USER_CACHE_TTL', 60)
+        }
+
+    @property
+    def _state(self):
+        return current_app.extensions['user_cache']
+
+    def _key(self, state, user_id):
+        return ('user', state['namespace'], user_id)
+
+    def load(self, user_id):
+        """Return the user attached to the session, from cache if possible.
+
+        Args:
+            user_id (int): Id of the user to load
+
+        Returns:
+            User: Persistent instance, or None if the user does not exist
+        """
+        state = self._state
+        key = self._key(state, user_id)
+        entry = state['backend'].get(key)
+        if entry is not None and entry[0] > time.time():
+            state['stats'].record(hit=True)
+            user = User(**entry[1])
+            make_transient_to_detached(user)
+            return db.session.merge(user, load=False)
+
+        state['stats'].record(hit=False)
+        user = db.session.get(User, user_id)
+        if user is not None:
+            self.store(user)
+        return user
+
+    def store(self, user):
+        """Cache a user's current column values."""
+        state = self._state
+        values = {name: getattr(user, name) for name in CACHED_COLUMNS}
+        state['backend'].set(
+            self._key(state, user.id),
+            # Wall-clock expiry, comparable across processes and restarts
+            (time.time() + state['ttl'], values)
+        )
+
+    def invalidate(self, user_ids):
+        """Drop cached users, e.g. after their row or data changed."""
+        state = current_app.extensions.get('user_cache')
+        if state is None:
+            return
+        for user_id in user_ids:
+            state['backend'].delete(self._key(state, user_id))
+
+    def stats(self):
+        """Hit/miss counters and current size for this process."""
+        state = self._state
+        stats = state['stats'].as_dict()
+        stats['entries'] = len(state['backend'])
+        stats['backend'] = type(state['backend']).__name__
+        return stats
+
+user_cache = UserCache()
+
+@event.listens_for(Engine, 'commit')
+def _collect_bumped(connection):
+    """Hold on to users bumped in a committing transaction."""
+    bumped = connection.info.pop(BUMPED_USERS, None)
+    if bumped:
+        pending = getattr(_committed, 'user_ids', None)
+        if pending is None:
+            pending = _committed.user_ids = set()
+        pending.update(bumped)
+
+@event.listens_for(Engine, 'rollback')
+def _discard_bumped(connection):
+    connection.info.pop(BUMPED_USERS, None)
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_committed(session):
+    """Drop bumped users once their transaction has committed."""
+    user_ids = getattr(_committed, 'user_ids', None)
+    if user_ids:
+        _committed.user_ids = None
+        user_cache.invalidate(user_ids)
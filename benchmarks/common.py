@@ -0,0 +1,142 @@
+"""Shared setup for the benchmark and load-test scripts.
+
+Datasets are generated with :mod:`app.seed` into SQLite files under
+``benchmarks/.data`` and reused until the size definition, the end date
+or the schema changes, so repeated runs skip the seeding cost.
+"""
+import hashlib
+import math
+import os
+from datetime import date
+
+from app import create_app, db
+from config import ProductionConfig, TestingConfig, config
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.data')
+
+# Seeder arguments per named dataset size
+SIZES = {
+    'small': {'users': 5, 'categories': 8, 'years': 2},
+    'medium': {'users': 20, 'categories': 12, 'years': 5},
+    'large': {'users': 50, 'categories': 16, 'years': 10},
+}
+
+SEED = 42
+
+# Every generated user shares this password
+PASSWORD = 'password123'
+
+# The user whose pages are measured
+BENCH_USER = 'seed_00001'
+
+def schema_fingerprint():
+    """Short hash of the model tables and columns."""
+    from app import models  # noqa: F401 - registers the tables
+    text = ';'.join(
+        f'{table.name}:' + ','.join(column.name for column in table.columns)
+        for table in sorted(db.metadata.tables.values(), key=str)
+    )
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()[:8]
+
+def database_path(size, end):
+    """Path of the SQLite file holding a seeded dataset."""
+    spec = SIZES[size]
+    name = (f'{size}-u{spec["users"]}-c{spec["categories"]}'
+            f'-y{spec["years"]}-s{SEED}-{end:%Y%m%d}'
+            f'-{schema_fingerprint()}.db')
+    return os.path.join(DATA_DIR, name)
+
+# SQLite connection settings to benchmark with; 'baseline' is SQLite's
+# own defaults (rollback journal, full sync) for before/after comparisons
+PROFILES = {
+    'production': {
+        'SQLITE_PRAGMAS': ProductionConfig.SQLITE_PRAGMAS,
+        'SQLALCHEMY_ENGINE_OPTIONS': ProductionConfig.SQLALCHEMY_ENGINE_OPTIONS,
+    },
+    'baseline': {
+        'SQLITE_PRAGMAS': {'journal_mode': 'DELETE'},
+        'SQLALCHEMY_ENGINE_OPTIONS': {},
+    },
+}
+
+def make_app(database_uri, cache=False, profile='production', **overrides):
+    """Create an application bound to a specific database.
+
+    Args:
+        database_uri (str): SQLAlchemy URI of the dataset
+        cache (bool): Keep the view and fragment caches enabled; when off
+            every request recomputes its aggregates and re-renders its
+            templates, which is what regressions hide in
+        profile (str): SQLite tuning profile from :data:`PROFILES`
+        **overrides: Extra config values
+
+    Returns:
+        Flask: Application configured like the test suite (no CSRF)
+    """
+    attrs = {
+        'SQLALCHEMY_DATABASE_URI': database_uri,
+        'VIEW_CACHE_BACKEND': 'memory' if cache else 'null',
+        'FRAGMENT_CACHE_BACKEND': 'memory' if cache else 'null',
+        'INSTRUMENTATION_ENABLED': False,
+    }
+    attrs.update(PROFILES[profile])
+    attrs.update(overrides)
+    config['benchmark'] = type('BenchmarkConfig', (TestingConfig,), attrs)
+    return create_app('benchmark')
+
+def seeded_database(size, end=None, reseed=False, log=print):
+    """Return the URI of a seeded dataset, generating it if needed."""
+    from app import seed
+
+    end = end or date.today()
+    path = database_path(size, end)
+    if reseed and os.path.exists(path):
+        os.remove(path)
+    uri = 'sqlite:///' + path
+    if os.path.exists(path):
+        return uri
+
+    os.makedirs(DATA_DIR, exist_ok=True)
+    app = make_app(uri)
+    with app.app_context():
+        db.create_all()
+        log(f'Seeding {size} dataset into {path} ...')
+        result = seed.seed(seed=SEED, end=end, password=PASSWORD,
+                           **SIZES[size])
+        log('  ' + ', '.join(
+            f'{count} {table}' for table, count in result.as_dict().items()
+        ))
+        # Close pooled connections so the WAL is checkpointed into the file
+        db.engine.dispose()
+    return uri
+
+def login(client, username=BENCH_USER, password=PASSWORD):
+    """Log a test client in, failing loudly if credentials are rejected."""
+    response = client.post('/auth/login', data={
+        'username': username,
+        'password': password
+    })
+    if response.status_code != 302:
+        raise RuntimeError(f'Login failed for {username}')
+
+def percentile(samples, fraction):
+    """Nearest-rank percentile of a list of numbers."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(fraction * len(ordered)))
+    return ordered[rank - 1]
+
+def summarize(samples):
+    """Latency summary in milliseconds for a list of seconds."""
+    millis = [sample * 1000 for sample in samples]
+    return {
+        'count': len(millis),
+        'mean_ms': round(sum(millis) / len(millis), 3) if millis else 0.0,
+        'min_ms': round(min(millis), 3) if millis else 0.0,
+        'p50_ms': round(percentile(millis, 0.50), 3),
+        'p90_ms': round(percentile(millis, 0.90), 3),
+        'p95_ms': round(percentile(millis, 0.95), 3),
+        'p99_ms': round(percentile(millis, 0.99), 3),
+        'max_ms': round(max(millis), 3) if millis else 0.0,
+    }
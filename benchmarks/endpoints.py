@@ -0,0 +1,271 @@
+"""Endpoint latency benchmarks with regression checks.
+
+Drives the main read endpoints through the Flask test client against
+seeded datasets and records latency percentiles, SQL statement counts,
+response size and peak traced memory per endpoint::
+
+    python -m benchmarks.endpoints run --sizes small,medium \\
+        --output benchmarks/results/latest.json
+    python -m benchmarks.endpoints compare baseline.json latest.json \\
+        --threshold 0.15
+
+``compare`` exits with status 1 when any endpoint's latency or memory
+grows by more than the threshold, or its query count grows at all.
+
+Latency is measured without tracemalloc; peak memory comes from a
+separate traced request so tracing overhead does not skew timings.
+"""
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+import sqlalchemy
+from sqlalchemy import event
+
+from app import db
+from app.models import Expense, User
+from app.pagination import NEXT, encode_cursor
+
+from .common import (
+    BENCH_USER, SIZES, login, make_app, seeded_database, summarize
+)
+
+# Where each endpoint's request goes; {deep_cursor} is filled in per dataset
+ENDPOINTS = {
+    'main.index': '/',
+    'expenses.index:first': '/expenses/expenses',
+    'expenses.index:deep': '/expenses/expenses?cursor={deep_cursor}',
+    'reports.index': '/reports/',
+    'reports.category_trends': '/reports/trends',
+    'reports.spending_history': '/reports/api/spending-history?months=24',
+    'reports.export_expenses': '/reports/export/expenses',
+}
+
+# Metrics compared against the baseline, relative growth allowed
+LATENCY_METRICS = ('p50_ms', 'p95_ms')
+MEMORY_METRIC = 'peak_kb'
+
+def _deep_cursor(user_id):
+    """Cursor positioned 90% of the way through the user's expenses."""
+    total = Expense.query.filter_by(user_id=user_id).count()
+    row = db.session.query(Expense.date, Expense.id).filter(
+        Expense.user_id == user_id
+    ).order_by(
+        Expense.date.desc(), Expense.id.desc()
+    ).offset(max(0, int(total * 0.9) - 1)).first()
+    return encode_cursor(row.date, row.id, NEXT) if row else ''
+
+def _request(client, url):
+    """Issue a GET and drain the (possibly streamed) body."""
+    response = client.get(url)
+    size = len(response.get_data())
+    if response.status_code != 200:
+        raise RuntimeError(f'{url} returned {response.status_code}')
+    return size
+
+def bench_endpoint(app, client, url, iterations, warmup):
+    """Measure one endpoint.
+
+    Returns:
+        dict: Latency summary plus ``queries``, ``bytes`` and ``peak_kb``
+    """
+    for _ in range(warmup):
+        _request(client, url)
+
+    statements = []
+
+    def count(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', count)
+    try:
+        size = _request(client, url)
+    finally:
+        event.remove(engine, 'before_cursor_execute', count)
+
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        _request(client, url)
+        samples.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    try:
+        _request(client, url)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    result = summarize(samples)
+    result.update({
+        'queries': len(statements),
+        'bytes': size,
+        'peak_kb': round(peak / 1024, 1)
+    })
+    return result
+
+def _git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run(sizes, iterations, warmup, cache, reseed, endpoints,
+        user_cache=True):
+    """Benchmark every endpoint against every dataset size."""
+    results = {}
+    for size in sizes:
+        uri = seeded_database(size, reseed=reseed)
+        app = make_app(uri, cache=cache, USER_CACHE_BACKEND=(
+            'memory' if user_cache else 'null'
+        ))
+        client = app.test_client()
+        login(client)
+
+        with app.app_context():
+            user = User.query.filter_by(username=BENCH_USER).one()
+            deep_cursor = _deep_cursor(user.id)
+            expenses = Expense.query.filter_by(user_id=user.id).count()
+
+        results[size] = {'user_expenses': expenses, 'endpoints': {}}
+        for name in endpoints:
+            url = ENDPOINTS[name].format(deep_cursor=deep_cursor)
+            stats = bench_endpoint(app, client, url, iterations, warmup)
+            results[size]['endpoints'][name] = stats
+            print(f'{size:>7} {name:<28} p50 {stats["p50_ms"]:>9.2f} ms  '
+                  f'p95 {stats["p95_ms"]:>9.2f} ms  '
+                  f'{stats["queries"]:>3} queries  '
+                  f'{stats["peak_kb"]:>9.1f} KiB')
+
+    return {
+        'meta': {
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'sqlalchemy': sqlalchemy.__version__,
+            'sqlite': sqlite3.sqlite_version,
+            'iterations': iterations,
+            'warmup': warmup,
+            'view_cache': cache,
+            'user_cache': user_cache,
+        },
+        'sizes': {size: SIZES[size] for size in sizes},
+        'results': results
+    }
+
+def compare(baseline, current, threshold):
+    """List regressions of ``current`` against ``baseline``.
+
+    Args:
+        baseline (dict): Results file contents to compare against
+        current (dict): New results file contents
+        threshold (float): Allowed relative growth, e.g. 0.15 for 15%
+
+    Returns:
+        list: Human-readable regression descriptions
+    """
+    regressions = []
+    for size, data in current['results'].items():
+        base_size = baseline['results'].get(size)
+        if not base_size:
+            continue
+        for name, stats in data['endpoints'].items():
+            base = base_size['endpoints'].get(name)
+            if not base:
+                continue
+            for metric in LATENCY_METRICS + (MEMORY_METRIC,):
+                old, new = base[metric], stats[metric]
+                if old and new > old * (1 + threshold):
+                    regressions.append(
+                        f'{size} {name} {metric}: {old} -> {new} '
+                        f'(+{(new / old - 1) * 100:.0f}%)'
+                    )
+            if stats['queries'] > base['queries']:
+                regressions.append(
+                    f'{size} {name} queries: {base["queries"]} -> '
+                    f'{stats["queries"]}'
+                )
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='Run the benchmarks.')
+    run_parser.add_argument('--sizes', default='small',
+                            help='Comma-separated dataset sizes: '
+                                 + ', '.join(SIZES))
+    run_parser.add_argument('--endpoints', default=','.join(ENDPOINTS),
+                            help='Comma-separated endpoint names.')
+    run_parser.add_argument('--iterations', type=int, default=30)
+    run_parser.add_argument('--warmup', type=int, default=3)
+    run_parser.add_argument('--with-cache', action='store_true',
+                            help='Keep the view cache on (measures hits).')
+    run_parser.add_argument('--without-user-cache', action='store_true',
+                            help='Load the logged-in user from the database '
+                                 'on every request.')
+    run_parser.add_argument('--reseed', action='store_true',
+                            help='Regenerate the datasets.')
+    run_parser.add_argument('--output', default=os.path.join(
+        'benchmarks', 'results', 'latest.json'))
+    run_parser.add_argument('--baseline',
+                            help='Compare against this results file.')
+    run_parser.add_argument('--threshold', type=float, default=0.15)
+
+    compare_parser = commands.add_parser(
+        'compare', help='Compare two results files.'
+    )
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=0.15,
+                                help='Allowed relative growth (0.15 = 15%%).')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        sizes = [size.strip() for size in args.sizes.split(',') if size]
+        endpoints = [name.strip() for name in args.endpoints.split(',')]
+        unknown = [s for s in sizes if s not in SIZES] + \
+            [e for e in endpoints if e not in ENDPOINTS]
+        if unknown:
+            parser.error('unknown size or endpoint: ' + ', '.join(unknown))
+
+        current = run(sizes, args.iterations, args.warmup, args.with_cache,
+                      args.reseed, endpoints,
+                      user_cache=not args.without_user_cache)
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)),
+                    exist_ok=True)
+        with open(args.output, 'w') as handle:
+            json.dump(current, handle, indent=2)
+        print(f'Wrote {args.output}')
+        if not args.baseline:
+            return 0
+        with open(args.baseline) as handle:
+            baseline = json.load(handle)
+    else:
+        with open(args.baseline) as handle:
+            baseline = json.load(handle)
+        with open(args.current) as handle:
+            current = json.load(handle)
+
+    regressions = compare(baseline, current, args.threshold)
+    for regression in regressions:
+        print(f'REGRESSION {regression}')
+    if not regressions:
+        print(f'No regressions beyond {args.threshold:.0%}.')
+    return 1 if regressions else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
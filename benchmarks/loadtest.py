@@ -0,0 +1,352 @@
+"""Concurrent load test against a real WSGI server.
+
+Starts the app under Werkzeug's threaded WSGI server in a subprocess,
+on a private copy of a seeded dataset, then drives it with simulated
+logged-in users at increasing concurrency::
+
+    python -m benchmarks.loadtest --size small --concurrency 1,4,16 \\
+        --duration 15 --mix quick_add=3,dashboard=4,reports=2,export=1
+
+``--profile baseline`` runs the server with SQLite's default rollback
+journal instead of the production WAL profile, for before/after
+comparisons of the connection tuning in :mod:`app.database`.
+
+Each level gets a fresh server. Reported per level: throughput, p50/p95/
+p99 latency overall and per operation, HTTP error rate, unhandled
+server exceptions and how many statements failed with SQLite's
+"database is locked" error. Lock errors in ``quick_add`` are caught by
+the view and only flashed, so the server counts them itself, from an
+engine error hook, and reports them at ``ERRORS_PATH`` before it is
+stopped.
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import shutil
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date
+from urllib.parse import urlencode
+
+from .common import (
+    PASSWORD, PROFILES, SIZES, make_app, seeded_database, summarize
+)
+
+# Operation -> (method, path); quick_add bodies are built per request
+OPERATIONS = {
+    'quick_add': ('POST', '/expenses/expenses/quick-add'),
+    'dashboard': ('GET', '/'),
+    'reports': ('GET', '/reports/'),
+    'export': ('GET', '/reports/export/expenses'),
+}
+
+DEFAULT_MIX = 'quick_add=3,dashboard=4,reports=2,export=1'
+
+LOCKED_MARKER = 'database is locked'
+
+# Served by the child process only, with its error counters
+ERRORS_PATH = '/_loadtest/errors'
+
+def parse_mix(text):
+    """Parse ``op=weight,...`` into a {operation: weight} dict."""
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise ValueError(f'Unknown operation: {name}')
+        mix[name] = float(weight or 1)
+    return mix
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+class Server:
+    """The app running under Werkzeug in a child process."""
+
+    def __init__(self, database_path, port, profile):
+        self.port = port
+        self.locked = 0
+        self.exceptions = 0
+        # Views print caught database errors; tracebacks stay on stderr
+        self.process = subprocess.Popen(
+            [sys.executable, '-m', 'benchmarks.loadtest', 'serve',
+             '--database', database_path, '--port', str(port),
+             '--profile', profile],
+            stdout=subprocess.DEVNULL,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        )
+        self._wait_until_ready()
+
+    def collect_errors(self):
+        """Fetch the server's lock error and exception counters."""
+        connection = http.client.HTTPConnection('127.0.0.1', self.port,
+                                                timeout=60)
+        try:
+            connection.request('GET', ERRORS_PATH)
+            counts = json.loads(connection.getresponse().read())
+        finally:
+            connection.close()
+        self.locked = counts['locked']
+        self.exceptions = counts['exceptions']
+
+    def _wait_until_ready(self, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError('Server exited during startup')
+            try:
+                socket.create_connection(('127.0.0.1', self.port), 0.2).close()
+                return
+            except OSError:
+                time.sleep(0.1)
+        raise RuntimeError('Server did not start listening')
+
+    def stop(self):
+        self.process.terminate()
+        self.process.wait(10)
+
+class SimulatedUser(threading.Thread):
+    """Logs in once, then issues weighted random operations."""
+
+    def __init__(self, port, username, category_ids, mix, seed):
+        super().__init__(daemon=True)
+        self.port = port
+        self.username = username
+        self.category_ids = category_ids
+        self.operations = list(mix)
+        self.weights = [mix[name] for name in self.operations]
+        self.stop_at = 0
+        self.rng = random.Random(seed)
+        self.cookie = None
+        # (operation, seconds, status or None on connection failure)
+        self.samples = []
+
+    def _send(self, method, path, body=None):
+        connection = http.client.HTTPConnection('127.0.0.1', self.port,
+                                                timeout=60)
+        headers = {}
+        if body is not None:
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        if self.cookie:
+            headers['Cookie'] = self.cookie
+        try:
+            connection.request(method, path, body=body, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            return response
+        finally:
+            connection.close()
+
+    def login(self):
+        response = self._send('POST', '/auth/login', urlencode({
+            'username': self.username, 'password': PASSWORD
+        }))
+        cookie = response.getheader('Set-Cookie')
+        if response.status != 302 or not cookie or \
+                'login' in (response.getheader('Location') or ''):
+            raise RuntimeError(f'Login failed for {self.username}')
+        self.cookie = cookie.split(';', 1)[0]
+
+    def _body(self, operation):
+        if operation != 'quick_add':
+            return None
+        return urlencode({
+            'category_id': self.rng.choice(self.category_ids),
+            'amount': f'{self.rng.uniform(1, 80):.2f}',
+            'description': 'Load test purchase',
+            'date': date.today().isoformat(),
+            'payment_method': 'cash'
+        })
+
+    def run(self):
+        while time.monotonic() < self.stop_at:
+            operation = self.rng.choices(self.operations, self.weights)[0]
+            method, path = OPERATIONS[operation]
+            started = time.perf_counter()
+            try:
+                status = self._send(method, path,
+                                    self._body(operation)).status
+            except (OSError, http.client.HTTPException):
+                status = None
+            self.samples.append(
+                (operation, time.perf_counter() - started, status)
+            )
+
+def _copy_database(source, target):
+    """Copy a database through SQLite, including pages still in its WAL."""
+    with sqlite3.connect(source) as src, sqlite3.connect(target) as dst:
+        src.backup(dst)
+
+def _users_and_categories(database_path):
+    """Seeded usernames with their active category ids."""
+    with sqlite3.connect(database_path) as connection:
+        rows = connection.execute(
+            'SELECT users.username, categories.id FROM users '
+            'JOIN categories ON categories.user_id = users.id '
+            'WHERE categories.is_active ORDER BY users.id, categories.id'
+        ).fetchall()
+    users = {}
+    for username, category_id in rows:
+        users.setdefault(username, []).append(category_id)
+    return list(users.items())
+
+def run_level(database_path, concurrency, duration, mix, profile):
+    """Run one concurrency level against a fresh server."""
+    server = Server(database_path, _free_port(), profile)
+    try:
+        accounts = _users_and_categories(database_path)
+        users = []
+        for index in range(concurrency):
+            username, category_ids = accounts[index % len(accounts)]
+            user = SimulatedUser(server.port, username, category_ids, mix,
+                                 seed=index)
+            user.login()
+            users.append(user)
+
+        # Logins hash passwords, so start the clock once all are in
+        started = time.monotonic()
+        for user in users:
+            user.stop_at = started + duration
+            user.start()
+        for user in users:
+            user.join()
+        elapsed = time.monotonic() - started
+        server.collect_errors()
+    finally:
+        server.stop()
+
+    samples = [sample for user in users for sample in user.samples]
+    errors = [s for s in samples if s[2] is None or s[2] >= 500]
+    by_operation = {}
+    for operation in mix:
+        own = [s for s in samples if s[0] == operation]
+        by_operation[operation] = dict(
+            summarize([s[1] for s in own]),
+            errors=sum(1 for s in own if s[2] is None or s[2] >= 500)
+        )
+
+    total = len(samples)
+    return {
+        'concurrency': concurrency,
+        'requests': total,
+        'seconds': round(elapsed, 2),
+        'throughput_rps': round(total / elapsed, 2) if elapsed else 0.0,
+        'latency': summarize([s[1] for s in samples]),
+        'error_rate': round(len(errors) / total, 4) if total else 0.0,
+        'locked_errors': server.locked,
+        'locked_rate': round(server.locked / total, 4) if total else 0.0,
+        'server_exceptions': server.exceptions,
+        'operations': by_operation
+    }
+
+def serve(database, port, profile):
+    """Serve the app on a dataset until terminated (child process)."""
+    from flask import got_request_exception, jsonify
+    from sqlalchemy import event
+    from werkzeug.serving import WSGIRequestHandler, make_server
+    from app import db
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+
+    # Deferred jobs run as they would in production, off request threads
+    app = make_app('sqlite:///' + database, cache=True, profile=profile,
+                   JOBS_MODE='thread')
+
+    counts = {'locked': 0, 'exceptions': 0}
+    counts_lock = threading.Lock()
+
+    def count(name):
+        with counts_lock:
+            counts[name] += 1
+
+    def on_database_error(context):
+        # Fires for caught errors too, e.g. quick_add's flashed failures
+        if LOCKED_MARKER in str(context.original_exception):
+            count('locked')
+
+    with app.app_context():
+        event.listen(db.engine, 'handle_error', on_database_error)
+    got_request_exception.connect(
+        lambda sender, **extra: count('exceptions'), app, weak=False
+    )
+    app.add_url_rule(ERRORS_PATH, 'loadtest_errors',
+                     lambda: jsonify(counts))
+
+    server = make_server('127.0.0.1', port, app, threaded=True,
+                         request_handler=QuietHandler)
+    server.serve_forever()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('command', nargs='?', default='run',
+                        choices=['run', 'serve'])
+    parser.add_argument('--size', default='small', choices=list(SIZES))
+    parser.add_argument('--concurrency', default='1,2,4,8,16',
+                        help='Comma-separated simulated user counts.')
+    parser.add_argument('--duration', type=float, default=10,
+                        help='Seconds per concurrency level.')
+    parser.add_argument('--mix', default=DEFAULT_MIX,
+                        help='Operation weights, e.g. ' + DEFAULT_MIX)
+    parser.add_argument('--profile', default='production',
+                        choices=list(PROFILES),
+                        help='SQLite connection tuning for the server.')
+    parser.add_argument('--output', help='Write results as JSON here.')
+    parser.add_argument('--database', help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.command == 'serve':
+        serve(args.database, args.port, args.profile)
+        return 0
+
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+    levels = [int(n) for n in args.concurrency.split(',') if n]
+
+    # Writes go to a scratch copy so the cached dataset stays pristine
+    source = seeded_database(args.size)[len('sqlite:///'):]
+    workdir = tempfile.mkdtemp(prefix='centsible-load-')
+    results = []
+    try:
+        for concurrency in levels:
+            database_path = os.path.join(workdir, f'c{concurrency}.db')
+            _copy_database(source, database_path)
+            level = run_level(database_path, concurrency, args.duration, mix,
+                              args.profile)
+            results.append(level)
+            latency = level['latency']
+            print(f'{concurrency:>4} users  {level["throughput_rps"]:>8.1f} '
+                  f'req/s  p50 {latency["p50_ms"]:>8.1f}  '
+                  f'p95 {latency["p95_ms"]:>8.1f}  '
+                  f'p99 {latency["p99_ms"]:>8.1f} ms  '
+                  f'errors {level["error_rate"]:.2%}  '
+                  f'locked {level["locked_errors"]} '
+                  f'({level["locked_rate"]:.2%})')
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, 'w') as handle:
+            json.dump({'size': args.size, 'mix': mix,
+                       'profile': args.profile,
+                       'duration': args.duration, 'levels': results},
+                      handle, indent=2)
+        print(f'Wrote {args.output}')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,163 @@
+"""Login throughput under password hashing.
+
+Runs concurrent logins through the Flask test client against a scratch
+database and reports logins per second, per hashing core, login latency,
+how many logins were shed with ``503`` and the latency of a logged-in
+``/budgets/`` probe running alongside (what other users feel during a
+login burst)::
+
+    python -m benchmarks.logins --methods pbkdf2:sha256:600000 \\
+        --concurrency 8 --duration 10 --compare-inline
+
+``--compare-inline`` repeats each method with hashing on the request
+threads (``PASSWORD_HASH_WORKERS = 0``), the behaviour before
+:mod:`app.passwords`.
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+from app import db
+from app.models import User
+
+from .common import PASSWORD, make_app, summarize
+
+PROBE_USER = 'probe'
+
+def _user(index):
+    return f'login_{index:03d}'
+
+def _setup(app, users):
+    with app.app_context():
+        db.create_all()
+        for name in [_user(i) for i in range(users)] + [PROBE_USER]:
+            user = User(username=name, email=f'{name}@example.com')
+            user.set_password(PASSWORD)
+            db.session.add(user)
+        db.session.commit()
+
+def _log_in(client, username):
+    return client.post('/auth/login', data={
+        'username': username, 'password': PASSWORD
+    })
+
+def run_level(method, concurrency, duration, workers, depth):
+    """Log in from ``concurrency`` threads for ``duration`` seconds."""
+    workdir = tempfile.mkdtemp(prefix='centsible-logins-')
+    try:
+        app = make_app(
+            'sqlite:///' + os.path.join(workdir, 'logins.db'),
+            PASSWORD_HASH_METHOD=method,
+            PASSWORD_HASH_WORKERS=workers,
+            PASSWORD_HASH_QUEUE_DEPTH=depth
+        )
+        _setup(app, concurrency)
+
+        stop = threading.Event()
+        logins, rejected, errors, probes = [], [0], [0], []
+        lock = threading.Lock()
+
+        def log_in_repeatedly(username):
+            client = app.test_client()
+            while not stop.is_set():
+                started = time.perf_counter()
+                response = _log_in(client, username)
+                elapsed = time.perf_counter() - started
+                with lock:
+                    if response.status_code == 302:
+                        logins.append(elapsed)
+                    elif response.status_code == 503:
+                        rejected[0] += 1
+                    else:
+                        errors[0] += 1
+                client.get('/auth/logout')
+
+        def probe():
+            client = app.test_client()
+            _log_in(client, PROBE_USER)
+            while not stop.is_set():
+                started = time.perf_counter()
+                client.get('/budgets/')
+                probes.append(time.perf_counter() - started)
+                stop.wait(0.05)
+
+        threads = [threading.Thread(target=log_in_repeatedly,
+                                    args=(_user(i),))
+                   for i in range(concurrency)]
+        threads.append(threading.Thread(target=probe))
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        stop.wait(duration)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        from app.passwords import password_hasher
+        password_hasher.shutdown(app)
+        with app.app_context():
+            db.engine.dispose()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    # Cores hashing can occupy: the pool size, or one per request thread
+    cores = min(workers or concurrency, os.cpu_count() or 1, concurrency)
+    throughput = len(logins) / elapsed
+    return {
+        'method': method,
+        'mode': f'pool({workers})' if workers else 'inline',
+        'concurrency': concurrency,
+        'logins': len(logins),
+        'logins_per_second': round(throughput, 2),
+        'logins_per_second_per_core': round(throughput / cores, 2),
+        'rejected': rejected[0],
+        'errors': errors[0],
+        'login_latency': summarize(logins),
+        'probe_latency': summarize(probes)
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--methods', default='pbkdf2:sha256:600000',
+                        help='Comma-separated Werkzeug hash methods.')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=10,
+                        help='Seconds per run.')
+    parser.add_argument('--workers', type=int,
+                        default=max(1, (os.cpu_count() or 2) // 2),
+                        help='Hashing pool size.')
+    parser.add_argument('--queue-depth', type=int, default=16)
+    parser.add_argument('--compare-inline', action='store_true',
+                        help='Also run with hashing on request threads.')
+    parser.add_argument('--output', help='Write results as JSON here.')
+    args = parser.parse_args(argv)
+
+    modes = [args.workers] + ([0] if args.compare_inline else [])
+    results = []
+    for method in [m.strip() for m in args.methods.split(',') if m]:
+        for workers in modes:
+            level = run_level(method, args.concurrency, args.duration,
+                              workers, args.queue_depth)
+            results.append(level)
+            print(f'{method:<24} {level["mode"]:<8} '
+                  f'{level["logins_per_second"]:>7.2f} logins/s  '
+                  f'{level["logins_per_second_per_core"]:>7.2f} /core  '
+                  f'p95 {level["login_latency"]["p95_ms"]:>8.1f} ms  '
+                  f'rejected {level["rejected"]:>4}  '
+                  f'probe p95 {level["probe_latency"]["p95_ms"]:>7.1f} ms')
+
+    if args.output:
+        with open(args.output, 'w') as handle:
+            json.dump({'cpu_count': os.cpu_count(), 'levels': results},
+                      handle, indent=2)
+        print(f'Wrote {args.output}')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
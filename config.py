@@ -16,15 +16,100 @@ class Config:
                                   'instance', 'centsible.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
+    # Applied to every new SQLite connection (see app.database)
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': 5000,  # Milliseconds
+        'cache_size': -16000,  # KiB per connection
+        'mmap_size': 64 * 1024 * 1024,
+        'temp_store': 'MEMORY'
+    }
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': 5,
+        'max_overflow': 10,
+        'pool_timeout': 10
+    }
+    
     # Session
     PERMANENT_SESSION_LIFETIME = timedelta(days=31)
     SESSION_COOKIE_SECURE = True
     SESSION_COOKIE_HTTPONLY = True
     
+    # Reports
+    SPENDING_HISTORY_MAX_MONTHS = 120
+    
+    # View cache: 'memory' (per process), 'filesystem' (shared) or 'null'
+    VIEW_CACHE_BACKEND = os.environ.get('VIEW_CACHE_BACKEND') or 'memory'
+    VIEW_CACHE_MAX_ENTRIES = 1024
+    VIEW_CACHE_DIR = os.environ.get('VIEW_CACHE_DIR') or \
+        os.path.join(os.path.abspath(os.path.dirname(__file__)),
+                     'instance', 'view_cache')
+    
+    # Logged-in user rows, so requests skip the loader query. Shared on
+    # disk by default: a per-process copy would not see writes made by
+    # other web workers or the job worker until USER_CACHE_TTL passes.
+    # Use 'null' when web processes run on several hosts
+    USER_CACHE_BACKEND = os.environ.get('USER_CACHE_BACKEND') or \
+        'filesystem'
+    USER_CACHE_TTL = 60  # Seconds
+    USER_CACHE_MAX_ENTRIES = 4096
+    USER_CACHE_DIR = os.environ.get('USER_CACHE_DIR') or \
+        os.path.join(os.path.abspath(os.path.dirname(__file__)),
+                     'instance', 'user_cache')
+    
+    # Rendered {% cache %} template fragments, per user and data version
+    FRAGMENT_CACHE_BACKEND = os.environ.get('FRAGMENT_CACHE_BACKEND') or \
+        'memory'
+    FRAGMENT_CACHE_TTL = 300  # Seconds, unless the tag gives its own
+    FRAGMENT_CACHE_MAX_ENTRIES = 1024
+    FRAGMENT_CACHE_DIR = os.environ.get('FRAGMENT_CACHE_DIR') or \
+        os.path.join(os.path.abspath(os.path.dirname(__file__)),
+                     'instance', 'fragment_cache')
+    
+    # Mixed into conditional GET validators; change it when a deploy
+    # alters page output so browsers drop copies from the old templates
+    CONDITIONAL_GET_SALT = os.environ.get('CONDITIONAL_GET_SALT', '')
+    
+    # Per-request SQL/render timing; /_stats is only served with a token
+    INSTRUMENTATION_ENABLED = os.environ.get(
+        'INSTRUMENTATION_ENABLED', ''
+    ).lower() in ('1', 'true', 'yes')
+    INSTRUMENTATION_TOKEN = os.environ.get('INSTRUMENTATION_TOKEN')
+    INSTRUMENTATION_SERVER_TIMING = True
+    INSTRUMENTATION_SLOW_REQUEST_MS = int(
+        os.environ.get('INSTRUMENTATION_SLOW_REQUEST_MS') or 0
+    )
+    
+    # Deferred jobs: 'thread' (in-process pool), 'worker' (run only by
+    # `flask worker`) or 'inline' (synchronously after commit)
+    JOBS_MODE = os.environ.get('JOBS_MODE') or 'thread'
+    JOBS_WORKERS = 2
+    JOBS_POLL_INTERVAL = 5  # Seconds between polls for retries
+    JOBS_RETRY_BACKOFF = 5  # Seconds, doubled per failed attempt
+    JOBS_LOCK_TIMEOUT = 300  # Seconds before a running job is reclaimed
+    
+    # JSON API (see app.routes.api)
+    API_BATCH_MAX_OPERATIONS = 1000
+    API_IDEMPOTENCY_TTL = 24 * 3600  # Seconds a retry can be replayed
+    
+    # Password hashing (see app.passwords); changing the method rehashes
+    # each user's password at their next login
+    PASSWORD_HASH_METHOD = 'pbkdf2:sha256:600000'
+    PASSWORD_HASH_WORKERS = max(1, (os.cpu_count() or 2) // 2)
+    PASSWORD_HASH_QUEUE_DEPTH = 16  # Waiting hashes before 503s
+    PASSWORD_HASH_TIMEOUT = 10  # Seconds a hash may wait before a 503
+    PASSWORD_HASH_RETRY_AFTER = 2  # Seconds, sent with the 503
+    
 class DevelopmentConfig(Config):
     """Development configuration."""
     DEBUG = True
     SESSION_COOKIE_SECURE = False
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': 2,
+        'max_overflow': 5,
+        'pool_timeout': 10
+    }
 
 class TestingConfig(Config):
     """Testing configuration."""
@@ -32,11 +117,42 @@ class TestingConfig(Config):
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
     WTF_CSRF_ENABLED = False
     SESSION_COOKIE_SECURE = False
+    JOBS_MODE = 'inline'
+    # One process, and nothing written outside the instance folder
+    USER_CACHE_BACKEND = 'memory'
+    # Cheap hashes keep the suite fast
+    PASSWORD_HASH_METHOD = 'pbkdf2:sha256:1000'
+    PASSWORD_HASH_WORKERS = 2
+    # In-memory database: one shared connection, nothing to make durable
+    SQLITE_PRAGMAS = {
+        'synchronous': 'OFF',
+        'temp_store': 'MEMORY'
+    }
+    SQLALCHEMY_ENGINE_OPTIONS = {}
 
 class ProductionConfig(Config):
     """Production configuration."""
     # Override with environment variables in production
-    pass
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD') or \
+        Config.PASSWORD_HASH_METHOD
+    PASSWORD_HASH_WORKERS = int(
+        os.environ.get('PASSWORD_HASH_WORKERS') or
+        max(1, (os.cpu_count() or 2) // 2)
+    )
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS') or 15000),
+        'cache_size': -64000,  # KiB per connection
+        'mmap_size': 256 * 1024 * 1024,
+        'temp_store': 'MEMORY'
+    }
+    # Threaded servers hold one connection per busy worker thread
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.environ.get('DATABASE_POOL_SIZE') or 10),
+        'max_overflow': 20,
+        'pool_timeout': 30
+    }
 
 config = {
     'development': DevelopmentConfig,
@@ -0,0 +1,52 @@
+"""Add monthly category totals rollup table
+
+Revision ID: 7c1e9a3d5b20
+Revises: 4b205cdf4527
+Create Date: 2026-10-16 09:12:41.208331
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c1e9a3d5b20'
+down_revision = '4b205cdf4527'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('monthly_category_totals',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('category_id', sa.Integer(), nullable=False),
+    sa.Column('year', sa.Integer(), nullable=False),
+    sa.Column('month', sa.Integer(), nullable=False),
+    sa.Column('total', sa.Numeric(precision=12, scale=2), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['category_id'], ['categories.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'category_id', 'year', 'month', name='uq_monthly_category_total')
+    )
+    with op.batch_alter_table('monthly_category_totals', schema=None) as batch_op:
+        batch_op.create_index('idx_rollup_user_period', ['user_id', 'year', 'month'], unique=False)
+
+    # Backfill from existing expenses
+    op.execute(
+        "INSERT INTO monthly_category_totals "
+        "(user_id, category_id, year, month, total, count) "
+        "SELECT user_id, category_id, "
+        "CAST(STRFTIME('%Y', date) AS INTEGER), "
+        "CAST(STRFTIME('%m', date) AS INTEGER), "
+        "SUM(amount), COUNT(id) "
+        "FROM expenses GROUP BY 1, 2, 3, 4"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('monthly_category_totals', schema=None) as batch_op:
+        batch_op.drop_index('idx_rollup_user_period')
+
+    op.drop_table('monthly_category_totals')
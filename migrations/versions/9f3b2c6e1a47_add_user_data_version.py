@@ -0,0 +1,26 @@
+"""Add per-user data version for cache scoping
+
+Revision ID: 9f3b2c6e1a47
+Revises: 7c1e9a3d5b20
+Create Date: 2026-10-16 11:02:17.540912
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9f3b2c6e1a47'
+down_revision = '7c1e9a3d5b20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('data_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('data_version')
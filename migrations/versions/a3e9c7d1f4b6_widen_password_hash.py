@@ -0,0 +1,32 @@
+"""Widen users.password_hash for scrypt hashes
+
+Revision ID: a3e9c7d1f4b6
+Revises: f1b6d3a8c570
+Create Date: 2026-10-16 19:12:48.301557
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3e9c7d1f4b6'
+down_revision = 'f1b6d3a8c570'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.alter_column('password_hash',
+               existing_type=sa.String(length=128),
+               type_=sa.String(length=256),
+               existing_nullable=False)
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.alter_column('password_hash',
+               existing_type=sa.String(length=256),
+               type_=sa.String(length=128),
+               existing_nullable=False)
@@ -0,0 +1,64 @@
+"""Add FTS5 full-text index over expense descriptions and notes
+
+Revision ID: b4d81e6f2c93
+Revises: 9f3b2c6e1a47
+Create Date: 2026-10-16 13:24:05.118374
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'b4d81e6f2c93'
+down_revision = '9f3b2c6e1a47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # FTS5 is SQLite-only; other databases search with LIKE instead
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    op.execute(
+        "CREATE VIRTUAL TABLE expenses_fts USING fts5("
+        "description, receipt_note, content='expenses', content_rowid='id', "
+        "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+    )
+    op.execute(
+        "CREATE TRIGGER expenses_fts_ai AFTER INSERT ON expenses "
+        "BEGIN "
+        "INSERT INTO expenses_fts(rowid, description, receipt_note) "
+        "VALUES (new.id, new.description, new.receipt_note); "
+        "END"
+    )
+    op.execute(
+        "CREATE TRIGGER expenses_fts_ad AFTER DELETE ON expenses "
+        "BEGIN "
+        "INSERT INTO expenses_fts(expenses_fts, rowid, description, receipt_note) "
+        "VALUES ('delete', old.id, old.description, old.receipt_note); "
+        "END"
+    )
+    op.execute(
+        "CREATE TRIGGER expenses_fts_au "
+        "AFTER UPDATE OF description, receipt_note ON expenses "
+        "BEGIN "
+        "INSERT INTO expenses_fts(expenses_fts, rowid, description, receipt_note) "
+        "VALUES ('delete', old.id, old.description, old.receipt_note); "
+        "INSERT INTO expenses_fts(rowid, description, receipt_note) "
+        "VALUES (new.id, new.description, new.receipt_note); "
+        "END"
+    )
+
+    # Index existing expenses
+    op.execute("INSERT INTO expenses_fts(expenses_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    op.execute("DROP TRIGGER IF EXISTS expenses_fts_au")
+    op.execute("DROP TRIGGER IF EXISTS expenses_fts_ad")
+    op.execute("DROP TRIGGER IF EXISTS expenses_fts_ai")
+    op.execute("DROP TABLE IF EXISTS expenses_fts")
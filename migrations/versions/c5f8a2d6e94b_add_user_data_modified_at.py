@@ -0,0 +1,26 @@
+"""Add users.data_modified_at for conditional GETs
+
+Revision ID: c5f8a2d6e94b
+Revises: b7d2e5a9c163
+Create Date: 2026-10-16 21:48:36.027415
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5f8a2d6e94b'
+down_revision = 'b7d2e5a9c163'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('data_modified_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('data_modified_at')
@@ -0,0 +1,64 @@
+"""Add budget periods to alerts and deduplicate them
+
+Revision ID: d2a7f5c3e816
+Revises: b4d81e6f2c93
+Create Date: 2026-10-16 15:20:44.118305
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2a7f5c3e816'
+down_revision = 'b4d81e6f2c93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('budget_alerts', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('year', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('month', sa.Integer(), nullable=True))
+
+    alerts = sa.table(
+        'budget_alerts',
+        sa.column('id', sa.Integer),
+        sa.column('user_id', sa.Integer),
+        sa.column('category_id', sa.Integer),
+        sa.column('alert_type', sa.String),
+        sa.column('year', sa.Integer),
+        sa.column('month', sa.Integer),
+        sa.column('created_at', sa.DateTime)
+    )
+
+    # Existing alerts belong to the month they were raised in
+    op.execute(
+        alerts.update().values(
+            year=sa.cast(sa.extract('year', alerts.c.created_at), sa.Integer),
+            month=sa.cast(sa.extract('month', alerts.c.created_at), sa.Integer)
+        )
+    )
+
+    # Keep the first of each repeated alert so the unique index applies
+    first = sa.select(sa.func.min(alerts.c.id)).group_by(
+        alerts.c.user_id, alerts.c.category_id,
+        alerts.c.year, alerts.c.month, alerts.c.alert_type
+    )
+    op.execute(alerts.delete().where(alerts.c.id.not_in(first)))
+
+    with op.batch_alter_table('budget_alerts', schema=None) as batch_op:
+        batch_op.alter_column('year', existing_type=sa.Integer(), nullable=False)
+        batch_op.alter_column('month', existing_type=sa.Integer(), nullable=False)
+        batch_op.create_index(
+            'uq_budget_alert_period',
+            ['user_id', 'category_id', 'year', 'month', 'alert_type'],
+            unique=True
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('budget_alerts', schema=None) as batch_op:
+        batch_op.drop_index('uq_budget_alert_period')
+        batch_op.drop_column('month')
+        batch_op.drop_column('year')
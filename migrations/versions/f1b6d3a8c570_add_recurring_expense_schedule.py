@@ -0,0 +1,37 @@
+"""Add recurring expense schedule columns
+
+Revision ID: f1b6d3a8c570
+Revises: e8c4b19d7f52
+Create Date: 2026-10-16 18:05:32.614920
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1b6d3a8c570'
+down_revision = 'e8c4b19d7f52'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('expenses', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('next_due', sa.Date(), nullable=True))
+        batch_op.add_column(sa.Column('recurring_parent_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_expense_recurring_parent', 'expenses', ['recurring_parent_id'], ['id'], ondelete='SET NULL')
+        batch_op.create_index('idx_expense_next_due', ['next_due'], unique=False)
+        batch_op.create_index('uq_expense_occurrence', ['recurring_parent_id', 'date'], unique=True)
+
+    # Existing recurring expenses were entered by hand every period, so
+    # they are not scheduled here; editing one makes it a template.
+
+
+def downgrade():
+    with op.batch_alter_table('expenses', schema=None) as batch_op:
+        batch_op.drop_index('uq_expense_occurrence')
+        batch_op.drop_index('idx_expense_next_due')
+        batch_op.drop_constraint('fk_expense_recurring_parent', type_='foreignkey')
+        batch_op.drop_column('recurring_parent_id')
+        batch_op.drop_column('next_due')
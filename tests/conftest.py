@@ -5,6 +5,7 @@ import pytest
 from app import create_app, db
 from app.models import User, Category, Expense
 from tests.auth_fixture import AuthActions
+from tests.query_counter import QueryCounter
 
 @pytest.fixture
 def app():
@@ -42,6 +43,13 @@ def auth(client):
     """Authentication fixture."""
     return AuthActions(client)
 
+@pytest.fixture
+def queries(app):
+    """Count SQL statements; use ``with queries.budget(n):`` to cap them."""
+    with app.app_context():
+        counter = QueryCounter(db.engine)
+    return counter
+
 @pytest.fixture
 def test_user(app):
     """Create and return a test user."""
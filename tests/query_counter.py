@@ -0,0 +1,65 @@
+"""SQL statement counting helpers for query budget tests."""
+from contextlib import contextmanager
+from sqlalchemy import event
+
+class QueryCounter:
+    """Records SQL statements executed on an engine while active."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = []
+
+    def _record(self, conn, cursor, statement, parameters, context,
+                executemany):
+        self.statements.append(statement)
+
+    def start(self):
+        event.listen(self.engine, 'before_cursor_execute', self._record)
+
+    def stop(self):
+        event.remove(self.engine, 'before_cursor_execute', self._record)
+
+    def clear(self):
+        del self.statements[:]
+
+    def __len__(self):
+        return len(self.statements)
+
+    def matching(self, fragment):
+        """Return recorded statements containing ``fragment``."""
+        return [s for s in self.statements if fragment in s]
+
+    def report(self):
+        """Format the recorded statements for a failure message."""
+        return '\n'.join(
+            f'  {index}. {" ".join(statement.split())[:200]}'
+            for index, statement in enumerate(self.statements, 1)
+        )
+
+    @contextmanager
+    def budget(self, limit, label='block'):
+        """Fail if the wrapped block executes more than ``limit`` queries.
+
+        The recorded statements are listed in the failure message so N+1
+        regressions point straight at the offending query.
+        """
+        self.clear()
+        self.start()
+        try:
+            yield self
+        finally:
+            self.stop()
+        assert len(self) <= limit, (
+            f'{label} ran {len(self)} queries, budget is {limit}:\n'
+            + self.report()
+        )
+
+@contextmanager
+def count_queries(engine):
+    """Collect SQL statements executed on an engine."""
+    counter = QueryCounter(engine)
+    counter.start()
+    try:
+        yield counter.statements
+    finally:
+        counter.stop()
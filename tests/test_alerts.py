@@ -0,0 +1,111 @@
+"""Test cases for the budget alert engine."""
+from datetime import date
+from decimal import Decimal
+from app import alerts, db
+from app.models import BudgetAlert, Category, Expense
+
+def _category(user_id, budget=100, threshold=80):
+    category = Category(user_id=user_id, name='Food', budget_amount=budget,
+                        alert_threshold=threshold)
+    db.session.add(category)
+    db.session.commit()
+    return category
+
+def _spend(category, amount, day=None):
+    expense = Expense(user_id=category.user_id, category_id=category.id,
+                      amount=Decimal(amount), description='Groceries',
+                      date=day or date.today())
+    db.session.add(expense)
+    db.session.commit()
+    return expense
+
+def _alert_types(category):
+    return [a.alert_type for a in BudgetAlert.query.filter_by(
+        category_id=category.id
+    ).order_by(BudgetAlert.id)]
+
+def test_levels_reached():
+    """Test threshold and overspent levels against a budget."""
+    budget = Decimal('100')
+    assert alerts.levels_reached(Decimal('79.99'), budget, 80) == ()
+    assert alerts.levels_reached(Decimal('80'), budget, 80) == ('threshold',)
+    assert alerts.levels_reached(Decimal('100'), budget, 80) == (
+        'threshold', 'overspent'
+    )
+    assert alerts.levels_reached(Decimal('500'), Decimal('0'), 80) == ()
+
+def test_alerts_fire_once_per_crossing(app, test_user):
+    """Test each level fires on its crossing and never repeats."""
+    with app.app_context():
+        category = _category(test_user.id)
+
+        _spend(category, '50.00')
+        assert _alert_types(category) == []
+
+        _spend(category, '35.00')
+        assert _alert_types(category) == ['threshold']
+
+        # Further spending under budget stays quiet
+        _spend(category, '5.00')
+        _spend(category, '5.00')
+        assert _alert_types(category) == ['threshold']
+
+        _spend(category, '10.00')
+        assert _alert_types(category) == ['threshold', 'overspent']
+        overspent = BudgetAlert.query.filter_by(alert_type='overspent').one()
+        assert overspent.message == 'Budget exceeded: Food spending is at ' \
+                                    '105% of budget'
+        assert (overspent.year, overspent.month) == (date.today().year,
+                                                     date.today().month)
+
+        _spend(category, '40.00')
+        assert BudgetAlert.query.count() == 2
+
+def test_alerts_are_per_period(app, test_user):
+    """Test another month gets its own alerts."""
+    with app.app_context():
+        category = _category(test_user.id)
+        _spend(category, '120.00', date(2025, 1, 10))
+        _spend(category, '90.00', date(2025, 2, 10))
+        periods = sorted(
+            (a.year, a.month, a.alert_type) for a in BudgetAlert.query
+        )
+        assert periods == [
+            (2025, 1, 'overspent'), (2025, 1, 'threshold'),
+            (2025, 2, 'threshold')
+        ]
+
+def test_edits_and_budget_changes_are_evaluated(app, test_user):
+    """Test raising an expense or lowering a budget can cross a level."""
+    with app.app_context():
+        category = _category(test_user.id)
+        expense = _spend(category, '20.00')
+
+        expense.amount = Decimal('85.00')
+        db.session.commit()
+        assert _alert_types(category) == ['threshold']
+
+        today = date.today()
+        category.budget_amount = Decimal('80.00')
+        alerts.evaluate_category(category, today.year, today.month)
+        db.session.commit()
+        assert _alert_types(category) == ['threshold', 'overspent']
+
+def test_quick_add_does_not_repeat_alerts(client, auth, app, test_user):
+    """Test repeated quick adds past the threshold raise one alert."""
+    with app.app_context():
+        category_id = _category(test_user.id).id
+    auth.login()
+
+    for _ in range(3):
+        response = client.post('/expenses/expenses/quick-add', data={
+            'category_id': category_id,
+            'amount': '30.00',
+            'description': 'Lunch',
+            'date': date.today().isoformat()
+        })
+        assert response.status_code == 302
+
+    with app.app_context():
+        assert Expense.query.count() == 3
+        assert [a.alert_type for a in BudgetAlert.query] == ['threshold']
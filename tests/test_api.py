@@ -0,0 +1,243 @@
+"""Test cases for the JSON API."""
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from app import db, rollups
+from app.models import (
+    Budget, Category, Expense, IdempotencyKey, MonthlyCategoryTotal, User
+)
+
+def _category(user_id, name='Food', is_active=True):
+    category = Category(user_id=user_id, name=name, is_active=is_active,
+                        budget_amount=Decimal('100.00'))
+    db.session.add(category)
+    db.session.commit()
+    return category.id
+
+def _expense(category_id, **values):
+    data = {'category_id': category_id, 'amount': '12.50',
+            'description': 'Lunch', 'date': '2026-10-01'}
+    data.update(values)
+    return data
+
+def test_requires_login_and_json(client, auth, test_user):
+    """Test anonymous calls get a 401 and form posts a 415."""
+    response = client.get('/api/v1/expenses')
+    assert response.status_code == 401
+    assert response.get_json()['error']['status'] == 401
+
+    auth.login()
+    response = client.post('/api/v1/expenses', data={'amount': '1'})
+    assert response.status_code == 415
+
+def test_expense_crud(app, client, auth, test_user):
+    """Test create, read, partial update and delete of one expense."""
+    with app.app_context():
+        food = _category(test_user.id)
+    auth.login()
+
+    response = client.post('/api/v1/expenses', json=_expense(food))
+    assert response.status_code == 201
+    expense = response.get_json()['expense']
+    assert expense['amount'] == '12.50'
+    assert expense['date'] == '2026-10-01'
+
+    response = client.patch(f'/api/v1/expenses/{expense["id"]}',
+                            json={'amount': 20})
+    assert response.status_code == 200
+    updated = response.get_json()['expense']
+    assert updated['amount'] == '20.00'
+    assert updated['description'] == 'Lunch'
+
+    response = client.get(f'/api/v1/expenses/{expense["id"]}')
+    assert response.get_json()['expense']['amount'] == '20.00'
+
+    response = client.delete(f'/api/v1/expenses/{expense["id"]}')
+    assert response.status_code == 200
+    assert client.get(f'/api/v1/expenses/{expense["id"]}').status_code == 404
+
+def test_validation_uses_the_forms(app, client, auth, test_user):
+    """Test the expense and quick-add form rules both apply."""
+    with app.app_context():
+        food = _category(test_user.id)
+        archived = _category(test_user.id, 'Old', is_active=False)
+        other = User(username='other', email='other@example.com')
+        other.set_password('password123')
+        db.session.add(other)
+        db.session.commit()
+        foreign = _category(other.id)
+    auth.login()
+
+    response = client.post('/api/v1/expenses', json={
+        'category_id': foreign, 'amount': '0', 'description': 'x'
+    })
+    assert response.status_code == 422
+    fields = response.get_json()['error']['fields']
+    assert set(fields) == {'category_id', 'amount', 'date'}
+
+    # Quick entries default the date but only take active categories
+    response = client.post('/api/v1/expenses/quick', json={
+        'category_id': archived, 'amount': '5', 'description': 'Tea'
+    })
+    assert response.status_code == 422
+    response = client.post('/api/v1/expenses/quick', json={
+        'category_id': food, 'amount': '5', 'description': 'Tea'
+    })
+    assert response.status_code == 201
+    assert response.get_json()['expense']['date'] == \
+        date.today().isoformat()
+
+def test_list_pages_with_cursors(app, client, auth, test_user):
+    """Test expenses page newest first and filter by date."""
+    with app.app_context():
+        food = _category(test_user.id)
+        db.session.add_all(
+            Expense(user_id=test_user.id, category_id=food,
+                    amount=Decimal('1.00'), description=f'Item {day}',
+                    date=date(2026, 9, day))
+            for day in range(1, 6)
+        )
+        db.session.commit()
+    auth.login()
+
+    first = client.get('/api/v1/expenses?limit=3').get_json()
+    assert [e['date'] for e in first['expenses']] == \
+        ['2026-09-05', '2026-09-04', '2026-09-03']
+    second = client.get(
+        f'/api/v1/expenses?limit=3&cursor={first["next_cursor"]}'
+    ).get_json()
+    assert [e['date'] for e in second['expenses']] == \
+        ['2026-09-02', '2026-09-01']
+    assert second['next_cursor'] is None
+
+    filtered = client.get('/api/v1/expenses?from=2026-09-04').get_json()
+    assert len(filtered['expenses']) == 2
+    assert client.get('/api/v1/expenses?cursor=bogus').status_code == 400
+
+def test_batch_applies_everything_in_one_transaction(app, client, auth,
+                                                     test_user, queries):
+    """Test hundreds of writes commit together with rollups in step."""
+    with app.app_context():
+        food = _category(test_user.id)
+        keep = Expense(user_id=test_user.id, category_id=food,
+                       amount=Decimal('3.00'), description='Keep',
+                       date=date(2026, 9, 1))
+        drop = Expense(user_id=test_user.id, category_id=food,
+                       amount=Decimal('4.00'), description='Drop',
+                       date=date(2026, 9, 2))
+        db.session.add_all([keep, drop])
+        db.session.commit()
+        keep_id, drop_id = keep.id, drop.id
+    auth.login()
+
+    operations = [
+        {'op': 'create', 'data': _expense(food, description=f'Item {n}')}
+        for n in range(300)
+    ] + [
+        {'op': 'update', 'id': keep_id, 'data': {'amount': '30.00'}},
+        {'op': 'delete', 'id': drop_id},
+        {'op': 'quick_create', 'data': {'category_id': food, 'amount': '1',
+                                        'description': 'Quick'}},
+    ]
+    queries.start()
+    response = client.post('/api/v1/expenses/batch',
+                           json={'operations': operations})
+    queries.stop()
+    assert response.status_code == 200, response.get_json()
+    results = response.get_json()['results']
+    assert len(results) == 303
+    assert results[300]['expense']['amount'] == '30.00'
+    assert results[301] == {'op': 'delete', 'id': drop_id}
+    # Apart from the row inserts, the cost does not grow per operation
+    inserts = len(queries.matching('INSERT INTO expenses'))
+    assert len(queries.statements) - inserts < 20, queries.report()
+
+    with app.app_context():
+        assert Expense.query.count() == 302
+        def snapshot():
+            return sorted((r.year, r.month, r.total, r.count)
+                          for r in MonthlyCategoryTotal.query)
+        incremental = snapshot()
+        rollups.rebuild()
+        assert snapshot() == incremental
+
+def test_invalid_batch_applies_nothing(app, client, auth, test_user):
+    """Test one bad operation rejects the batch with indexed errors."""
+    with app.app_context():
+        food = _category(test_user.id)
+    auth.login()
+
+    response = client.post('/api/v1/expenses/batch', json={'operations': [
+        {'op': 'create', 'data': _expense(food)},
+        {'op': 'create', 'data': _expense(food, amount='-1')},
+        {'op': 'delete', 'id': 999},
+        {'op': 'rename'},
+    ]})
+    assert response.status_code == 422
+    errors = response.get_json()['error']['operations']
+    assert [error['index'] for error in errors] == [1, 2, 3]
+    assert 'amount' in errors[0]['fields']
+
+    with app.app_context():
+        assert Expense.query.count() == 0
+
+def test_idempotency_key_replays_the_first_response(app, client, auth,
+                                                    test_user):
+    """Test a retried create is not applied twice."""
+    with app.app_context():
+        food = _category(test_user.id)
+    auth.login()
+    headers = {'Idempotency-Key': 'retry-1'}
+
+    first = client.post('/api/v1/expenses', json=_expense(food),
+                        headers=headers)
+    retry = client.post('/api/v1/expenses', json=_expense(food),
+                        headers=headers)
+    assert first.status_code == retry.status_code == 201
+    assert retry.headers['Idempotent-Replayed'] == 'true'
+    assert retry.get_json() == first.get_json()
+
+    reused = client.post('/api/v1/expenses', json=_expense(food, amount='9'),
+                         headers=headers)
+    assert reused.status_code == 422
+
+    with app.app_context():
+        assert Expense.query.count() == 1
+
+        # Once expired, the key can be used again
+        stored = IdempotencyKey.query.one()
+        stored.created_at = datetime.utcnow() - timedelta(days=2)
+        db.session.commit()
+    again = client.post('/api/v1/expenses', json=_expense(food),
+                        headers=headers)
+    assert again.status_code == 201
+    assert 'Idempotent-Replayed' not in again.headers
+    with app.app_context():
+        assert Expense.query.count() == 2
+        assert IdempotencyKey.query.count() == 1
+
+def test_categories_and_budgets(app, client, auth, test_user):
+    """Test category writes and setting a month's budget."""
+    auth.login()
+    response = client.post('/api/v1/categories',
+                           json={'name': 'Travel', 'color': 'FF0000'})
+    assert response.status_code == 201
+    category = response.get_json()['category']
+    assert category['color'] == '#FF0000'
+
+    response = client.put(f'/api/v1/budgets/{category["id"]}',
+                          json={'budget_amount': '250.00',
+                                'notes': 'Holiday'})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['category']['budget_amount'] == '250.00'
+    assert body['category']['alert_threshold'] == 80
+    assert body['budget']['notes'] == 'Holiday'
+
+    budgets = client.get('/api/v1/budgets').get_json()['budgets']
+    assert [b['amount'] for b in budgets] == ['250.00']
+
+    client.post('/api/v1/expenses', json=_expense(category['id']))
+    response = client.delete(f'/api/v1/categories/{category["id"]}')
+    assert response.status_code == 409
+    with app.app_context():
+        assert Budget.query.count() == 1
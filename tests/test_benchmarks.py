@@ -0,0 +1,48 @@
+"""Test cases for the benchmark and load-test tooling."""
+import pytest
+from benchmarks.common import percentile, summarize
+from benchmarks.endpoints import bench_endpoint, compare
+from benchmarks.loadtest import parse_mix
+
+def _results(p50, p95, queries, peak_kb):
+    return {'results': {'small': {'endpoints': {'main.index': {
+        'p50_ms': p50, 'p95_ms': p95, 'queries': queries, 'peak_kb': peak_kb
+    }}}}}
+
+def test_percentiles_use_nearest_rank():
+    """Test percentile and summary maths on a known sample."""
+    samples = [n / 1000 for n in range(1, 101)]
+    assert percentile([1, 2, 3, 4], 0.5) == 2
+    summary = summarize(samples)
+    assert summary['p50_ms'] == 50
+    assert summary['p99_ms'] == 99
+    assert summary['max_ms'] == 100
+
+def test_compare_flags_regressions_beyond_threshold():
+    """Test latency/memory growth over the threshold and any extra query."""
+    baseline = _results(10, 20, 4, 100)
+    assert compare(baseline, _results(11, 22, 4, 110), 0.15) == []
+
+    regressions = compare(baseline, _results(10, 30, 5, 100), 0.15)
+    assert regressions == [
+        'small main.index p95_ms: 20 -> 30 (+50%)',
+        'small main.index queries: 4 -> 5'
+    ]
+
+def test_bench_endpoint_measures_a_request(app, client, auth, sample_data):
+    """Test one endpoint run records latency, queries and memory."""
+    auth.login()
+    stats = bench_endpoint(app, client, '/expenses/expenses', iterations=3,
+                           warmup=1)
+    assert stats['count'] == 3
+    assert stats['queries'] >= 1
+    assert stats['bytes'] > 0
+    assert stats['peak_kb'] > 0
+
+def test_load_mix_parsing():
+    """Test operation weights parse and unknown operations are rejected."""
+    assert parse_mix('quick_add=3,dashboard') == {
+        'quick_add': 3.0, 'dashboard': 1.0
+    }
+    with pytest.raises(ValueError):
+        parse_mix('checkout=1')
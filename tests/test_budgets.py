@@ -0,0 +1,68 @@
+"""Test cases for budget management."""
+from datetime import date
+from decimal import Decimal
+import pytest
+from app import db
+from app.models import Category, Expense
+from app.reporting import preload_month_spending
+
+@pytest.fixture
+def statements(queries):
+    """Record SQL statements executed while the fixture is active."""
+    queries.start()
+    yield queries.statements
+    queries.stop()
+
+def _add_category(user_id, name, spent):
+    category = Category(user_id=user_id, name=name, budget_amount=100,
+                        alert_threshold=80)
+    db.session.add(category)
+    db.session.flush()
+    db.session.add(Expense(user_id=user_id, category_id=category.id,
+                           amount=Decimal(spent), description=name,
+                           date=date.today()))
+    db.session.commit()
+    return category
+
+def test_preloaded_spending_avoids_queries(app, test_user, statements):
+    """Test hybrid properties read preloaded values without SQL."""
+    with app.app_context():
+        food = _add_category(test_user.id, 'Food', '85.00')
+        rent = _add_category(test_user.id, 'Rent', '10.00')
+        db.session.refresh(food)
+        db.session.refresh(rent)
+
+        statements.clear()
+        preload_month_spending([food, rent])
+        assert len(statements) == 1
+
+        assert food.current_month_spending == Decimal('85.00')
+        assert food.budget_progress == 85
+        assert food.should_alert()
+        assert rent.current_month_spending == Decimal('10.00')
+        assert not rent.should_alert()
+        assert len(statements) == 1
+
+def test_budgets_page_query_count_is_constant(app, client, auth, test_user,
+                                              statements):
+    """Test the budgets page does not query per category."""
+    with app.app_context():
+        _add_category(test_user.id, 'Food', '20.00')
+    auth.login()
+
+    statements.clear()
+    response = client.get('/budgets/')
+    assert response.status_code == 200
+    baseline = len(statements)
+
+    with app.app_context():
+        for index in range(4):
+            _add_category(test_user.id, f'Extra {index}', '5.00')
+    # Reload the cached identity the writes invalidated
+    client.get('/auth/login')
+
+    statements.clear()
+    response = client.get('/budgets/')
+    assert response.status_code == 200
+    assert 'Extra 3' in response.get_data(as_text=True)
+    assert len(statements) == baseline
@@ -0,0 +1,81 @@
+"""Test cases for the versioned view cache."""
+from datetime import date
+from decimal import Decimal
+from app import db
+from app.cache import FileSystemBackend, MemoryBackend, view_cache
+from app.models import Budget, Category, Expense, User
+
+def test_memory_backend_evicts_least_recently_used():
+    """Test the LRU keeps at most max_entries, dropping the oldest."""
+    backend = MemoryBackend(max_entries=2)
+    backend.set('a', 1)
+    backend.set('b', 2)
+    assert backend.get('a') == 1  # 'a' becomes most recent
+    backend.set('c', 3)
+    assert backend.get('b') is None
+    assert backend.get('a') == 1
+    assert len(backend) == 2
+
+def test_filesystem_backend_is_shared_and_bounded(tmp_path):
+    """Test entries written by one instance are read by another."""
+    writer = FileSystemBackend(str(tmp_path), max_entries=2)
+    reader = FileSystemBackend(str(tmp_path), max_entries=2)
+    writer.set(('ns', 1, 0, 'dashboard'), {'total': Decimal('5.00')})
+    assert reader.get(('ns', 1, 0, 'dashboard')) == {'total': Decimal('5.00')}
+    assert reader.get(('ns', 1, 1, 'dashboard')) is None
+
+    writer.set('second', 2)
+    writer.set('third', 3)
+    writer.prune()
+    assert len(writer) == 2
+
+def test_writes_bump_data_version(app, test_user):
+    """Test expense, category, budget and profile writes bump the version."""
+    with app.app_context():
+        user = db.session.get(User, test_user.id)
+        assert user.data_version == 0
+
+        category = Category(user_id=user.id, name='Food')
+        db.session.add(category)
+        db.session.commit()
+        assert user.data_version == 1
+
+        db.session.add(Expense(user_id=user.id, category_id=category.id,
+                               amount=Decimal('3.00'), description='Tea',
+                               date=date.today()))
+        db.session.add(Budget(user_id=user.id, category_id=category.id,
+                              amount=Decimal('50'), year=2026, month=1))
+        db.session.commit()
+        assert user.data_version == 2
+
+        user.total_budget = Decimal('900')
+        db.session.commit()
+        assert user.data_version == 3
+
+        # Unrelated no-op flushes leave the version alone
+        db.session.commit()
+        assert db.session.get(User, user.id).data_version == 3
+
+def test_dashboard_cache_hits_until_write(app, client, auth, sample_data):
+    """Test repeated views hit the cache and writes invalidate it."""
+    auth.login()
+    with app.app_context():
+        client.get('/')
+        before = view_cache.stats()
+        assert client.get('/').status_code == 200
+        after_reload = view_cache.stats()
+        assert after_reload['hits'] == before['hits'] + 1
+
+        category_id = sample_data['categories'][0].id
+        response = client.post('/expenses/expenses/add', data={
+            'amount': '99.99',
+            'description': 'Cache buster',
+            'category_id': category_id,
+            'date': date.today().isoformat(),
+            'recurrence_frequency': ''
+        })
+        assert response.status_code == 302
+
+        response = client.get('/')
+        after_write = view_cache.stats()
+        assert after_write['misses'] == after_reload['misses'] + 1
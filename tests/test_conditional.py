@@ -0,0 +1,91 @@
+"""Test cases for conditional GET on per-user pages."""
+from datetime import datetime, timedelta
+from sqlalchemy import update
+from app import db
+from app.models import User
+from app.user_cache import user_cache
+
+def _age_last_write(app, user_id):
+    """Move the user's last write out of the current second."""
+    with app.app_context():
+        # Core update: through the ORM it would count as a new write
+        db.session.execute(
+            update(User).where(User.id == user_id)
+            .values(data_modified_at=datetime.utcnow() - timedelta(minutes=5))
+        )
+        db.session.commit()
+        user_cache.invalidate([user_id])
+
+def test_matching_etag_skips_the_view(app, client, auth, test_user,
+                                      sample_data, queries):
+    """Test a revalidated dashboard runs no queries at all."""
+    auth.login()
+    response = client.get('/')
+    assert response.status_code == 200
+    assert response.headers['Cache-Control'] == 'private, no-cache'
+    etag = response.headers['ETag']
+
+    queries.start()
+    cached = client.get('/', headers={'If-None-Match': etag})
+    queries.stop()
+    assert cached.status_code == 304
+    assert cached.get_data() == b''
+    assert queries.statements == [], queries.report()
+
+def test_writes_change_the_validators(app, client, auth, test_user,
+                                      sample_data):
+    """Test an expense write makes the old ETag stale."""
+    auth.login()
+    category = sample_data['categories'][0]
+    etag = client.get('/api/v1/expenses').headers['ETag']
+    assert client.get('/api/v1/expenses', headers={
+        'If-None-Match': etag
+    }).status_code == 304
+
+    response = client.post('/api/v1/expenses', json={
+        'category_id': category.id, 'amount': '5.00',
+        'description': 'Coffee', 'date': '2026-10-01'
+    })
+    assert response.status_code == 201
+
+    fresh = client.get('/api/v1/expenses', headers={'If-None-Match': etag})
+    assert fresh.status_code == 200
+    assert fresh.headers['ETag'] != etag
+    assert 'Coffee' in fresh.get_data(as_text=True)
+
+    # Validators differ per URL
+    other = client.get('/api/v1/expenses?limit=1', headers={
+        'If-None-Match': fresh.headers['ETag']
+    })
+    assert other.status_code == 200
+
+def test_if_modified_since(app, client, auth, test_user, sample_data):
+    """Test Last-Modified follows the user's last write."""
+    _age_last_write(app, test_user.id)
+    auth.login()
+    response = client.get('/reports/')
+    last_modified = response.headers['Last-Modified']
+
+    assert client.get('/reports/', headers={
+        'If-Modified-Since': last_modified
+    }).status_code == 304
+
+    # A write in the current second is not trusted to the HTTP date
+    client.post('/api/v1/categories', json={'name': 'Travel'})
+    response = client.get('/reports/', headers={
+        'If-Modified-Since': last_modified
+    })
+    assert response.status_code == 200
+    assert 'Last-Modified' not in response.headers
+
+def test_flashed_pages_are_rendered(app, client, auth, test_user,
+                                    sample_data):
+    """Test a pending flash message is never hidden behind a 304."""
+    auth.login()
+    etag = client.get('/').headers['ETag']
+    with client.session_transaction() as session:
+        session['_flashes'] = [('info', 'Saved')]
+
+    response = client.get('/', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert 'Saved' in response.get_data(as_text=True)
@@ -134,4 +134,53 @@ def test_chart_data(client, sample_data, auth):
     assert categories[0].name.encode() in response.data
     assert categories[1].name.encode() in response.data
     assert b'100.0' in response.data  # Chart amounts as floats
-    assert b'50.0' in response.data
\ No newline at end of file
+    assert b'50.0' in response.data
+
+def test_dashboard_snapshot_matches_period_totals(app, test_user, sample_data):
+    """Test snapshot figures agree with per-period spending queries."""
+    from app import db
+    from app.dashboard import DashboardSnapshot
+    from app.models import User
+    from app.periods import Period, shift_month
+
+    with app.app_context():
+        user = db.session.get(User, test_user.id)
+        now = datetime.now()
+        snapshot = DashboardSnapshot.compute(user.id, now)
+
+        prev = Period.month(*shift_month(now.year, now.month, -1))
+        assert snapshot.monthly_spending == user.get_spending(
+            Period.month(now.year, now.month)
+        )
+        assert snapshot.prev_spending == user.get_spending(prev)
+
+        totals = [total for _, total in snapshot.category_totals]
+        assert totals == sorted(totals, reverse=True)
+        top_category, top_spent = snapshot.top_category
+        assert top_spent == max(totals)
+        assert snapshot.chart_data['categories'][0] == top_category.name
+        assert len(snapshot.active_categories) == 3
+
+def test_dashboard_query_budget(app, client, auth, sample_data, queries):
+    """Test the dashboard renders with a small, fixed number of queries."""
+    auth.login()
+
+    # user, snapshot, recent expenses (with categories), alerts
+    with queries.budget(4, label='dashboard'):
+        response = client.get('/')
+    assert response.status_code == 200
+
+def test_dashboard_shows_budget_overrun(app, client, auth, test_user,
+                                        sample_data):
+    """Test the dashboard renders when spending exceeds the total budget."""
+    from app import db
+    from app.models import User
+
+    with app.app_context():
+        db.session.get(User, test_user.id).total_budget = 1
+        db.session.commit()
+
+    auth.login()
+    response = client.get('/')
+    assert response.status_code == 200
+    assert ' over ' in response.get_data(as_text=True)
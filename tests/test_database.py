@@ -0,0 +1,33 @@
+"""Test cases for SQLite connection tuning."""
+from sqlalchemy import text
+from app import create_app, db
+from config import ProductionConfig, TestingConfig
+
+def _pragma(name):
+    return db.session.execute(text(f'PRAGMA {name}')).scalar()
+
+def test_production_profile_applies_on_connect(monkeypatch, tmp_path):
+    """Test a file database gets WAL and the production pragmas."""
+    for name in ('SQLITE_PRAGMAS', 'SQLALCHEMY_ENGINE_OPTIONS'):
+        monkeypatch.setattr(TestingConfig, name,
+                            getattr(ProductionConfig, name))
+    monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_DATABASE_URI',
+                        f'sqlite:///{tmp_path / "tuned.db"}')
+    app = create_app('testing')
+
+    with app.app_context():
+        assert db.engine.pool.size() == \
+            ProductionConfig.SQLALCHEMY_ENGINE_OPTIONS['pool_size']
+        assert _pragma('journal_mode') == 'wal'
+        assert _pragma('synchronous') == 1  # NORMAL
+        assert _pragma('busy_timeout') == \
+            ProductionConfig.SQLITE_PRAGMAS['busy_timeout']
+        assert _pragma('cache_size') == -64000
+        assert _pragma('temp_store') == 2  # MEMORY
+        db.engine.dispose()
+
+def test_testing_profile(app):
+    """Test the in-memory test database skips durability work."""
+    with app.app_context():
+        assert _pragma('synchronous') == 0  # OFF
+        assert _pragma('journal_mode') == 'memory'
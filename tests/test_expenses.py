@@ -0,0 +1,126 @@
+"""Test cases for the expenses list."""
+import re
+from datetime import date, timedelta
+import pytest
+from app import db
+from app.models import Category, Expense
+from app.pagination import InvalidCursor, decode_cursor, encode_cursor
+
+@pytest.fixture
+def many_expenses(app, test_user):
+    """Create 45 expenses, several sharing each date."""
+    with app.app_context():
+        food = Category(user_id=test_user.id, name='Food')
+        rent = Category(user_id=test_user.id, name='Rent')
+        db.session.add_all([food, rent])
+        db.session.flush()
+        for i in range(45):
+            db.session.add(Expense(
+                user_id=test_user.id,
+                category_id=food.id if i % 3 else rent.id,
+                amount=1 + i,
+                description=f'Expense {i:02d}',
+                date=date(2026, 3, 1) - timedelta(days=i // 4)
+            ))
+        db.session.commit()
+        return {'food': food.id, 'rent': rent.id}
+
+def _descriptions(html):
+    return re.findall(r'<td>(Expense \d\d)</td>', html)
+
+def _link(html, label):
+    match = re.search(r'href="([^"]+)"\s+class="pagination-item">\s*'
+                      + ('<i[^>]*></i> ' if label == 'Previous' else '')
+                      + label, html)
+    return match and match.group(1).replace('&amp;', '&')
+
+def test_cursor_round_trip():
+    """Test cursors decode to what was encoded and reject garbage."""
+    cursor = encode_cursor(date(2026, 3, 1), 42, 'next')
+    assert decode_cursor(cursor) == (date(2026, 3, 1), 42, 'next')
+    with pytest.raises(InvalidCursor):
+        decode_cursor('not-a-cursor')
+
+def test_keyset_pages_cover_every_expense(client, auth, many_expenses):
+    """Test next/prev links walk the list without gaps or repeats."""
+    auth.login()
+    html = client.get('/expenses/expenses').get_data(as_text=True)
+    first = _descriptions(html)
+    assert len(first) == 20
+    assert '45 expenses' in html
+    assert _link(html, 'Previous') is None
+
+    seen = list(first)
+    url = _link(html, 'Next')
+    pages = [html]
+    while url:
+        html = client.get(url).get_data(as_text=True)
+        pages.append(html)
+        seen.extend(_descriptions(html))
+        url = _link(html, 'Next')
+
+    assert len(pages) == 3
+    assert sorted(seen) == [f'Expense {i:02d}' for i in range(45)]
+    assert len(set(seen)) == 45
+
+    # Going back from the last page returns the middle page unchanged
+    html = client.get(_link(pages[-1], 'Previous')).get_data(as_text=True)
+    assert _descriptions(html) == _descriptions(pages[1])
+
+def test_keyset_pagination_keeps_filters(client, auth, many_expenses):
+    """Test filters carry over to the cursor links."""
+    auth.login()
+    html = client.get(
+        f'/expenses/expenses?category={many_expenses["food"]}'
+        '&from=2026-01-01'
+    ).get_data(as_text=True)
+    assert '30 expenses' in html
+    next_url = _link(html, 'Next')
+    assert f'category={many_expenses["food"]}' in next_url
+    assert 'from=2026-01-01' in next_url
+
+    html = client.get(next_url).get_data(as_text=True)
+    assert len(_descriptions(html)) == 10
+    assert _link(html, 'Next') is None
+
+def test_invalid_cursor_falls_back_to_first_page(client, auth,
+                                                 many_expenses):
+    """Test a tampered cursor shows the first page instead of failing."""
+    auth.login()
+    response = client.get('/expenses/expenses?cursor=%%%')
+    assert response.status_code == 200
+    assert len(_descriptions(response.get_data(as_text=True))) == 20
+
+def test_deep_pages_use_the_date_index(app, client, auth, many_expenses,
+                                       queries):
+    """Test page queries search the index instead of counting rows."""
+    auth.login()
+    html = client.get('/expenses/expenses').get_data(as_text=True)
+    next_url = _link(html, 'Next')
+
+    queries.start()
+    try:
+        client.get(next_url)
+    finally:
+        queries.stop()
+
+    # The total is cached for this data version
+    assert not queries.matching('count(')
+    page_sql = [s for s in queries.matching('LIMIT')
+                if '(expenses.date, expenses.id) <' in s]
+    assert len(page_sql) == 1
+
+def test_quick_add_returns_to_dashboard(app, client, auth, many_expenses):
+    """Test a quick add saves the expense and redirects to the dashboard."""
+    auth.login()
+    response = client.post('/expenses/expenses/quick-add', data={
+        'category_id': many_expenses['food'],
+        'amount': '4.20',
+        'description': 'Quick coffee',
+        'payment_method': 'cash'
+    })
+    assert response.status_code == 302
+    assert response.headers['Location'].endswith('/')
+
+    with app.app_context():
+        assert Expense.query.filter_by(description='Quick coffee').count() == 1
@@ -0,0 +1,64 @@
+"""Test cases for cached template fragments."""
+from datetime import date
+from flask import render_template_string
+from flask_login import login_user
+from app import db
+from app.fragment_cache import fragment_cache
+from app.models import User
+
+def _fragments(app):
+    with app.app_context():
+        return fragment_cache.stats()['fragments']
+
+def test_repeat_renders_hit_the_cache(app, client, auth, test_user,
+                                      sample_data):
+    """Test a second dashboard reuses its fragments byte for byte."""
+    auth.login()
+    first = client.get('/').get_data(as_text=True)
+    before = _fragments(app)['dashboard/index.html:recent-expenses']
+    second = client.get('/').get_data(as_text=True)
+    assert first == second
+
+    after = _fragments(app)['dashboard/index.html:recent-expenses']
+    assert after['misses'] == before['misses']
+    assert after['hits'] == before['hits'] + 1
+    assert after['render_ms'] > 0
+    assert after['saved_ms'] > before['saved_ms']
+
+def test_writes_render_fresh_fragments(app, client, auth, test_user,
+                                       sample_data):
+    """Test a new expense shows up in the cached recent list."""
+    auth.login()
+    assert 'Cache buster' not in client.get('/').get_data(as_text=True)
+    before = _fragments(app)['dashboard/index.html:recent-expenses']
+
+    response = client.post('/expenses/expenses/add', data={
+        'amount': '99.99',
+        'description': 'Cache buster',
+        'category_id': sample_data['categories'][0].id,
+        'date': date.today().isoformat(),
+        'recurrence_frequency': ''
+    })
+    assert response.status_code == 302
+    assert 'Cache buster' in client.get('/').get_data(as_text=True)
+
+    stats = _fragments(app)['dashboard/index.html:recent-expenses']
+    assert stats['misses'] == before['misses'] + 1
+
+def test_ttl_and_anonymous_renders(app, test_user):
+    """Test expired fragments re-render and anonymous ones never cache."""
+    ticks = iter(range(100))
+    def render(ttl):
+        source = "{% cache 'clock-' ~ ttl, ttl %}{{ tick() }}{% endcache %}"
+        return render_template_string(source, ttl=ttl,
+                                      tick=lambda: next(ticks))
+
+    with app.test_request_context():
+        assert render(60) == '0'
+        assert render(60) == '1'
+
+        login_user(db.session.get(User, test_user.id))
+        assert render(60) == '2'
+        assert render(60) == '2'
+        assert render(0) == '3'
+        assert render(0) == '4'
@@ -0,0 +1,149 @@
+"""Test cases for bulk expense import."""
+from datetime import date
+from decimal import Decimal
+from io import BytesIO, StringIO
+from app import db, importer, recurring
+from app.exports import EXPORT_HEADER, export_query, iter_expense_csv
+from app.models import (
+    BudgetAlert, Category, Expense, MonthlyCategoryTotal, User
+)
+
+def _csv(*rows):
+    lines = [','.join(EXPORT_HEADER)]
+    lines.extend(','.join(row) for row in rows)
+    return '\n'.join(lines) + '\n'
+
+def test_import_validates_and_maps_categories(app, test_user):
+    """Test rows are validated, categories mapped and rollups updated."""
+    data = _csv(
+        ['2026-03-01', 'Food', 'Groceries', '12.50', 'cash', 'No', '', ''],
+        ['2026-03-02', 'food', 'Lunch', '7.5', 'Credit Card', 'Yes',
+         'monthly', 'with team'],
+        ['2026-03-03', 'Travel', 'Train', '20', '', 'No', '', ''],
+        ['03/04/2026', 'Food', 'Bad date', '1', '', 'No', '', ''],
+        ['2026-03-05', 'Food', 'Negative', '-4', '', 'No', '', ''],
+        ['2026-03-06', 'Food', 'Bad method', '4', 'cheque', 'No', '', ''],
+    )
+    with app.app_context():
+        db.session.add(Category(user_id=test_user.id, name='Food'))
+        db.session.commit()
+
+        progress = []
+        result = importer.import_expenses(
+            test_user.id, StringIO(data), batch_size=2,
+            progress=lambda r: progress.append(r.processed)
+        )
+
+        assert result.processed == 6
+        assert result.imported == 3
+        assert result.created_categories == ['Travel']
+        assert [line for line, _ in result.errors] == [5, 6, 7]
+        assert result.errors[0][1].startswith('Date')
+        assert progress == [2, 6]  # After each inserted batch
+
+        lunch = Expense.query.filter_by(description='Lunch').one()
+        assert lunch.payment_method == 'credit_card'
+        assert lunch.is_recurring
+        assert lunch.amount == Decimal('7.50')
+        assert lunch.next_due is None
+
+        food = Category.query.filter_by(user_id=test_user.id,
+                                        name='Food').one()
+        rollup = MonthlyCategoryTotal.query.filter_by(
+            category_id=food.id, year=2026, month=3
+        ).one()
+        assert rollup.total == Decimal('20.00')
+        assert rollup.count == 2
+        assert db.session.get(User, test_user.id).data_version > 0
+
+def test_import_raises_budget_alerts(app, test_user):
+    """Test imported spending is checked against category budgets."""
+    data = _csv(
+        ['2026-03-01', 'Food', 'Groceries', '300', '', 'No', '', ''],
+        ['2026-03-02', 'Food', 'Dinner', '200', '', 'No', '', ''],
+    )
+    with app.app_context():
+        db.session.add(Category(user_id=test_user.id, name='Food',
+                                budget_amount=Decimal('100.00'),
+                                alert_threshold=80))
+        db.session.commit()
+
+        result = importer.import_expenses(test_user.id, StringIO(data))
+        assert result.imported == 2
+        alerts = BudgetAlert.query.order_by(BudgetAlert.id).all()
+        assert [a.alert_type for a in alerts] == ['threshold', 'overspent']
+        assert {(a.year, a.month) for a in alerts} == {(2026, 3)}
+
+def test_import_rejects_missing_columns_and_categories(app, test_user):
+    """Test header checks and the no-create-categories mode."""
+    with app.app_context():
+        result = importer.import_expenses(test_user.id,
+                                          StringIO('Date,Amount\n'))
+        assert result.imported == 0
+        assert 'Missing columns' in result.errors[0][1]
+
+        data = _csv(['2026-01-01', 'Unknown', 'Thing', '3', '', 'No', '', ''])
+        result = importer.import_expenses(test_user.id, StringIO(data),
+                                          create_missing_categories=False)
+        assert result.imported == 0
+        assert 'unknown category' in result.errors[0][1]
+
+def test_export_round_trips_through_import(app, client, auth, test_user,
+                                           sample_data):
+    """Test an export can be uploaded back through the import endpoint."""
+    with app.app_context():
+        # Sample data uses shorthand payment methods the form rejects
+        Expense.query.update({'payment_method': 'cash'})
+        db.session.commit()
+        before = Expense.query.count()
+
+    auth.login()
+    exported = client.get('/reports/export/expenses').get_data()
+
+    response = client.post('/expenses/expenses/import', data={
+        'file': (BytesIO(exported), 'expenses.csv'),
+        'create_categories': 'y'
+    }, content_type='multipart/form-data')
+    assert response.status_code == 302
+
+    with app.app_context():
+        assert Expense.query.count() == before * 2
+
+def test_recurring_history_is_not_generated_again(app, test_user):
+    """Test an exported series imports as history, without duplicates."""
+    with app.app_context():
+        category = Category(user_id=test_user.id, name='Home')
+        db.session.add(category)
+        db.session.commit()
+        db.session.add(Expense(user_id=test_user.id, category_id=category.id,
+                               amount=Decimal('900.00'), description='Rent',
+                               date=date(2026, 1, 1), is_recurring=True,
+                               recurrence_frequency='monthly'))
+        db.session.commit()
+        recurring.materialize(until=date(2026, 10, 1))
+        exported = ''.join(iter_expense_csv(export_query(test_user.id)))
+
+        other = User(username='other', email='other@example.com')
+        other.set_password('password123')
+        db.session.add(other)
+        db.session.commit()
+        result = importer.import_expenses(other.id, StringIO(exported))
+        assert result.imported == 10
+
+        recurring.materialize(until=date(2026, 10, 1))
+        assert Expense.query.filter_by(user_id=other.id).count() == 10
+
+def test_import_cli(app, runner, test_user, tmp_path):
+    """Test the import-expenses command reports its progress."""
+    path = tmp_path / 'expenses.csv'
+    path.write_text(_csv(
+        ['2026-02-01', 'Rent', 'February rent', '900', 'bank_transfer',
+         'Yes', 'monthly', ''],
+    ))
+
+    result = runner.invoke(args=['import-expenses', 'test_user', str(path)])
+    assert result.exit_code == 0
+    assert 'Imported 1 of 1 rows (0 errors).' in result.output
+
+    result = runner.invoke(args=['import-expenses', 'nobody', str(path)])
+    assert result.exit_code != 0
@@ -0,0 +1,77 @@
+"""Test cases for per-request timing instrumentation."""
+import pytest
+from app import create_app, db
+from app.instrumentation import Histogram
+from app.models import User
+from config import TestingConfig
+from tests.auth_fixture import AuthActions
+
+@pytest.fixture
+def instrumented_app(monkeypatch):
+    """Create an application with instrumentation switched on."""
+    monkeypatch.setattr(TestingConfig, 'INSTRUMENTATION_ENABLED', True)
+    monkeypatch.setattr(TestingConfig, 'INSTRUMENTATION_TOKEN', 's3cret')
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        user = User(username='test_user', email='test@example.com')
+        user.set_password('password123')
+        db.session.add(user)
+        db.session.commit()
+    return app
+
+def test_histogram_percentiles():
+    """Test bucket counts and percentile estimates."""
+    histogram = Histogram((1, 10, 100))
+    for value in (0.5, 2, 3, 50, 500):
+        histogram.observe(value)
+    data = histogram.as_dict()
+    assert data['buckets'] == {'<=1': 1, '<=10': 2, '<=100': 1, '>100': 1}
+    assert data['p50'] == 10
+    assert data['p99'] == 500
+    assert data['max'] == 500
+
+def test_server_timing_header(instrumented_app):
+    """Test responses report SQL, render and total time."""
+    client = instrumented_app.test_client()
+    AuthActions(client).login()
+
+    response = client.get('/expenses/expenses')
+    header = response.headers['Server-Timing']
+    assert header.startswith('sql;dur=')
+    assert 'queries"' in header
+    assert 'render;dur=' in header
+    assert 'total;dur=' in header
+
+def test_stats_endpoint_aggregates_per_endpoint(instrumented_app):
+    """Test histograms are served only with the configured token."""
+    client = instrumented_app.test_client()
+    AuthActions(client).login()
+    client.get('/expenses/expenses')
+    client.get('/expenses/expenses')
+
+    assert client.get('/_stats').status_code == 403
+    response = client.get('/_stats',
+                          headers={'Authorization': 'Bearer wrong'})
+    assert response.status_code == 403
+
+    response = client.get('/_stats',
+                          headers={'Authorization': 'Bearer s3cret'})
+    assert response.status_code == 200
+    data = response.get_json()
+    listing = data['endpoints']['expenses.index']
+    assert listing['requests'] == 2
+    assert listing['queries']['count'] == 2
+    assert listing['queries']['max'] >= 3
+    assert listing['render_ms']['sum'] > 0
+    assert listing['slowest_statement']['sql'].startswith('SELECT')
+    assert 'instrumentation.stats' not in data['endpoints']
+    assert 'hit_rate' in data['view_cache']
+    assert 'fragments' in data['fragment_cache']
+
+def test_disabled_by_default(app, client):
+    """Test nothing is recorded or exposed unless enabled."""
+    response = client.get('/auth/login')
+    assert 'Server-Timing' not in response.headers
+    assert client.get('/_stats').status_code == 404
+    assert 'instrumentation' not in app.extensions
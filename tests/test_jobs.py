@@ -0,0 +1,118 @@
+"""Test cases for the background job runner."""
+import threading
+from datetime import timedelta
+import pytest
+from app import create_app, db, jobs
+from app.models import Job
+from config import TestingConfig
+
+calls = []
+
+@jobs.task('tests.record')
+def _record(value):
+    calls.append(value)
+
+@jobs.task('tests.flaky', max_attempts=2)
+def _flaky(value):
+    raise RuntimeError(f'failed on {value}')
+
+@pytest.fixture(autouse=True)
+def _reset_calls():
+    calls.clear()
+
+def test_jobs_run_after_commit_only(app):
+    """Test queued jobs run on commit and vanish with a rollback."""
+    with app.app_context():
+        jobs.enqueue('tests.record', {'value': 'rolled back'})
+        db.session.rollback()
+        assert calls == []
+        assert Job.query.count() == 0
+
+        jobs.enqueue('tests.record', {'value': 'committed'})
+        assert calls == []
+        db.session.commit()
+        assert calls == ['committed']
+
+        # Completed jobs are removed; unknown names are refused up front
+        assert Job.query.count() == 0
+        with pytest.raises(ValueError):
+            jobs.enqueue('tests.missing')
+
+def test_failed_jobs_retry_then_give_up(app):
+    """Test failures back off and stop at max_attempts."""
+    with app.app_context():
+        job_id = jobs.enqueue('tests.flaky', {'value': 1})
+        db.session.commit()
+
+        job = db.session.get(Job, job_id)
+        assert (job.status, job.attempts) == ('queued', 1)
+        assert 'failed on 1' in job.last_error
+        assert job.run_at > job.created_at
+
+        # Not due yet, so a poll leaves it alone
+        assert jobs.run_pending() == 0
+
+        job.run_at = job.created_at
+        db.session.commit()
+        assert jobs.run_pending() == 1
+        db.session.refresh(job)
+        assert (job.status, job.attempts) == ('failed', 2)
+        assert jobs.run_pending() == 0
+
+def test_claimed_jobs_run_once(app):
+    """Test a job another worker claimed is skipped, stale claims requeue."""
+    with app.app_context():
+        app.extensions['jobs']['mode'] = 'worker'
+        job_id = jobs.enqueue('tests.record', {'value': 'once'})
+        db.session.commit()
+
+        job = db.session.get(Job, job_id)
+        job.status = 'running'
+        job.locked_at = job.created_at
+        db.session.commit()
+        assert not jobs.run_job(job_id)
+
+        app.config['JOBS_LOCK_TIMEOUT'] = 0
+        assert jobs.run_pending() == 1
+        assert not jobs.run_job(job_id)
+        assert calls == ['once']
+
+def test_delayed_jobs_wait_for_worker(app, runner):
+    """Test delayed jobs are left for the worker command."""
+    with app.app_context():
+        job_id = jobs.enqueue('tests.record', {'value': 'later'},
+                              delay=timedelta(seconds=-1))
+        db.session.commit()
+        assert calls == []
+
+    result = runner.invoke(args=['worker', '--once'])
+    assert result.exit_code == 0, result.output
+    assert 'Ran 1 jobs.' in result.output
+    assert calls == ['later']
+    with app.app_context():
+        assert db.session.get(Job, job_id) is None
+
+def test_thread_mode_runs_off_the_request_thread(monkeypatch, tmp_path):
+    """Test the thread pool runs committed jobs in a worker thread."""
+    monkeypatch.setattr(TestingConfig, 'JOBS_MODE', 'thread')
+    monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_DATABASE_URI',
+                        f'sqlite:///{tmp_path / "jobs.db"}')
+    app = create_app('testing')
+    done = threading.Event()
+    threads = []
+
+    @jobs.task('tests.thread')
+    def _thread_job():
+        threads.append(threading.current_thread().name)
+        done.set()
+
+    try:
+        with app.app_context():
+            db.create_all()
+            jobs.enqueue('tests.thread')
+            db.session.commit()
+        assert done.wait(5)
+        assert threads[0].startswith('jobs')
+    finally:
+        jobs.job_runner.shutdown(app)
+        jobs.TASKS.pop('tests.thread', None)
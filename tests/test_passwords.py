@@ -0,0 +1,64 @@
+"""Test cases for offloaded password hashing."""
+from werkzeug.security import generate_password_hash
+from app import create_app, db
+from app.models import User
+from app.passwords import hash_method, password_hasher
+from config import TestingConfig
+
+def test_hashes_use_the_configured_method(app, test_user):
+    """Test hashes carry the config's method and verify on the pool."""
+    with app.app_context():
+        user = db.session.get(User, test_user.id)
+        assert hash_method(user.password_hash) == \
+            TestingConfig.PASSWORD_HASH_METHOD
+        assert not password_hasher.needs_rehash(user.password_hash)
+        assert user.check_password('password123')
+        assert not user.check_password('wrong')
+
+def test_login_rehashes_outdated_hashes(app, auth, test_user):
+    """Test a hash made with other parameters is upgraded at login."""
+    with app.app_context():
+        user = db.session.get(User, test_user.id)
+        user.password_hash = generate_password_hash('password123',
+                                                    'pbkdf2:sha256:2000')
+        db.session.commit()
+        version = user.data_version
+
+    auth.login()
+
+    with app.app_context():
+        user = db.session.get(User, test_user.id)
+        assert hash_method(user.password_hash) == \
+            TestingConfig.PASSWORD_HASH_METHOD
+        assert user.check_password('password123')
+        # A rehash does not invalidate cached views
+        assert user.data_version == version
+
+def test_saturated_pool_rejects_with_503(monkeypatch):
+    """Test logins are shed quickly once every hashing slot is taken."""
+    monkeypatch.setattr(TestingConfig, 'PASSWORD_HASH_WORKERS', 1)
+    monkeypatch.setattr(TestingConfig, 'PASSWORD_HASH_QUEUE_DEPTH', 0)
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        user = User(username='busy', email='busy@example.com')
+        user.set_password('password123')
+        db.session.add(user)
+        db.session.commit()
+
+    slots = app.extensions['passwords']['slots']
+    assert slots.acquire(blocking=False)
+    try:
+        response = app.test_client().post('/auth/login', data={
+            'username': 'busy', 'password': 'password123'
+        })
+    finally:
+        slots.release()
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == \
+        str(TestingConfig.PASSWORD_HASH_RETRY_AFTER)
+
+    response = app.test_client().post('/auth/login', data={
+        'username': 'busy', 'password': 'password123'
+    })
+    assert response.status_code == 302
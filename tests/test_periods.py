@@ -0,0 +1,96 @@
+"""Test cases for index-friendly reporting periods."""
+from datetime import date, datetime
+from decimal import Decimal
+import pytest
+from sqlalchemy import func, select
+from app import db
+from app.models import Category, Expense, MonthlyCategoryTotal, User
+from app.periods import Period, recent_months, shift_month
+
+def _query_plan(stmt):
+    """Return the SQLite query plan details for a statement."""
+    compiled = stmt.compile(
+        dialect=db.engine.dialect,
+        compile_kwargs={'literal_binds': True}
+    )
+    rows = db.session.execute(
+        db.text(f'EXPLAIN QUERY PLAN {compiled}')
+    ).all()
+    return ' '.join(row[-1] for row in rows)
+
+def test_month_period_is_half_open():
+    """Test month periods end on the first of the next month."""
+    period = Period.month(2025, 12)
+    assert period.start == date(2025, 12, 1)
+    assert period.end == date(2026, 1, 1)
+    assert period.is_month_aligned
+    assert period.month_keys() == [(2025, 12)]
+
+def test_week_and_custom_periods():
+    """Test week and custom periods cover the expected days."""
+    week = Period.week(2026, 1)
+    assert week.start == date(2025, 12, 29)
+    assert week.end == date(2026, 1, 5)
+    assert not week.is_month_aligned
+
+    custom = Period.custom(date(2026, 2, 10), datetime(2026, 2, 12, 18, 30))
+    assert custom.end == date(2026, 2, 13)
+    with pytest.raises(ValueError):
+        Period(date(2026, 1, 2), date(2026, 1, 1))
+
+def test_month_helpers():
+    """Test month arithmetic across year boundaries."""
+    assert shift_month(2026, 1, -1) == (2025, 12)
+    assert shift_month(2025, 11, 14) == (2027, 1)
+    assert recent_months(3, date(2026, 2, 15)) == [
+        (2025, 12), (2026, 1), (2026, 2)
+    ]
+    assert Period.months(2025, 11, 3).month_keys() == [
+        (2025, 11), (2025, 12), (2026, 1)
+    ]
+
+def test_get_spending_for_unaligned_period(app, test_user):
+    """Test week/custom periods are summed from raw expenses."""
+    with app.app_context():
+        category = Category(user_id=test_user.id, name='Food')
+        db.session.add(category)
+        db.session.flush()
+        db.session.add_all([
+            Expense(user_id=test_user.id, category_id=category.id,
+                    amount=Decimal('5.00'), description='In',
+                    date=date(2026, 3, 2)),
+            Expense(user_id=test_user.id, category_id=category.id,
+                    amount=Decimal('9.00'), description='Out',
+                    date=date(2026, 3, 9)),
+        ])
+        db.session.commit()
+
+        user = db.session.get(User, test_user.id)
+        assert user.get_spending(Period.week(2026, 10)) == Decimal('5.00')
+        assert user.get_spending(
+            Period.custom(date(2026, 3, 1), date(2026, 3, 9)), category.id
+        ) == Decimal('14.00')
+        assert user.get_spending(Period.month(2026, 3)) == Decimal('14.00')
+
+def test_expense_range_filter_uses_index(app):
+    """Test the date-range predicate is served by idx_user_expense_date."""
+    with app.app_context():
+        stmt = select(func.sum(Expense.amount)).where(
+            Expense.user_id == 1,
+            Period.month(2026, 3).filter(Expense.date)
+        )
+        plan = _query_plan(stmt)
+        assert 'idx_user_expense_date' in plan
+        assert 'date>' in plan and 'date<' in plan
+
+def test_rollup_filter_uses_index(app):
+    """Test rollup predicates across a year boundary use an index."""
+    with app.app_context():
+        period = Period.months(2025, 11, 4)
+        stmt = select(func.sum(MonthlyCategoryTotal.total)).where(
+            MonthlyCategoryTotal.user_id == 1,
+            period.rollup_filter(MonthlyCategoryTotal)
+        )
+        plan = _query_plan(stmt)
+        assert 'USING INDEX idx_rollup_user_period' in plan
+        assert 'SCAN monthly_category_totals' not in plan
@@ -0,0 +1,63 @@
+"""Query budgets for the main read paths.
+
+Each route declares the most SQL statements one request may run. A lazy
+load per rendered row (an N+1) pushes a route over its budget, and the
+failure lists every statement that ran.
+"""
+from datetime import date
+from decimal import Decimal
+import pytest
+from app import db
+from app.models import Category, Expense
+
+QUERY_BUDGETS = {
+    # user, cached count, page with categories, filter categories
+    '/expenses/expenses': 4,
+    # user, ranked matches with categories, filter categories
+    '/expenses/expenses?q=expense': 3,
+    # user, snapshot, recent expenses with categories, alerts
+    '/': 4,
+    # user, categories, one rollup aggregate
+    '/reports/': 3,
+    '/reports/trends': 3,
+    # user, categories, month spending, budgets, alerts, month total
+    '/budgets/': 6,
+    # user, one rollup aggregate
+    '/reports/api/spending-history?months=12': 2,
+}
+
+def _add_categories(user_id, count):
+    """Add categories with one expense each to grow the rendered rows."""
+    for index in range(count):
+        category = Category(user_id=user_id, name=f'Extra {index}',
+                            budget_amount=100)
+        db.session.add(category)
+        db.session.flush()
+        db.session.add(Expense(user_id=user_id, category_id=category.id,
+                               amount=Decimal('9.99'),
+                               description=f'Extra expense {index}',
+                               date=date.today()))
+    db.session.commit()
+
+@pytest.mark.parametrize('url', sorted(QUERY_BUDGETS))
+def test_route_stays_within_query_budget(app, client, auth, test_user,
+                                         sample_data, queries, url):
+    """Test the route's query count does not grow with the data shown."""
+    with app.app_context():
+        _add_categories(test_user.id, 15)
+
+    auth.login()
+    with queries.budget(QUERY_BUDGETS[url], label=url):
+        response = client.get(url)
+    assert response.status_code == 200
+
+def test_budget_failure_lists_statements(app, queries, test_user):
+    """Test an exceeded budget reports the statements that ran."""
+    with app.app_context():
+        with pytest.raises(AssertionError) as excinfo:
+            with queries.budget(1, label='two lookups'):
+                db.session.get(Category, 1)
+                db.session.get(Expense, 1)
+    message = str(excinfo.value)
+    assert 'two lookups ran 2 queries, budget is 1' in message
+    assert '1. SELECT categories.id' in message
@@ -0,0 +1,169 @@
+"""Test cases for the recurring expense materializer."""
+from datetime import date
+from decimal import Decimal
+from app import db, recurring, rollups
+from app.models import Category, Expense, MonthlyCategoryTotal
+
+def _template(user_id, category_id, day, frequency, amount='1200.00'):
+    expense = Expense(user_id=user_id, category_id=category_id,
+                      amount=Decimal(amount), description='Rent payment',
+                      date=day, is_recurring=True,
+                      recurrence_frequency=frequency)
+    db.session.add(expense)
+    db.session.commit()
+    return expense
+
+def _category(user_id):
+    category = Category(user_id=user_id, name='Home')
+    db.session.add(category)
+    db.session.commit()
+    return category
+
+def _occurrence_dates(template_id):
+    return [e.date for e in Expense.query.filter_by(
+        recurring_parent_id=template_id
+    ).order_by(Expense.date)]
+
+def test_next_occurrence_keeps_the_anchor_day():
+    """Test month-end templates clamp to short months and recover."""
+    assert recurring.next_occurrence(date(2026, 1, 31), 'monthly', 31) == \
+        date(2026, 2, 28)
+    assert recurring.next_occurrence(date(2026, 2, 28), 'monthly', 31) == \
+        date(2026, 3, 31)
+    assert recurring.next_occurrence(date(2024, 2, 29), 'yearly', 29) == \
+        date(2025, 2, 28)
+    assert recurring.next_occurrence(date(2026, 1, 1), 'weekly', 1) == \
+        date(2026, 1, 8)
+
+def test_materialize_catches_up_once(app, test_user):
+    """Test due occurrences are generated once, with rollups kept in step."""
+    with app.app_context():
+        category = _category(test_user.id)
+        rent = _template(test_user.id, category.id, date(2026, 1, 31),
+                         'monthly')
+        gym = _template(test_user.id, category.id, date(2026, 3, 2),
+                        'weekly', '10.00')
+        plain = Expense(user_id=test_user.id, category_id=category.id,
+                        amount=Decimal('5.00'), description='Coffee',
+                        date=date(2026, 1, 5))
+        db.session.add(plain)
+        db.session.commit()
+        assert rent.next_due == date(2026, 2, 28)
+        assert plain.next_due is None
+
+        result = recurring.materialize(until=date(2026, 4, 1), batch_size=1)
+        assert result.as_dict() == {
+            'templates': 2, 'occurrences': 6, 'batches': 2
+        }
+        assert _occurrence_dates(rent.id) == [date(2026, 2, 28),
+                                              date(2026, 3, 31)]
+        assert _occurrence_dates(gym.id) == [
+            date(2026, 3, 9), date(2026, 3, 16), date(2026, 3, 23),
+            date(2026, 3, 30)
+        ]
+
+        # A second run for the same day finds nothing due
+        again = recurring.materialize(until=date(2026, 4, 1))
+        assert again.occurrences == 0
+        assert db.session.get(Expense, rent.id).next_due == date(2026, 4, 30)
+
+        generated = Expense.query.filter_by(
+            recurring_parent_id=rent.id
+        ).first()
+        assert not generated.is_recurring
+        assert generated.amount == Decimal('1200.00')
+
+        def snapshot():
+            return sorted(
+                (r.category_id, r.year, r.month, r.total, r.count)
+                for r in MonthlyCategoryTotal.query
+            )
+        incremental = snapshot()
+        rollups.rebuild()
+        assert snapshot() == incremental
+
+def test_existing_occurrence_does_not_block_the_batch(app, test_user):
+    """Test an occurrence already on a due date is skipped, not retried."""
+    with app.app_context():
+        category = _category(test_user.id)
+        rent = _template(test_user.id, category.id, date(2026, 1, 10),
+                         'monthly')
+        gym = _template(test_user.id, category.id, date(2026, 1, 12),
+                        'monthly', '10.00')
+        recurring.materialize(until=date(2026, 2, 15))
+
+        # An occurrence edited onto the template's next due date
+        moved = Expense.query.filter_by(recurring_parent_id=rent.id).one()
+        moved.date = date(2026, 3, 10)
+        db.session.commit()
+
+        result = recurring.materialize(until=date(2026, 3, 15))
+        assert result.as_dict() == {
+            'templates': 2, 'occurrences': 1, 'batches': 1
+        }
+        assert db.session.get(Expense, rent.id).next_due == \
+            date(2026, 4, 10)
+        assert _occurrence_dates(gym.id) == [date(2026, 2, 12),
+                                             date(2026, 3, 12)]
+
+        def snapshot():
+            return sorted((r.year, r.month, r.total, r.count)
+                          for r in MonthlyCategoryTotal.query)
+        incremental = snapshot()
+        rollups.rebuild()
+        assert snapshot() == incremental
+
+def test_materialize_reads_only_due_templates(app, test_user, queries):
+    """Test a run does not scan non-recurring or future templates."""
+    with app.app_context():
+        category = _category(test_user.id)
+        db.session.add_all(
+            Expense(user_id=test_user.id, category_id=category.id,
+                    amount=Decimal('1.00'), description='Snack',
+                    date=date(2026, 1, day))
+            for day in range(1, 29)
+        )
+        _template(test_user.id, category.id, date(2026, 12, 1), 'monthly')
+        db.session.commit()
+
+        queries.start()
+        result = recurring.materialize(until=date(2026, 6, 1))
+        queries.stop()
+        assert result.occurrences == 0
+        assert len(queries.statements) == 1
+        assert 'next_due' in queries.statements[0]
+
+def test_schedule_changes(app, test_user):
+    """Test edits reschedule without backfilling and can stop recurrence."""
+    with app.app_context():
+        category = _category(test_user.id)
+        template = _template(test_user.id, category.id, date(2026, 1, 10),
+                             'monthly')
+        recurring.materialize(until=date(2026, 3, 15))
+        assert _occurrence_dates(template.id) == [date(2026, 2, 10),
+                                                  date(2026, 3, 10)]
+
+        template = db.session.get(Expense, template.id)
+        template.recurrence_frequency = 'weekly'
+        db.session.commit()
+        assert template.next_due == date(2026, 3, 17)
+
+        template.is_recurring = False
+        db.session.commit()
+        assert template.next_due is None
+
+        # Deleting a template keeps what it generated
+        db.session.delete(template)
+        db.session.commit()
+        assert Expense.query.count() == 2
+
+def test_materialize_cli(app, runner, test_user):
+    """Test the command reports what it generated."""
+    with app.app_context():
+        category = _category(test_user.id)
+        _template(test_user.id, category.id, date(2026, 1, 1), 'yearly')
+
+    result = runner.invoke(args=['materialize-recurring',
+                                 '--date', '2027-01-01'])
+    assert result.exit_code == 0, result.output
+    assert 'Generated 1 expenses from 1 recurring templates.' in result.output
@@ -0,0 +1,80 @@
+"""Test cases for the reports aggregation engine."""
+from datetime import date, datetime
+from decimal import Decimal
+from app import db
+from app.models import Category, Expense, User
+from app.periods import Period, shift_month
+from app.reporting import build_reports_dashboard, calculate_trend
+from tests.query_counter import count_queries
+
+def _add_categories(user_id, count):
+    for index in range(count):
+        category = Category(user_id=user_id, name=f'Extra {index}',
+                            budget_amount=100)
+        db.session.add(category)
+        db.session.flush()
+        db.session.add(Expense(user_id=user_id, category_id=category.id,
+                               amount=Decimal('12.34'), description='x',
+                               date=date.today()))
+    db.session.commit()
+
+def test_reports_dashboard_matches_per_period_queries(app, test_user,
+                                                      sample_data):
+    """Test derived figures equal the per-month/per-category sums."""
+    with app.app_context():
+        user = db.session.get(User, test_user.id)
+        now = datetime.now()
+        report = build_reports_dashboard(user, now)
+
+        for item in report['monthly_totals']:
+            assert item['total'] == user.get_spending(
+                Period.month(now.year, item['month'])
+            )
+
+        assert len(report['ytd_spending']) == 3
+        for category, total in report['ytd_spending']:
+            assert total == user.get_spending(Period.year(now.year),
+                                              category.id)
+
+        for trend in report['trends']:
+            recent = [
+                user.get_spending(Period.month(*shift_month(
+                    now.year, now.month, -offset)), trend['category'].id)
+                for offset in range(3)
+            ]
+            assert trend['trend'] == calculate_trend(recent)
+
+        for row in report['budget_vs_actual']:
+            assert row['actual'] == user.get_spending(
+                Period.month(now.year, now.month), row['category'].id
+            )
+            assert row['variance'] == row['budget'] - row['actual']
+
+def test_calculate_trend_handles_empty_base():
+    """Test trend is zero when the oldest month has no spending."""
+    assert calculate_trend([Decimal('10'), Decimal('5'), Decimal('0')]) == 0
+    assert calculate_trend(
+        [Decimal('150'), Decimal('5'), Decimal('100')]
+    ) == Decimal('50.0')
+
+def test_reports_index_query_count_is_constant(app, client, auth, test_user,
+                                               sample_data):
+    """Test the reports page cost does not grow with category count."""
+    auth.login()
+    with app.app_context():
+        engine = db.engine
+
+    with count_queries(engine) as baseline:
+        response = client.get('/reports/')
+    assert response.status_code == 200
+
+    with app.app_context():
+        _add_categories(test_user.id, 5)
+    # Reload the cached identity the writes invalidated
+    client.get('/auth/login')
+
+    with count_queries(engine) as grown:
+        response = client.get('/reports/')
+    assert response.status_code == 200
+    assert 'Extra 4' in response.get_data(as_text=True)
+    assert len(grown) == len(baseline)
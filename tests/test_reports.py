@@ -128,4 +128,91 @@ def test_category_trends(app, client, auth, test_user, sample_data):
     assert category.name in html
     assert 'Average Monthly' in html
     assert 'Maximum' in html
-    assert 'Minimum' in html
\ No newline at end of file
+    assert 'Minimum' in html
+
+def test_spending_history_batched_and_clamped(app, client, auth, test_user,
+                                              sample_data, queries):
+    """Test long horizons are clamped and served in one grouped query."""
+    auth.login()
+    app.config['SPENDING_HISTORY_MAX_MONTHS'] = 24
+
+    queries.start()
+    try:
+        response = client.get('/reports/api/spending-history?months=600')
+    finally:
+        queries.stop()
+
+    assert response.status_code == 200
+    data = response.get_json()
+    assert len(data) == 24
+    assert response.headers['X-History-Next-Offset'] == '24'
+    assert data[0]['total'] == 0  # Older than the sample data
+    assert data[-1]['total'] > 0
+    assert len(queries.matching('monthly_category_totals')) == 1
+
+    # Paging stops at the requested horizon
+    response = client.get('/reports/api/spending-history?months=600'
+                          '&offset=576')
+    assert len(response.get_json()) == 24
+    assert 'X-History-Next-Offset' not in response.headers
+    response = client.get('/reports/api/spending-history?months=600'
+                          '&offset=100000')
+    assert response.status_code == 400
+
+def test_spending_history_etag_and_breakdown(app, client, auth, test_user,
+                                             sample_data):
+    """Test 304 revalidation and the category breakdown modes."""
+    auth.login()
+    categories = sample_data['categories']
+    first, second = categories[0].id, categories[1].id
+
+    response = client.get('/reports/api/spending-history?months=3')
+    etag = response.headers['ETag']
+    assert etag
+    cached = client.get('/reports/api/spending-history?months=3',
+                        headers={'If-None-Match': etag})
+    assert cached.status_code == 304
+
+    combined = client.get(
+        f'/reports/api/spending-history?months=3'
+        f'&category_id={first}&category_id={second}&breakdown=1'
+    ).get_json()
+    for bucket in combined:
+        assert set(bucket['categories']) <= {str(first), str(second)}
+        assert bucket['total'] == pytest.approx(
+            sum(bucket['categories'].values())
+        )
+
+    everything = client.get(
+        '/reports/api/spending-history?months=3&breakdown=true'
+    ).get_json()
+    assert len(everything[-1]['categories']) == len(categories)
+
+def test_export_expenses_streams_with_filters(app, client, auth, test_user,
+                                              sample_data, monkeypatch):
+    """Test the export streams in chunks and honours its filters."""
+    from app import exports
+
+    monkeypatch.setattr(exports, 'EXPORT_CHUNK_SIZE', 10)
+    auth.login()
+    category = sample_data['categories'][0]
+
+    response = client.get('/reports/export/expenses')
+    assert response.is_streamed
+    rows = list(csv.reader(StringIO(response.get_data(as_text=True))))
+    assert len(rows) == 1 + 3 * 3 * 12  # header + every sample expense
+    dates = [row[0] for row in rows[1:]]
+    assert dates == sorted(dates, reverse=True)
+
+    now = datetime.now()
+    first_day = now.replace(day=1).strftime('%Y-%m-%d')
+    response = client.get(
+        f'/reports/export/expenses?category={category.id}&from={first_day}'
+    )
+    rows = list(csv.reader(StringIO(response.get_data(as_text=True))))[1:]
+    assert rows
+    assert {row[1] for row in rows} == {category.name}
+    assert all(row[0] >= first_day for row in rows)
+
+    response = client.get('/reports/export/expenses?to=not-a-date')
+    assert response.status_code == 400
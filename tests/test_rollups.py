@@ -0,0 +1,109 @@
+"""Test cases for monthly spending rollups."""
+from datetime import date
+from decimal import Decimal
+import pytest
+from app import db
+from app.models import Category, Expense, MonthlyCategoryTotal, User
+from app import rollups
+
+def _rollup(user_id, category_id, year, month):
+    return MonthlyCategoryTotal.query.filter_by(
+        user_id=user_id, category_id=category_id, year=year, month=month
+    ).first()
+
+@pytest.fixture
+def categories(app, test_user):
+    """Create two categories for the test user."""
+    with app.app_context():
+        food = Category(user_id=test_user.id, name='Food')
+        rent = Category(user_id=test_user.id, name='Rent')
+        db.session.add_all([food, rent])
+        db.session.commit()
+        return food.id, rent.id
+
+def test_rollup_tracks_insert_update_delete(app, test_user, categories):
+    """Test rollups follow inserts, date/category edits and deletes."""
+    food_id, rent_id = categories
+    with app.app_context():
+        expense = Expense(user_id=test_user.id, category_id=food_id,
+                          amount=Decimal('10.50'), description='Lunch',
+                          date=date(2026, 3, 5))
+        other = Expense(user_id=test_user.id, category_id=food_id,
+                        amount=Decimal('4.25'), description='Coffee',
+                        date=date(2026, 3, 9))
+        db.session.add_all([expense, other])
+        db.session.commit()
+
+        row = _rollup(test_user.id, food_id, 2026, 3)
+        assert row.total == Decimal('14.75')
+        assert row.count == 2
+
+        # Move the expense to another month and category
+        expense.date = date(2026, 4, 1)
+        expense.category_id = rent_id
+        expense.amount = Decimal('12.00')
+        db.session.commit()
+
+        assert _rollup(test_user.id, food_id, 2026, 3).total == Decimal('4.25')
+        moved = _rollup(test_user.id, rent_id, 2026, 4)
+        assert moved.total == Decimal('12.00')
+        assert moved.count == 1
+
+        db.session.delete(other)
+        db.session.commit()
+        emptied = _rollup(test_user.id, food_id, 2026, 3)
+        assert emptied.total == Decimal('0')
+        assert emptied.count == 0
+
+        user = db.session.get(User, test_user.id)
+        assert user.get_monthly_spending(2026, 4) == Decimal('12.00')
+        assert user.get_category_spending(food_id, 2026, 3) == Decimal('0')
+
+def test_rollup_ignores_unrelated_edits(app, test_user, categories):
+    """Test editing non-aggregated fields leaves rollups untouched."""
+    food_id, _ = categories
+    with app.app_context():
+        expense = Expense(user_id=test_user.id, category_id=food_id,
+                          amount=Decimal('8.00'), description='Snack',
+                          date=date(2026, 1, 2))
+        db.session.add(expense)
+        db.session.commit()
+
+        expense.description = 'Bigger snack'
+        db.session.commit()
+
+        row = _rollup(test_user.id, food_id, 2026, 1)
+        assert row.total == Decimal('8.00')
+        assert row.count == 1
+
+def test_rebuild_rollups_command(app, runner, test_user, categories):
+    """Test the CLI rebuild restores rollups from raw expenses."""
+    food_id, _ = categories
+    with app.app_context():
+        db.session.add_all([
+            Expense(user_id=test_user.id, category_id=food_id,
+                    amount=Decimal('3.00'), description='A',
+                    date=date(2025, 12, 31)),
+            Expense(user_id=test_user.id, category_id=food_id,
+                    amount=Decimal('7.00'), description='B',
+                    date=date(2025, 12, 1)),
+        ])
+        db.session.commit()
+        MonthlyCategoryTotal.query.delete()
+        db.session.commit()
+
+    result = runner.invoke(args=['rebuild-rollups'])
+    assert result.exit_code == 0
+    assert 'Rebuilt 1 monthly rollup rows.' in result.output
+
+    with app.app_context():
+        row = _rollup(test_user.id, food_id, 2025, 12)
+        assert row.total == Decimal('10.00')
+        assert row.count == 2
+
+def test_collect_deltas_nets_out_noop_changes():
+    """Test deltas that cancel out are dropped."""
+    deltas = {}
+    rollups.add_delta(deltas, 1, 2, date(2026, 5, 1), Decimal('5'), 1)
+    rollups.add_delta(deltas, 1, 2, date(2026, 5, 20), Decimal('-5'), -1)
+    assert deltas[(1, 2, 2026, 5)] == [Decimal('0'), 0]
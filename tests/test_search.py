@@ -0,0 +1,89 @@
+"""Test cases for expense full-text search."""
+import re
+from datetime import date
+import pytest
+from app import db, search
+from app.models import Category, Expense
+
+@pytest.fixture
+def searchable(app, test_user):
+    """Create a few expenses with distinctive descriptions and notes."""
+    with app.app_context():
+        travel = Category(user_id=test_user.id, name='Travel')
+        food = Category(user_id=test_user.id, name='Food')
+        db.session.add_all([travel, food])
+        db.session.flush()
+        db.session.add_all([
+            Expense(user_id=test_user.id, category_id=travel.id, amount=18,
+                    description='Uber ride home', date=date(2026, 3, 14)),
+            Expense(user_id=test_user.id, category_id=travel.id, amount=9,
+                    description='Bus ticket', receipt_note='uber surge, took bus',
+                    date=date(2026, 2, 2)),
+            Expense(user_id=test_user.id, category_id=food.id, amount=25,
+                    description='Uber Eats uber eats uber', date=date(2026, 1, 9)),
+            Expense(user_id=test_user.id, category_id=food.id, amount=4,
+                    description='Café au lait', date=date(2026, 3, 1)),
+        ])
+        db.session.commit()
+        return {'travel': travel.id, 'food': food.id}
+
+def _search(user_id, text):
+    query = Expense.query.filter_by(user_id=user_id)
+    return [e.description for e in search.apply_search(query, text)]
+
+def test_search_ranks_and_prefix_matches(app, test_user, searchable):
+    """Test matches come back best first and partial words match."""
+    with app.app_context():
+        results = _search(test_user.id, 'uber')
+        assert results[0] == 'Uber Eats uber eats uber'
+        assert set(results) == {'Uber ride home', 'Bus ticket',
+                                'Uber Eats uber eats uber'}
+
+        assert _search(test_user.id, 'ub rid') == ['Uber ride home']
+        assert _search(test_user.id, 'cafe') == ['Café au lait']
+        # Operators in user input are treated as plain words
+        assert _search(test_user.id, 'uber NOT "') == []
+
+def test_search_index_follows_updates_and_deletes(app, test_user, searchable):
+    """Test the triggers keep the index in sync with the expenses table."""
+    with app.app_context():
+        expense = Expense.query.filter_by(description='Uber ride home').one()
+        expense.description = 'Taxi to airport'
+        db.session.commit()
+        assert _search(test_user.id, 'airport') == ['Taxi to airport']
+        assert 'Taxi to airport' not in _search(test_user.id, 'uber')
+
+        db.session.delete(expense)
+        db.session.commit()
+        assert _search(test_user.id, 'airport') == []
+
+        search.rebuild()
+        assert len(_search(test_user.id, 'uber')) == 2
+
+def test_search_uses_the_fts_index(app, test_user, searchable):
+    """Test search is answered by FTS5 instead of scanning with LIKE."""
+    with app.app_context():
+        query = search.apply_search(
+            Expense.query.filter_by(user_id=test_user.id), 'uber'
+        )
+        compiled = query.statement.compile(
+            dialect=db.engine.dialect,
+            compile_kwargs={'literal_binds': True}
+        )
+        plan = ' '.join(row[-1] for row in db.session.execute(
+            db.text(f'EXPLAIN QUERY PLAN {compiled}')
+        ))
+        assert 'VIRTUAL TABLE INDEX' in plan
+        assert 'LIKE' not in str(query.statement)
+
+def test_search_combines_with_list_filters(client, auth, searchable):
+    """Test the expenses list searches within the selected category."""
+    auth.login()
+    html = client.get(
+        f'/expenses/expenses?q=uber&category={searchable["travel"]}'
+    ).get_data(as_text=True)
+    found = re.findall(r'<td>([^<]+)</td>', html)
+    assert 'Uber ride home' in found
+    assert 'Bus ticket' in found
+    assert 'Uber Eats uber eats uber' not in found
+    assert '2 best matches' in html
@@ -0,0 +1,87 @@
+"""Test cases for the synthetic data seeder."""
+from datetime import date
+from sqlalchemy import func
+from app import create_app, db, rollups, seed
+from app.models import (
+    Budget, BudgetAlert, Category, Expense, MonthlyCategoryTotal, User
+)
+
+END = date(2026, 3, 15)
+
+def _fingerprint():
+    """Summarise generated expenses independent of row ids."""
+    return db.session.query(
+        func.count(Expense.id), func.sum(Expense.amount),
+        func.min(Expense.date), func.max(Expense.date)
+    ).one()
+
+def test_seed_generates_requested_shape(app):
+    """Test row counts, rollups and alerts for a small dataset."""
+    with app.app_context():
+        progress = []
+        result = seed.seed(users=2, categories=10, years=1, end=END,
+                           chunk_size=200,
+                           progress=lambda r: progress.append(r.expenses))
+
+        assert result.users == User.query.count() == 2
+        assert result.categories == Category.query.count() == 20
+        assert result.budgets == Budget.query.count() == 2 * 10 * 12
+        assert result.expenses == Expense.query.count()
+        assert result.alerts == BudgetAlert.query.count()
+        assert len(progress) > 1 and progress == sorted(progress)
+
+        # Categories beyond the built-in profiles get numbered names
+        assert Category.query.filter_by(name='Groceries 2').count() == 2
+
+        count, total, first, last = _fingerprint()
+        assert first >= date(2025, 4, 1)
+        assert last <= END
+
+        # Rollups written alongside each chunk match a full rebuild
+        def snapshot():
+            return sorted(
+                (r.user_id, r.category_id, r.year, r.month, r.total, r.count)
+                for r in MonthlyCategoryTotal.query
+            )
+        incremental = snapshot()
+        rollups.rebuild()
+        assert snapshot() == incremental
+
+        assert all(u.data_version > 0 for u in User.query)
+        assert User.query.first().check_password('password123')
+
+def test_seed_is_deterministic(app):
+    """Test equal arguments produce identical data in a fresh database."""
+    with app.app_context():
+        seed.seed(users=2, categories=4, years=1, end=END, seed=7)
+        first = _fingerprint()
+
+    other = create_app('testing')
+    with other.app_context():
+        db.create_all()
+        seed.seed(users=2, categories=4, years=1, end=END, seed=7)
+        assert _fingerprint() == first
+
+        # A different seed gives different data
+        seed.seed(users=2, categories=4, years=1, end=END, seed=8,
+                  prefix='other')
+        other_total = db.session.query(func.sum(Expense.amount)).filter(
+            Expense.user_id.in_(
+                db.session.query(User.id).filter(
+                    User.username.like('other%')
+                )
+            )
+        ).scalar()
+        assert other_total != first[1]
+
+def test_seed_cli(app, runner):
+    """Test the seed command reports counts and refuses to reuse a prefix."""
+    args = ['seed', '--users', '1', '--categories', '2', '--years', '1',
+            '--end-date', '2026-03-15']
+    result = runner.invoke(args=args)
+    assert result.exit_code == 0, result.output
+    assert 'Seeded 1 users, 2 categories' in result.output
+
+    result = runner.invoke(args=args)
+    assert result.exit_code != 0
+    assert 'already exist' in result.output
@@ -0,0 +1,103 @@
+"""Test cases for the cached login user loader."""
+from decimal import Decimal
+from app import db
+from app.models import Category, User
+from app.user_cache import user_cache
+
+def _user_selects(statements):
+    return [s for s in statements if 'FROM users' in s]
+
+def test_cached_user_skips_the_loader_query(app, client, auth, test_user,
+                                            queries):
+    """Test a warm request does not read its own user row."""
+    auth.login()
+
+    queries.start()
+    response = client.get('/budgets/')
+    queries.stop()
+    assert response.status_code == 200
+    assert 'test_user' in response.get_data(as_text=True)
+    assert _user_selects(queries.statements) == []
+
+    with app.app_context():
+        stats = user_cache.stats()
+        assert stats['hits'] >= 1
+        assert stats['entries'] == 1
+
+def test_writes_invalidate_the_cached_user(app, client, auth, test_user,
+                                           queries):
+    """Test profile and data writes are seen on the next request."""
+    auth.login()
+    response = client.post('/budgets/settings', data={
+        'monthly_income': '7000.00', 'total_budget': '6500.00'
+    })
+    assert response.status_code == 302
+
+    queries.start()
+    response = client.get('/budgets/settings')
+    queries.stop()
+    assert '6500.00' in response.get_data(as_text=True)
+    assert len(_user_selects(queries.statements)) == 1
+
+    with app.app_context():
+        db.session.add(Category(user_id=test_user.id, name='Food',
+                                budget_amount=Decimal('20.00')))
+        db.session.commit()
+
+    queries.clear()
+    queries.start()
+    client.get('/budgets/')
+    queries.stop()
+    assert len(_user_selects(queries.statements)) == 1
+
+def test_entries_expire(app, client, auth, test_user, queries, monkeypatch):
+    """Test an entry past its TTL is reloaded from the database."""
+    monkeypatch.setitem(app.extensions['user_cache'], 'ttl', 0)
+    auth.login()
+
+    queries.start()
+    client.get('/budgets/')
+    queries.stop()
+    assert len(_user_selects(queries.statements)) == 1
+
+def test_password_hash_is_not_cached(app, test_user, queries):
+    """Test the hash is left out of the cache and loaded on demand."""
+    with app.test_request_context():
+        user_cache.load(test_user.id)
+        db.session.expunge_all()
+
+        queries.start()
+        user = user_cache.load(test_user.id)
+        queries.stop()
+        assert queries.statements == []
+        assert isinstance(user, User)
+        assert user.username == 'test_user'
+        assert 'password_hash' not in user.__dict__
+
+        queries.start()
+        assert user.check_password('password123')
+        queries.stop()
+        assert len(queries.matching('password_hash')) == 1
+
+def test_shared_backend_sees_other_processes_writes(app, test_user,
+                                                    tmp_path, monkeypatch):
+    """Test an invalidation by another process drops the shared entry."""
+    from app import create_app
+    from config import TestingConfig
+    monkeypatch.setattr(TestingConfig, 'USER_CACHE_BACKEND', 'filesystem')
+    monkeypatch.setattr(TestingConfig, 'USER_CACHE_DIR', str(tmp_path))
+    web, worker = create_app('testing'), create_app('testing')
+
+    with app.app_context():
+        user = db.session.get(User, test_user.id)
+        with web.app_context():
+            user_cache.store(user)
+        with worker.app_context():
+            # e.g. the job worker raising an alert for this user
+            user_cache.invalidate([test_user.id])
+
+    with web.app_context():
+        state = web.extensions['user_cache']
+        assert state['backend'].get(
+            user_cache._key(state, test_user.id)
+        ) is None